@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Fit Dawid-Skene label models for multiple choice questions
+
+Usage:
+    python aggregate_labels.py [project_id ...]
+
+Adds the label model schema if missing, then fits every multiple choice
+question of the given projects (default: all active ones), writing posterior
+task labels and worker quality scores. Each fit starts from the previous one,
+so scheduled re-runs after new responses are cheap. Safe to re-run.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import inspect, select, text
+
+from app.db import base  # noqa: F401 - registers every model for the ORM queries
+from app.db.session import AsyncSessionLocal, engine
+from app.models.label_model import LabelModel, WorkerConfusion
+from app.models.project import Project, ProjectStatus
+from app.models.task import TaskQuestionConsensus
+from app.services.label_model import LabelModelService
+from app.services.project import ProjectService
+
+
+def ensure_schema(conn) -> None:
+    TaskQuestionConsensus.__table__.create(conn, checkfirst=True)
+    columns = {column["name"] for column in inspect(conn).get_columns("task_question_consensus")}
+    if "posterior_label" not in columns:
+        conn.execute(text("ALTER TABLE task_question_consensus ADD COLUMN posterior_label JSON"))
+    if "posterior" not in columns:
+        conn.execute(text("ALTER TABLE task_question_consensus ADD COLUMN posterior FLOAT"))
+    LabelModel.__table__.create(conn, checkfirst=True)
+    WorkerConfusion.__table__.create(conn, checkfirst=True)
+
+
+async def main(project_ids) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(ensure_schema)
+    
+    async with AsyncSessionLocal() as db:
+        if not project_ids:
+            result = await db.execute(select(Project.id).where(Project.status == ProjectStatus.ACTIVE))
+            project_ids = result.scalars().all()
+        for project_id in project_ids:
+            project = await ProjectService.get(db, project_id=project_id)
+            if project is None:
+                print(f"{project_id}: not found")
+                continue
+            for model in await LabelModelService.fit(db, project):
+                print(
+                    f"{project_id} {model.question_id}: {model.tasks} tasks, {model.workers} workers, "
+                    f"{model.iterations} iterations{' (warm start)' if model.warm_start else ''}"
+                )
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("project_ids", nargs="*")
+    args = parser.parse_args()
+    asyncio.run(main(args.project_ids))
\ No newline at end of file
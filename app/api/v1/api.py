@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, projects, tasks, webhooks, ai_suggestions, audit
+from app.api.v1.endpoints import auth, users, projects, tasks, imports, webhooks, ai_suggestions, audit, assignments, responses, quality
 
 api_router = APIRouter()
 
@@ -8,6 +8,10 @@ api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(projects.router, prefix="/projects", tags=["projects"])
 api_router.include_router(tasks.router, tags=["tasks"])
+api_router.include_router(imports.router, tags=["imports"])
+api_router.include_router(assignments.router, tags=["assignments"])
+api_router.include_router(responses.router, tags=["responses"])
+api_router.include_router(quality.router, tags=["quality"])
 api_router.include_router(webhooks.router, prefix="/webhooks", tags=["webhooks"])
 api_router.include_router(ai_suggestions.router, prefix="/ai", tags=["ai"])
 api_router.include_router(audit.router, prefix="/audit", tags=["audit"])
\ No newline at end of file
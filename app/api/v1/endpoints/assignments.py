@@ -0,0 +1,211 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import status as http_status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.deps import get_current_active_user, get_current_worker, get_db
+from app.models.user import User
+from app.models.worker import Worker
+from app.models.project import ProjectStatus
+from app.schemas.project import Project
+from app.schemas.assignment import (
+    TaskCheckout, TaskCheckoutBatch, AssignmentReleaseBatch, AssignmentReleaseResult
+)
+from app.services.assignment import AssignmentService
+from app.services.eligibility import EligibilityService
+from app.services.project import ProjectService
+from app.services.scheduler import project_scheduler
+
+router = APIRouter()
+
+
+@router.get("/workers/me/projects", response_model=List[Project])
+async def list_available_projects(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    worker: Worker = Depends(get_current_worker),
+) -> Any:
+    """Active projects the current worker is allowed and qualified to work on"""
+    return await EligibilityService.available_projects(
+        db, worker, current_user.organization_id, skip=skip, limit=limit
+    )
+
+
+@router.post("/workers/me/checkout", response_model=TaskCheckout)
+async def checkout_next_task(
+    lease_seconds: int = Query(settings.TASK_LEASE_SECONDS, ge=30, le=86400),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    worker: Worker = Depends(get_current_worker),
+) -> Any:
+    """Lease the current worker's next task from whichever project is most due for workers"""
+    project_ids = await project_scheduler.candidates(db, worker, current_user.organization_id)
+    for project_id in project_ids[:settings.SCHEDULER_MAX_PROJECTS]:
+        checkout = await AssignmentService.checkout(
+            db, project_id=project_id, worker_id=worker.id, lease_seconds=lease_seconds
+        )
+        if checkout:
+            project_scheduler.charge(project_id)
+            assignment, task = checkout
+            return {"assignment": assignment, "task": task}
+    
+    raise HTTPException(
+        status_code=http_status.HTTP_404_NOT_FOUND,
+        detail="No tasks available"
+    )
+
+
+@router.post("/projects/{project_id}/checkout", response_model=TaskCheckout)
+async def checkout_task(
+    project_id: str,
+    lease_seconds: int = Query(settings.TASK_LEASE_SECONDS, ge=30, le=86400),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    worker: Worker = Depends(get_current_worker),
+) -> Any:
+    """Lease the next available task of a project to the current worker"""
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.use_private_workforce and project.organization_id != current_user.organization_id:
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    if project.id in (worker.blocked_project_ids or []):
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Worker is blocked from this project"
+        )
+    
+    if not await EligibilityService.is_eligible(db, worker.id, project):
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Worker does not meet the qualification requirements of this project"
+        )
+    
+    if project.status != ProjectStatus.ACTIVE:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail="Project is not active"
+        )
+    
+    checkout = await AssignmentService.checkout(
+        db, project_id=project_id, worker_id=worker.id, lease_seconds=lease_seconds
+    )
+    if not checkout:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="No tasks available"
+        )
+    
+    assignment, task = checkout
+    return {"assignment": assignment, "task": task}
+
+
+@router.post("/projects/{project_id}/checkout/batch", response_model=TaskCheckoutBatch)
+async def checkout_tasks_batch(
+    project_id: str,
+    count: int = Query(10, ge=1, le=settings.TASK_CHECKOUT_MAX_BATCH),
+    lease_seconds: int = Query(settings.TASK_LEASE_SECONDS, ge=30, le=86400),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    worker: Worker = Depends(get_current_worker),
+) -> Any:
+    """Lease up to ``count`` tasks of a project to the current worker at once"""
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.use_private_workforce and project.organization_id != current_user.organization_id:
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    if project.id in (worker.blocked_project_ids or []):
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Worker is blocked from this project"
+        )
+    
+    if not await EligibilityService.is_eligible(db, worker.id, project):
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Worker does not meet the qualification requirements of this project"
+        )
+    
+    if project.status != ProjectStatus.ACTIVE:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail="Project is not active"
+        )
+    
+    checkouts = await AssignmentService.checkout_many(
+        db, project_id=project_id, worker_id=worker.id, count=count, lease_seconds=lease_seconds
+    )
+    return {
+        "checkouts": [
+            {"assignment": assignment, "task": task} for assignment, task in checkouts
+        ]
+    }
+
+
+@router.post("/projects/{project_id}/checkout/release", response_model=AssignmentReleaseResult)
+async def release_assignments_batch(
+    project_id: str,
+    release_in: AssignmentReleaseBatch,
+    db: AsyncSession = Depends(get_db),
+    worker: Worker = Depends(get_current_worker),
+) -> Any:
+    """Release the current worker's unused leases in a project, e.g. when a session ends"""
+    released = await AssignmentService.release_many(
+        db, worker_id=worker.id, project_id=project_id, assignment_ids=release_in.assignment_ids
+    )
+    return {"released": released}
+
+
+@router.post("/assignments/{assignment_id}/release")
+async def release_assignment(
+    assignment_id: str,
+    db: AsyncSession = Depends(get_db),
+    worker: Worker = Depends(get_current_worker),
+) -> Any:
+    """Hand a leased task back so other workers can take it"""
+    released = await AssignmentService.release(db, assignment_id=assignment_id, worker_id=worker.id)
+    if not released:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Active assignment not found"
+        )
+    return {"message": "Assignment released"}
+
+
+@router.post("/assignments/{assignment_id}/extend")
+async def extend_assignment(
+    assignment_id: str,
+    lease_seconds: int = Query(settings.TASK_LEASE_SECONDS, ge=30, le=86400),
+    db: AsyncSession = Depends(get_db),
+    worker: Worker = Depends(get_current_worker),
+) -> Any:
+    """Keep a lease alive while the worker is still on the task"""
+    extended = await AssignmentService.extend(
+        db, assignment_id=assignment_id, worker_id=worker.id, lease_seconds=lease_seconds
+    )
+    if not extended:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Active assignment not found"
+        )
+    return {"message": "Assignment extended"}
\ No newline at end of file
@@ -0,0 +1,212 @@
+from typing import Any, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
+from fastapi import status as http_status
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import get_current_active_user, get_db
+from app.models.user import User
+from app.schemas.import_job import ImportJob, ImportJobWithProgress
+from app.schemas.task import TaskBulkCreate, TaskConflictMode, TaskImportOptions, TaskImportResult
+from app.services.import_job import ImportJobService
+from app.services.project import ProjectService
+from app.services.task_import import TaskImportService, detect_format
+
+router = APIRouter()
+
+
+def _parse_upload_options(
+    file_name: Optional[str],
+    file_format: Optional[str],
+    options: Optional[str]
+) -> Tuple[str, TaskImportOptions]:
+    """Resolve the format and import options sent alongside a multipart upload"""
+    try:
+        detected = detect_format(file_name, file_format)
+        parsed = TaskImportOptions.model_validate_json(options) if options else TaskImportOptions()
+    except (ValueError, ValidationError) as exc:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    return detected, parsed
+
+
+@router.post(
+    "/projects/{project_id}/imports",
+    response_model=ImportJob,
+    status_code=http_status.HTTP_202_ACCEPTED
+)
+async def create_import_job(
+    project_id: str,
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, description="Defaults to the file extension"),
+    options: Optional[str] = Form(None, description="TaskImportOptions as JSON"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """Queue a task file for background import"""
+    # Check project exists and user has access
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.organization_id != current_user.organization_id:
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    file_format, import_options = _parse_upload_options(file.filename, file_format, options)
+    
+    job = await ImportJobService.create_from_file(
+        db,
+        project_id=project_id,
+        created_by_id=current_user.id,
+        fileobj=file.file,
+        file_format=file_format,
+        file_name=file.filename,
+        options=import_options
+    )
+    return job
+
+
+@router.post("/projects/{project_id}/tasks/import", response_model=TaskImportResult)
+async def import_tasks(
+    project_id: str,
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, description="Defaults to the file extension"),
+    options: Optional[str] = Form(None, description="TaskImportOptions as JSON"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """Import a CSV, NDJSON, Parquet or Arrow task file within the request"""
+    # Check project exists and user has access
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.organization_id != current_user.organization_id:
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    file_format, import_options = _parse_upload_options(file.filename, file_format, options)
+    
+    try:
+        return await TaskImportService.import_file(
+            db,
+            fileobj=file.file,
+            file_format=file_format,
+            project_id=project_id,
+            options=import_options
+        )
+    except ValueError as exc:
+        # Unreadable file (bad Parquet footer, missing pyarrow, ...)
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+
+
+@router.post(
+    "/projects/{project_id}/imports/bulk",
+    response_model=ImportJob,
+    status_code=http_status.HTTP_202_ACCEPTED
+)
+async def create_bulk_import_job(
+    project_id: str,
+    tasks_in: TaskBulkCreate,
+    on_conflict: TaskConflictMode = Query(
+        TaskConflictMode.ERROR, description="How to handle an existing external_id"
+    ),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """Queue a bulk task payload for background import"""
+    # Check project exists and user has access
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.organization_id != current_user.organization_id:
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    job = await ImportJobService.create_from_tasks(
+        db,
+        project_id=project_id,
+        created_by_id=current_user.id,
+        tasks_in=tasks_in.tasks,
+        options=TaskImportOptions(on_conflict=on_conflict)
+    )
+    return job
+
+
+@router.get("/projects/{project_id}/imports", response_model=List[ImportJob])
+async def list_import_jobs(
+    project_id: str,
+    db: AsyncSession = Depends(get_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, le=100),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """List import jobs for a project"""
+    # Check project exists and user has access
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.organization_id != current_user.organization_id:
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    jobs = await ImportJobService.list_project_jobs(
+        db, project_id=project_id, skip=skip, limit=limit
+    )
+    return jobs
+
+
+@router.get("/imports/{job_id}", response_model=ImportJobWithProgress)
+async def get_import_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """Get import job status, throughput and ETA"""
+    job = await ImportJobService.get(db, job_id=job_id)
+    if not job:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    
+    # Check user has access to the project
+    project = await ProjectService.get(db, project_id=job.project_id)
+    if project.organization_id != current_user.organization_id:
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return ImportJobWithProgress(
+        **job.__dict__,
+        **ImportJobService.progress(job)
+    )
\ No newline at end of file
@@ -10,6 +10,7 @@ from app.schemas.project import (
     Project, ProjectCreate, ProjectUpdate, ProjectWithStats, ProjectActionResponse
 )
 from app.schemas.question import Question, QuestionCreate
+from app.services.counters import ProjectCounterService
 from app.services.project import ProjectService
 
 router = APIRouter()
@@ -80,16 +81,17 @@ async def get_project(
             detail="Not enough permissions"
         )
     
-    # Calculate additional stats
-    pending_tasks = project.total_tasks - project.completed_tasks
+    # Calculate additional stats, including counts still held on counter shards
+    counters = await ProjectCounterService.totals(db, project)
+    pending_tasks = counters["total_tasks"] - counters["completed_tasks"] - counters["expired_tasks"]
     completion_rate = (
-        project.completed_tasks / project.total_tasks
-        if project.total_tasks > 0
+        counters["completed_tasks"] / counters["total_tasks"]
+        if counters["total_tasks"] > 0
         else 0.0
     )
     
     return ProjectWithStats(
-        **project.__dict__,
+        **{**project.__dict__, **counters},
         completion_rate=completion_rate,
         pending_tasks=pending_tasks,
         active_workers=0  # TODO: Calculate from active assignments
@@ -0,0 +1,88 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import status as http_status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import get_current_active_user, get_db
+from app.models.user import User
+from app.schemas.agreement import ProjectAgreement
+from app.schemas.label_model import LabelModel
+from app.services.agreement import AgreementService
+from app.services.label_model import LabelModelService
+from app.services.project import ProjectService
+
+router = APIRouter()
+
+
+@router.get("/projects/{project_id}/agreement", response_model=ProjectAgreement)
+async def get_project_agreement(
+    project_id: str,
+    refresh: bool = Query(False, description="Recompute even if the cached result is current"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """Inter-annotator agreement of each scored question of a project"""
+    # Check project exists and user has access
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.organization_id != current_user.organization_id:
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    questions = await AgreementService.get(db, project, refresh=refresh)
+    return ProjectAgreement(project_id=project.id, questions=questions)
+
+
+@router.get("/projects/{project_id}/label-model", response_model=List[LabelModel])
+async def get_label_models(
+    project_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """Latest Dawid-Skene fit of each multiple choice question of a project"""
+    # Check project exists and user has access
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.organization_id != current_user.organization_id:
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return await LabelModelService.get(db, project)
+
+
+@router.post("/projects/{project_id}/label-model", response_model=List[LabelModel])
+async def fit_label_models(
+    project_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """Aggregate task labels and worker quality with Dawid-Skene, starting from the last fit"""
+    # Check project exists and user has access
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.organization_id != current_user.organization_id:
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return await LabelModelService.fit(db, project)
\ No newline at end of file
@@ -0,0 +1,73 @@
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi import status as http_status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.deps import get_current_worker, get_db
+from app.models.worker import Worker
+from app.models.project import ProjectStatus
+from app.schemas.response import (
+    ResponseCreate, ResponseBatchCreate, ResponseSubmission, ResponseBatchResult
+)
+from app.services.project import ProjectService
+from app.services.response import ResponseService
+
+router = APIRouter()
+
+# Leases taken before a project was paused may still be answered
+SUBMITTABLE_STATUSES = (ProjectStatus.ACTIVE, ProjectStatus.PAUSED)
+
+
+@router.post("/projects/{project_id}/responses", response_model=ResponseSubmission)
+async def submit_response(
+    project_id: str,
+    response_in: ResponseCreate,
+    db: AsyncSession = Depends(get_db),
+    worker: Worker = Depends(get_current_worker),
+) -> Any:
+    """Submit the current worker's answers for a leased task"""
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.status not in SUBMITTABLE_STATUSES:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail="Project is not accepting responses"
+        )
+    
+    return await ResponseService.submit(db, project, worker.id, response_in)
+
+
+@router.post("/projects/{project_id}/responses/batch", response_model=ResponseBatchResult)
+async def submit_responses_batch(
+    project_id: str,
+    batch_in: ResponseBatchCreate,
+    db: AsyncSession = Depends(get_db),
+    worker: Worker = Depends(get_current_worker),
+) -> Any:
+    """Submit answers for many leased tasks at once, e.g. from an offline client"""
+    if len(batch_in.responses) > settings.RESPONSE_SUBMIT_MAX_BATCH:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.RESPONSE_SUBMIT_MAX_BATCH} responses per batch"
+        )
+    
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.status not in SUBMITTABLE_STATUSES:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail="Project is not accepting responses"
+        )
+    
+    return await ResponseService.submit_many(db, project, worker.id, batch_in.responses)
\ No newline at end of file
@@ -2,17 +2,18 @@ from typing import Any, List, Optional, Dict
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from fastapi import status as http_status
 from sqlalchemy.ext.asyncio import AsyncSession
-import csv
-import io
 import json
 
 from app.core.deps import get_current_active_user, get_db
 from app.models.user import User
 from app.models.task import TaskStatus as TaskStatusEnum
 from app.schemas.task import (
-    Task, TaskCreate, TaskUpdate, TaskBulkCreate, TaskWithResponses, TaskStats
+    Task, TaskCreate, TaskUpdate, TaskBulkCreate, TaskWithResponses, TaskStats,
+    TaskImportResult, TaskBulkUpsert, TaskBulkUpsertResult, TaskDedupReport
 )
 from app.services.task import TaskService
+from app.services.task_dedup import TaskDedupService
+from app.services.task_import import TaskImportService
 from app.services.project import ProjectService
 
 router = APIRouter()
@@ -72,7 +73,38 @@ async def create_tasks_bulk(
     return tasks
 
 
-@router.post("/projects/{project_id}/tasks/csv")
+@router.post("/projects/{project_id}/tasks/upsert", response_model=TaskBulkUpsertResult)
+async def upsert_tasks_bulk(
+    project_id: str,
+    tasks_in: TaskBulkUpsert,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """Create tasks, skipping or updating those whose external_id already exists"""
+    # Check project exists and user has access
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.organization_id != current_user.organization_id:
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    result = await TaskService.upsert_many(
+        db,
+        tasks_in=tasks_in.tasks,
+        project_id=project_id,
+        on_conflict=tasks_in.on_conflict
+    )
+    return result
+
+
+@router.post("/projects/{project_id}/tasks/csv", response_model=TaskImportResult)
 async def upload_tasks_csv(
     project_id: str,
     file: UploadFile = File(...),
@@ -94,27 +126,19 @@ async def upload_tasks_csv(
             detail="Not enough permissions"
         )
     
-    # Read CSV file
-    content = await file.read()
-    csv_reader = csv.DictReader(io.StringIO(content.decode('utf-8')))
-    
-    tasks_data = []
-    for row in csv_reader:
-        # Convert row to task data
-        task_data = {
-            "external_id": row.get("external_id"),
-            "data": {k: v for k, v in row.items() if k != "external_id"},
-            "metadata": {}
-        }
-        tasks_data.append(TaskCreate(**task_data))
-    
-    # Create tasks
-    tasks = await TaskService.create_many(db, tasks_in=tasks_data, project_id=project_id)
-    
-    return {
-        "message": f"Successfully created {len(tasks)} tasks",
-        "task_count": len(tasks)
-    }
+    # Stream rows from the spooled upload (gzip/zstd inflated on the fly) batch by batch
+    try:
+        return await TaskImportService.import_file(
+            db,
+            fileobj=file.file,
+            file_format="csv",
+            project_id=project_id
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
 
 
 @router.get("/projects/{project_id}/tasks", response_model=List[Task])
@@ -178,6 +202,32 @@ async def get_project_task_stats(
     return stats
 
 
+@router.post("/projects/{project_id}/tasks/dedup", response_model=TaskDedupReport)
+async def dedup_project_tasks(
+    project_id: str,
+    apply: bool = Query(False, description="Backfill hashes and delete unstarted duplicates"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """Scan a project for tasks with identical data"""
+    # Check project exists and user has access
+    project = await ProjectService.get(db, project_id=project_id)
+    if not project:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if project.organization_id != current_user.organization_id:
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    report = await TaskDedupService.scan_project(db, project_id=project_id, apply=apply)
+    return report
+
+
 @router.get("/tasks/{task_id}", response_model=TaskWithResponses)
 async def get_task(
     task_id: str,
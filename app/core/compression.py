@@ -0,0 +1,170 @@
+"""
+Streaming decompression for gzip and zstd uploads
+Files are detected by their magic bytes and wrapped in a decompressing reader;
+request bodies sent with Content-Encoding are inflated chunk by chunk as the
+application reads them. Nothing is ever inflated in memory as a whole, and
+bodies inflating past MAX_DECOMPRESSED_BODY_BYTES are rejected with 413.
+"""
+from typing import BinaryIO, Callable, Optional
+import gzip
+import io
+import zlib
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+BODY_CHUNK_BYTES = 64 * 1024  # Inflated bytes per request body message
+ZSTD_INPUT_SLICE = 256  # Compressed bytes per zstd call; a slice inflates to a few MB at most
+
+try:
+    from zstandard import ZstdError
+    DECOMPRESSION_ERRORS = (gzip.BadGzipFile, EOFError, zlib.error, ZstdError)
+except ImportError:
+    DECOMPRESSION_ERRORS = (gzip.BadGzipFile, EOFError, zlib.error)
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstandard is required for zstd-compressed uploads")
+    return zstandard
+
+
+def strip_compression_suffix(file_name: Optional[str]) -> Optional[str]:
+    """data.csv.gz -> data.csv"""
+    if not file_name:
+        return file_name
+    for suffix in COMPRESSION_SUFFIXES:
+        if file_name.lower().endswith(suffix):
+            return file_name[:-len(suffix)]
+    return file_name
+
+
+def sniff_compression(fileobj: BinaryIO) -> Optional[str]:
+    """Detect gzip or zstd from the first bytes of a seekable file"""
+    position = fileobj.tell()
+    head = fileobj.read(len(ZSTD_MAGIC))
+    fileobj.seek(position)
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+def open_decompressed(fileobj: BinaryIO) -> BinaryIO:
+    """Wrap a file in a streaming decompressor if it is gzip or zstd compressed"""
+    compression = sniff_compression(fileobj)
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    if compression == "zstd":
+        reader = _zstandard().ZstdDecompressor().stream_reader(
+            fileobj, read_across_frames=True, closefd=False
+        )
+        return io.BufferedReader(reader)
+    return fileobj
+
+
+class _StreamDecompressor:
+    """
+    Chunk-by-chunk decompressor that continues across gzip members and zstd frames
+    
+    Output is bounded: each call returns at most ``max_length`` bytes and keeps
+    the rest of the input for the next call, so a small body cannot inflate
+    into memory all at once.
+    """
+    
+    def __init__(self, factory: Callable[[], object], bounded: bool) -> None:
+        self._factory = factory
+        self._obj = factory()
+        self._bounded = bounded  # zlib takes max_length; zstd is fed ZSTD_INPUT_SLICE bytes at a time
+        self._input = b""
+        self._output = b""
+    
+    @property
+    def needs_input(self) -> bool:
+        return not self._input and not self._output
+    
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        self._input += data
+        out = self._output
+        while self._input and len(out) < max_length:
+            if self._obj.eof:
+                self._obj = self._factory()
+            if self._bounded:
+                out += self._obj.decompress(self._input, max_length - len(out))
+                self._input = self._obj.unused_data if self._obj.eof else self._obj.unconsumed_tail
+            else:
+                data, self._input = self._input[:ZSTD_INPUT_SLICE], self._input[ZSTD_INPUT_SLICE:]
+                out += self._obj.decompress(data)
+                if self._obj.eof:
+                    self._input = self._obj.unused_data + self._input
+        out, self._output = out[:max_length], out[max_length:]
+        return out
+
+
+def _body_decompressor(encoding: str) -> Optional[_StreamDecompressor]:
+    if encoding in ("gzip", "x-gzip"):
+        return _StreamDecompressor(lambda: zlib.decompressobj(16 + zlib.MAX_WBITS), bounded=True)
+    if encoding == "zstd":
+        return _StreamDecompressor(_zstandard().ZstdDecompressor().decompressobj, bounded=False)
+    return None
+
+
+class DecompressRequestMiddleware:
+    """Inflate gzip and zstd request bodies as they are received, up to MAX_DECOMPRESSED_BODY_BYTES"""
+    
+    def __init__(self, app) -> None:
+        self.app = app
+    
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        headers = dict(scope["headers"])
+        encoding = headers.get(b"content-encoding", b"").decode("latin-1").strip().lower()
+        decompressor = _body_decompressor(encoding) if encoding else None
+        if decompressor is None:
+            await self.app(scope, receive, send)
+            return
+        
+        # The inflated length is unknown, so drop the length and encoding headers
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        limit = settings.MAX_DECOMPRESSED_BODY_BYTES
+        more_body = True
+        inflated = 0
+        
+        async def receive_decompressed():
+            nonlocal more_body, inflated
+            while True:
+                if decompressor.needs_input and more_body:
+                    message = await receive()
+                    if message["type"] != "http.request":
+                        return message
+                    more_body = message.get("more_body", False)
+                    body = decompressor.decompress(message.get("body", b""), BODY_CHUNK_BYTES)
+                else:
+                    body = decompressor.decompress(b"", BODY_CHUNK_BYTES)
+                
+                inflated += len(body)
+                if inflated > limit:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Decompressed request body exceeds {limit} bytes"
+                    )
+                # Inflated output is handed on in BODY_CHUNK_BYTES messages
+                pending = more_body or not decompressor.needs_input
+                if body or not pending:
+                    return {"type": "http.request", "body": body, "more_body": pending}
+        
+        await self.app(scope, receive_decompressed, send)
\ No newline at end of file
@@ -64,11 +64,53 @@ class Settings(BaseSettings):
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     
+    # Request bodies
+    MAX_DECOMPRESSED_BODY_BYTES: int = 100 * 1024 * 1024  # Inflated gzip/zstd body; larger is rejected with 413
+    
     # Worker Settings
     MAX_WORKERS_PER_TASK: int = 3
     CONSENSUS_THRESHOLD: float = 0.75
     GOLD_STANDARD_PERCENTAGE: int = 10
     
+    # Task ingestion
+    TASK_INSERT_BATCH_SIZE: int = 1000
+    TASK_IMPORT_BATCH_SIZE: int = 5000
+    TASK_IMPORT_MAX_ERRORS: int = 100
+    TASK_DEDUP_REPORT_GROUPS: int = 100
+    IMPORT_STORAGE_DIR: str = "./storage/imports"
+    IMPORT_JOB_POLL_INTERVAL: float = 2.0
+    IMPORT_JOB_STALE_SECONDS: int = 120
+    
+    # Task checkout
+    TASK_LEASE_SECONDS: int = 900
+    TASK_CHECKOUT_CANDIDATES: int = 10  # Rows locked per checkout attempt
+    TASK_CHECKOUT_MAX_BATCH: int = 50
+    EXPIRY_SWEEP_SECONDS: int = 30  # Lease and task expiry sweep interval, 0 = disabled
+    EXPIRY_SWEEP_BATCH_SIZE: int = 1000  # Rows updated per sweep transaction
+    DISPATCH_QUEUE_REFRESH_SECONDS: int = 300  # Full ready queue rebuild, 0 = startup only
+    DISPATCH_ANSWERED_SECONDS: int = 60  # Reload a worker's already-given tasks after this
+    DISPATCH_ANSWERED_MAX_WORKERS: int = 10000  # Workers whose already-given tasks a queue keeps
+    SCHEDULER_REFRESH_SECONDS: int = 60  # Cross-project weights (priority, deadline, backlog)
+    SCHEDULER_MAX_PROJECTS: int = 5  # Projects tried per "next task for me" request
+    
+    # Response submission
+    RESPONSE_SUBMIT_MAX_BATCH: int = 500  # Responses per batch submit request
+    
+    # Project counters
+    PROJECT_COUNTER_SHARDS: int = 16  # Shard rows per project with sharded_counters
+    COUNTER_FOLD_SECONDS: int = 10  # Shard fold interval, 0 = disabled
+    COUNTER_RECONCILE_SECONDS: int = 0  # Recount from source tables, 0 = reconcile_counters.py only
+    
+    # Agreement metrics
+    AGREEMENT_CACHE_SECONDS: int = 600  # Minimum age before new responses trigger a recompute
+    AGREEMENT_MAX_LABELS: int = 100  # Labels reported per question, most used first
+    
+    # Dawid-Skene label aggregation
+    LABEL_MODEL_MAX_ITERATIONS: int = 100
+    LABEL_MODEL_TOLERANCE: float = 1e-6  # Relative log-likelihood gain that counts as converged
+    LABEL_MODEL_SMOOTHING: float = 0.01  # Pseudo-count added to every confusion matrix cell
+    LABEL_MODEL_DEFAULT_ACCURACY: float = 0.7  # New workers without an accuracy_rate
+    
     # First User (Admin)
     FIRST_SUPERUSER_EMAIL: str = "admin@verita.ai"
     FIRST_SUPERUSER_PASSWORD: str = "changethis"
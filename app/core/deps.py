@@ -12,6 +12,7 @@ from app.core import security
 from app.core.config import settings
 from app.models.user import User
 from app.models.api_key import APIKey
+from app.models.worker import Worker, WorkerStatus
 from app.schemas.token import TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(
@@ -64,6 +65,22 @@ async def get_current_active_superuser(
     return current_user
 
 
+async def get_current_worker(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Worker:
+    result = await db.execute(
+        select(Worker).where(Worker.user_id == current_user.id)
+    )
+    worker = result.scalar_one_or_none()
+    
+    if not worker:
+        raise HTTPException(status_code=403, detail="User has no worker profile")
+    if worker.status != WorkerStatus.ACTIVE:
+        raise HTTPException(status_code=403, detail="Worker is not active")
+    return worker
+
+
 async def get_user_from_api_key(
     db: AsyncSession = Depends(get_db),
     api_key: Optional[str] = Depends(api_key_header)
@@ -0,0 +1,14 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def utcnow() -> datetime:
+    """Timezone-aware current UTC time, safe for timestamptz columns"""
+    return datetime.now(timezone.utc)
+
+
+def ensure_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Attach UTC to naive datetimes read back from SQLite"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
\ No newline at end of file
@@ -2,10 +2,13 @@ from app.db.base_class import Base
 from app.models.user import User
 from app.models.organization import Organization
 from app.models.team import Team, TeamMember
-from app.models.project import Project
-from app.models.task import Task
+from app.models.project import Project, ProjectCounterShard
+from app.models.task import Task, TaskWorkerRestriction, TaskQuestionConsensus
 from app.models.question import Question
 from app.models.response import Response, ResponseValue
-from app.models.worker import Worker, WorkerAssignment
+from app.models.worker import Worker, WorkerAssignment, WorkerProjectEligibility
 from app.models.webhook import Webhook, WebhookEvent
-from app.models.api_key import APIKey
\ No newline at end of file
+from app.models.api_key import APIKey
+from app.models.import_job import ImportJob
+from app.models.agreement import QuestionAgreement
+from app.models.label_model import LabelModel, WorkerConfusion
\ No newline at end of file
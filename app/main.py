@@ -5,10 +5,16 @@ from prometheus_fastapi_instrumentator import Instrumentator
 import sentry_sdk
 from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
 
+from app.core.compression import DecompressRequestMiddleware
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.db.session import engine
 from app.db import base
+from app.services.counters import counter_reconciler
+from app.services.dispatch import dispatch_queues
+from app.services.eligibility import eligibility_refresher
+from app.services.expiry import expiry_sweeper
+from app.services.import_job import import_job_worker
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -39,6 +45,9 @@ app.add_middleware(
     allowed_hosts=["*.verita.ai", "localhost", "127.0.0.1"]
 )
 
+# Inflate gzip/zstd request bodies as they stream in
+app.add_middleware(DecompressRequestMiddleware)
+
 # Prometheus metrics
 Instrumentator().instrument(app).expose(app)
 
@@ -51,6 +60,31 @@ async def startup_event():
     """Initialize database tables"""
     async with engine.begin() as conn:
         await conn.run_sync(base.Base.metadata.create_all)
+    
+    # Resume interrupted imports and pick up queued ones
+    import_job_worker.start()
+    
+    # Build the ready queues of active projects, then refresh them periodically
+    dispatch_queues.start()
+    
+    # Return lapsed leases and expire overdue tasks
+    expiry_sweeper.start()
+    
+    # Fold counter shards into projects and repair drifted counters
+    counter_reconciler.start()
+    
+    # Re-match workers and projects whose eligibility inputs changed
+    eligibility_refresher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    await import_job_worker.stop()
+    await dispatch_queues.stop()
+    await expiry_sweeper.stop()
+    await counter_reconciler.stop()
+    await eligibility_refresher.stop()
 
 
 @app.get("/")
@@ -1,13 +1,18 @@
 from app.models.user import User
 from app.models.organization import Organization
 from app.models.team import Team, TeamMember
-from app.models.project import Project, ProjectStatus
-from app.models.task import Task, TaskStatus
+from app.models.project import Project, ProjectStatus, ProjectCounterShard
+from app.models.task import (
+    Task, TaskStatus, TaskWorkerRestriction, RestrictionType, TaskQuestionConsensus
+)
 from app.models.question import Question, QuestionType
 from app.models.response import Response, ResponseValue
-from app.models.worker import Worker, WorkerAssignment
+from app.models.worker import Worker, WorkerAssignment, AssignmentStatus, WorkerProjectEligibility
 from app.models.webhook import Webhook, WebhookEvent
 from app.models.audit_trail import AuditTrail, DataVersion
+from app.models.import_job import ImportJob, ImportJobStatus
+from app.models.agreement import QuestionAgreement
+from app.models.label_model import LabelModel, WorkerConfusion
 
 __all__ = [
     "User",
@@ -16,16 +21,27 @@ __all__ = [
     "TeamMember",
     "Project",
     "ProjectStatus",
+    "ProjectCounterShard",
     "Task",
     "TaskStatus",
+    "TaskWorkerRestriction",
+    "TaskQuestionConsensus",
+    "RestrictionType",
     "Question",
     "QuestionType",
     "Response",
     "ResponseValue",
     "Worker",
     "WorkerAssignment",
+    "AssignmentStatus",
+    "WorkerProjectEligibility",
     "Webhook",
     "WebhookEvent",
     "AuditTrail",
-    "DataVersion"
+    "DataVersion",
+    "ImportJob",
+    "ImportJobStatus",
+    "QuestionAgreement",
+    "LabelModel",
+    "WorkerConfusion"
 ]
\ No newline at end of file
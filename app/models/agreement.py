@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, JSON, DateTime
+
+from app.db.base_class import Base
+
+
+class QuestionAgreement(Base):
+    """Cached inter-annotator agreement of one question across its project"""
+    __tablename__ = "question_agreement"
+    
+    question_id = Column(String, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Scope
+    metric = Column(String, nullable=False)  # Krippendorff distance: nominal or interval
+    items = Column(Integer, default=0, nullable=False)  # Tasks with two or more answers
+    responses = Column(Integer, default=0, nullable=False)  # Answers on those tasks
+    
+    # Agreement
+    observed_agreement = Column(Float)
+    expected_agreement = Column(Float)
+    fleiss_kappa = Column(Float)
+    krippendorff_alpha = Column(Float)
+    labels = Column(JSON, default=[])  # [{label, responses, share, kappa, agreement}], most used first
+    
+    # Freshness
+    project_responses = Column(Integer, default=0)  # Project total_responses when computed
+    computed_at = Column(DateTime(timezone=True))
+    seconds = Column(Float)  # Time spent computing
+    
+    def __repr__(self):
+        return f"<QuestionAgreement {self.question_id}: kappa {self.fleiss_kappa}>"
\ No newline at end of file
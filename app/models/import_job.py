@@ -0,0 +1,63 @@
+from sqlalchemy import Column, String, Text, Integer, BigInteger, ForeignKey, Enum, JSON, DateTime, Index
+from sqlalchemy.orm import relationship
+import uuid
+import enum
+
+from app.db.base_class import Base
+
+
+class ImportJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    
+    # Project and creator
+    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
+    project = relationship("Project")
+    
+    created_by_id = Column(String, ForeignKey("users.id"), nullable=False)
+    created_by = relationship("User")
+    
+    # Stored payload
+    file_format = Column(String, nullable=False)  # csv, ndjson, parquet, arrow, tasks (ndjson of TaskCreate)
+    file_name = Column(String)
+    file_path = Column(String, nullable=False)
+    options = Column(JSON, default={})
+    
+    # Status
+    status = Column(Enum(ImportJobStatus), default=ImportJobStatus.QUEUED, index=True)
+    error_message = Column(Text)
+    
+    # Progress, updated in the same transaction as each committed batch
+    rows_processed = Column(Integer, default=0)  # Rows consumed from the payload
+    rows_created = Column(Integer, default=0)
+    rows_failed = Column(Integer, default=0)
+    rows_updated = Column(Integer, default=0)
+    rows_skipped = Column(Integer, default=0)
+    rows_duplicate = Column(Integer, default=0)  # Linked to a task with the same content
+    rows_gold = Column(Integer, default=0)
+    batches_committed = Column(Integer, default=0)
+    bytes_total = Column(BigInteger, default=0)
+    bytes_processed = Column(BigInteger, default=0)
+    errors = Column(JSON, default=[])  # First TASK_IMPORT_MAX_ERRORS row errors
+    
+    # Timing
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    heartbeat_at = Column(DateTime(timezone=True))  # Stale heartbeat => job can be reclaimed
+    claim_token = Column(String)  # Set by each claim; progress is only written under the current one
+    resumed_from_row = Column(Integer, default=0)  # rows_processed when the current run started
+    
+    __table_args__ = (
+        Index('idx_import_job_project', 'project_id', 'created_at'),
+    )
+    
+    def __repr__(self):
+        return f"<ImportJob {self.id} for Project {self.project_id}>"
\ No newline at end of file
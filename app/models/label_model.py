@@ -0,0 +1,48 @@
+from sqlalchemy import Column, String, Boolean, Integer, Float, ForeignKey, JSON, DateTime, Index
+
+from app.db.base_class import Base
+
+
+class LabelModel(Base):
+    """Dawid-Skene fit of one categorical question, kept to warm-start the next fit"""
+    __tablename__ = "label_models"
+    
+    question_id = Column(String, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Parameters
+    labels = Column(JSON, nullable=False)  # Order of priors and confusion matrix rows and columns
+    priors = Column(JSON, nullable=False)  # Probability of each true label
+    
+    # Fit
+    tasks = Column(Integer, default=0, nullable=False)
+    workers = Column(Integer, default=0, nullable=False)
+    responses = Column(Integer, default=0, nullable=False)
+    iterations = Column(Integer, default=0, nullable=False)
+    converged = Column(Boolean, default=False)
+    warm_start = Column(Boolean, default=False)  # Started from the previous fit's parameters
+    log_likelihood = Column(Float)
+    computed_at = Column(DateTime(timezone=True))
+    seconds = Column(Float)
+    
+    def __repr__(self):
+        return f"<LabelModel {self.question_id}: {self.iterations} iterations>"
+
+
+class WorkerConfusion(Base):
+    """A worker's estimated confusion matrix on one question"""
+    __tablename__ = "worker_confusion"
+    
+    question_id = Column(String, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    worker_id = Column(String, ForeignKey("workers.id", ondelete="CASCADE"), primary_key=True)
+    
+    matrix = Column(JSON, nullable=False)  # [true label][given label] probabilities, in LabelModel.labels order
+    quality = Column(Float)  # Probability of a correct answer: priors weighted diagonal
+    responses = Column(Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_worker_confusion_worker', 'worker_id'),
+    )
+    
+    def __repr__(self):
+        return f"<WorkerConfusion {self.worker_id} on {self.question_id}>"
\ No newline at end of file
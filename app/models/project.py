@@ -1,9 +1,10 @@
-from sqlalchemy import Column, String, Text, Boolean, Integer, Float, ForeignKey, Enum, JSON, Table
+from sqlalchemy import Column, String, Text, Boolean, Integer, Float, ForeignKey, Enum, JSON, Table, DateTime
 from sqlalchemy.orm import relationship
 import uuid
 import enum
 
 from app.db.base_class import Base
+from app.models.task import TaskPriority
 
 
 class ProjectStatus(str, enum.Enum):
@@ -43,15 +44,15 @@ class Project(Base):
     slug = Column(String, unique=True, index=True, nullable=False)
     description = Column(Text)
     instructions = Column(Text, nullable=False)
-
+    
     # Type and status
     project_type = Column(Enum(ProjectType), default=ProjectType.CLASSIFICATION)
     status = Column(Enum(ProjectStatus), default=ProjectStatus.DRAFT, index=True)
-
+    
     # Organization and creator
     organization_id = Column(String, ForeignKey("organizations.id"), nullable=False)
     organization = relationship("Organization", back_populates="projects")
-
+    
     creator_id = Column(String, ForeignKey("users.id"), nullable=False)
     creator = relationship("User", back_populates="created_projects")
     
@@ -67,11 +68,18 @@ class Project(Base):
     min_accuracy_threshold = Column(Float, default=0.8)
     enable_tiebreaker = Column(Boolean, default=True)
     
+    # Scheduling across projects
+    priority = Column(Enum(TaskPriority), default=TaskPriority.MEDIUM)
+    deadline = Column(DateTime(timezone=True))
+    
     # Workforce settings
     use_private_workforce = Column(Boolean, default=False)
     require_qualification = Column(Boolean, default=False)
     qualification_requirements = Column(JSON, default={})
     
+    # Task data
+    data_schema = Column(JSON)  # {field: {type, required, min_length, max_length, enum, pattern}}
+    
     # UI customization
     custom_css = Column(Text)
     custom_javascript = Column(Text)
@@ -84,8 +92,10 @@ class Project(Base):
     # Statistics
     total_tasks = Column(Integer, default=0)
     completed_tasks = Column(Integer, default=0)
+    expired_tasks = Column(Integer, default=0)
     total_responses = Column(Integer, default=0)
     average_completion_time = Column(Float)
+    sharded_counters = Column(Boolean, default=False)  # Hot project: counts go to ProjectCounterShard rows
     
     # Relationships
     teams = relationship("Team", secondary=project_teams, back_populates="projects")
@@ -94,4 +104,24 @@ class Project(Base):
     webhook_events = relationship("WebhookEvent", back_populates="project")
     
     def __repr__(self):
-        return f"<Project {self.name}>"
\ No newline at end of file
+        return f"<Project {self.name}>"
+
+
+# Counters kept on Project and, for sharded projects, on ProjectCounterShard
+PROJECT_COUNTERS = ("total_tasks", "completed_tasks", "expired_tasks", "total_responses")
+
+
+class ProjectCounterShard(Base):
+    """Slice of a hot project's counters; summed on read and folded into Project"""
+    __tablename__ = "project_counter_shards"
+    
+    project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    
+    total_tasks = Column(Integer, default=0, nullable=False)
+    completed_tasks = Column(Integer, default=0, nullable=False)
+    expired_tasks = Column(Integer, default=0, nullable=False)
+    total_responses = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<ProjectCounterShard {self.project_id}/{self.shard}>"
\ No newline at end of file
@@ -1,5 +1,7 @@
-from sqlalchemy import Column, String, Boolean, Integer, Float, ForeignKey, Enum, JSON, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, String, Boolean, Integer, Float, ForeignKey, Enum, JSON, Index, DateTime, text, bindparam
+)
+from sqlalchemy.orm import relationship, validates
 import uuid
 import enum
 
@@ -22,12 +24,40 @@ class TaskPriority(str, enum.Enum):
     CRITICAL = "critical"
 
 
+# Dense dispatch order, lowest first; the enum itself sorts alphabetically
+TASK_PRIORITY_RANK = {
+    TaskPriority.CRITICAL: 0,
+    TaskPriority.HIGH: 1,
+    TaskPriority.MEDIUM: 2,
+    TaskPriority.LOW: 3,
+}
+
+# Statuses in which a task can still be leased
+READY_TASK_STATUSES = (TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
+
+
+def priority_rank(priority) -> int:
+    if priority is None:
+        return TASK_PRIORITY_RANK[TaskPriority.MEDIUM]
+    return TASK_PRIORITY_RANK[TaskPriority(priority)]
+
+
+def ready_status_clause():
+    """
+    Task.status IN READY_TASK_STATUSES with the statuses inlined in the SQL,
+    which SQLite needs before it will match the partial idx_task_ready
+    """
+    return Task.status.in_(
+        bindparam("ready_statuses", list(READY_TASK_STATUSES), expanding=True, literal_execute=True)
+    )
+
+
 class Task(Base):
     __tablename__ = "tasks"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     external_id = Column(String, unique=True, index=True)  # Customer-provided ID
-
+    
     # Project relationship
     project_id = Column(String, ForeignKey("projects.id"), nullable=False)
     project = relationship("Project", back_populates="tasks")
@@ -35,10 +65,12 @@ class Task(Base):
     # Task data
     data = Column(JSON, nullable=False)  # The actual content to be annotated
     task_metadata = Column("metadata", JSON, default={})  # Additional metadata
+    content_hash = Column(String(64))  # SHA-256 of canonical JSON data, unique per project
     
     # Status and priority
     status = Column(Enum(TaskStatus), default=TaskStatus.PENDING, index=True)
     priority = Column(Enum(TaskPriority), default=TaskPriority.MEDIUM)
+    priority_rank = Column(Integer, default=TASK_PRIORITY_RANK[TaskPriority.MEDIUM], nullable=False)
     
     # Gold standard
     is_gold_standard = Column(Boolean, default=False)
@@ -50,26 +82,90 @@ class Task(Base):
     # Completion tracking
     required_responses = Column(Integer, default=3)
     completed_responses = Column(Integer, default=0)
+    active_leases = Column(Integer, default=0)  # Unexpired WorkerAssignments holding a slot
     consensus_score = Column(Float)
     
     # Assignment
     batch_id = Column(String, index=True)  # For grouping tasks
     exclusive_worker_ids = Column(JSON)  # List of worker IDs who can work on this
     excluded_worker_ids = Column(JSON)  # List of worker IDs who cannot work on this
+    is_exclusive = Column(Boolean, default=False)  # exclusive_worker_ids is non-empty
     
     # Timing
-    expires_at = Column(String)  # ISO timestamp
+    expires_at = Column(DateTime(timezone=True))  # Open tasks past this are marked EXPIRED
     average_time_taken = Column(Integer)  # In seconds
     
     # Relationships
     responses = relationship("Response", back_populates="task", cascade="all, delete-orphan")
     worker_assignments = relationship("WorkerAssignment", back_populates="task")
+    worker_restrictions = relationship(
+        "TaskWorkerRestriction", cascade="all, delete-orphan", passive_deletes=True
+    )
     
     # Create composite index for efficient querying
     __table_args__ = (
         Index('idx_project_status', 'project_id', 'status'),
         Index('idx_batch_status', 'batch_id', 'status'),
+        Index('idx_project_content_hash', 'project_id', 'content_hash', unique=True),
+        # Checkout candidates: an ordered range scan, limited to leasable tasks
+        Index(
+            'idx_task_ready', 'project_id', 'priority_rank', 'created_at',
+            postgresql_where=text("status IN ('PENDING', 'IN_PROGRESS')"),
+            sqlite_where=text("status IN ('PENDING', 'IN_PROGRESS')")
+        ),
+        # Expiry sweep: only open tasks with a deadline
+        Index(
+            'idx_task_expiry', 'expires_at',
+            postgresql_where=text("status IN ('PENDING', 'IN_PROGRESS') AND expires_at IS NOT NULL"),
+            sqlite_where=text("status IN ('PENDING', 'IN_PROGRESS') AND expires_at IS NOT NULL")
+        ),
     )
     
+    @validates("priority")
+    def _sync_priority_rank(self, key, value):
+        self.priority_rank = priority_rank(value)
+        return value
+    
+    def __repr__(self):
+        return f"<Task {self.id} for Project {self.project_id}>"
+
+
+class RestrictionType(str, enum.Enum):
+    EXCLUSIVE = "exclusive"  # Only listed workers may take the task
+    EXCLUDED = "excluded"  # Listed workers may not take the task
+
+
+class TaskWorkerRestriction(Base):
+    """Indexed copy of Task.exclusive_worker_ids and Task.excluded_worker_ids"""
+    __tablename__ = "task_worker_restrictions"
+    
+    task_id = Column(String, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    worker_id = Column(String, primary_key=True)
+    restriction_type = Column(Enum(RestrictionType), primary_key=True)
+    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
+    
+    __table_args__ = (
+        Index('idx_restriction_worker_project', 'worker_id', 'project_id', 'restriction_type'),
+        Index('idx_restriction_project_type', 'project_id', 'restriction_type'),
+    )
+    
+    def __repr__(self):
+        return f"<TaskWorkerRestriction {self.restriction_type} {self.worker_id} -> {self.task_id}>"
+
+
+class TaskQuestionConsensus(Base):
+    """Running label histogram of one question on one task"""
+    __tablename__ = "task_question_consensus"
+    
+    task_id = Column(String, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    question_id = Column(String, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    
+    responses = Column(Integer, default=0, nullable=False)  # Responses that answered the question
+    counts = Column(JSON, nullable=False)  # {label: responses}
+    label = Column(JSON)  # Leading answer
+    score = Column(Float)  # Agreement, 0..1
+    posterior_label = Column(JSON)  # Dawid-Skene label, categorical questions only
+    posterior = Column(Float)  # Its posterior probability
+    
     def __repr__(self):
-        return f"<Task {self.id} for Project {self.project_id}>"
\ No newline at end of file
+        return f"<TaskQuestionConsensus {self.question_id} on {self.task_id}>"
\ No newline at end of file
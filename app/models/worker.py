@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Integer, Float, ForeignKey, Enum, JSON, Index
+from sqlalchemy import Column, String, Boolean, Integer, Float, ForeignKey, Enum, JSON, Index, DateTime
 from sqlalchemy.orm import relationship
 import uuid
 import enum
@@ -81,6 +81,18 @@ class Worker(Base):
         return f"<Worker {self.email}>"
 
 
+class AssignmentStatus(str, enum.Enum):
+    ASSIGNED = "assigned"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    EXPIRED = "expired"
+    RELEASED = "released"
+
+
+# Statuses that hold a lease on the task until expires_at
+ACTIVE_ASSIGNMENT_STATUSES = (AssignmentStatus.ASSIGNED.value, AssignmentStatus.IN_PROGRESS.value)
+
+
 class WorkerAssignment(Base):
     __tablename__ = "worker_assignments"
     
@@ -93,18 +105,37 @@ class WorkerAssignment(Base):
     task_id = Column(String, ForeignKey("tasks.id"), nullable=False)
     task = relationship("Task", back_populates="worker_assignments")
     
+    project_id = Column(String, ForeignKey("projects.id"))
+    
     # Assignment details
-    assigned_at = Column(String)  # ISO timestamp
-    expires_at = Column(String)  # ISO timestamp
-    completed_at = Column(String)  # ISO timestamp
+    assigned_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True))
     
     # Status
-    status = Column(String, default="assigned")  # assigned, in_progress, completed, expired
+    status = Column(String, default="assigned")  # assigned, in_progress, completed, expired, released
     
     # Unique constraint to prevent duplicate assignments
     __table_args__ = (
         Index('idx_worker_task_unique', 'worker_id', 'task_id', unique=True),
+        Index('idx_assignment_worker_project', 'worker_id', 'project_id', 'status'),
+        Index('idx_assignment_status_expires', 'status', 'expires_at'),
+    )
+    
+    def __repr__(self):
+        return f"<WorkerAssignment {self.worker_id} -> {self.task_id}>"
+
+
+class WorkerProjectEligibility(Base):
+    """Precomputed match of a worker against a qualification-gated project"""
+    __tablename__ = "worker_project_eligibility"
+    
+    worker_id = Column(String, ForeignKey("workers.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    
+    __table_args__ = (
+        Index('idx_eligibility_project', 'project_id'),
     )
     
     def __repr__(self):
-        return f"<WorkerAssignment {self.worker_id} -> {self.task_id}>"
\ No newline at end of file
+        return f"<WorkerProjectEligibility {self.worker_id} -> {self.project_id}>"
\ No newline at end of file
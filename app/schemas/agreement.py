@@ -0,0 +1,33 @@
+from typing import Optional, List
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class LabelAgreement(BaseModel):
+    label: str
+    responses: int
+    share: float  # Of all answers to the question
+    kappa: Optional[float] = None
+    agreement: Optional[float] = None  # Pairs involving the label in which both chose it
+
+
+class QuestionAgreement(BaseModel):
+    question_id: str
+    metric: str  # nominal, interval (Likert) or binary (checkbox, per option)
+    items: int
+    responses: int
+    observed_agreement: Optional[float] = None
+    expected_agreement: Optional[float] = None
+    fleiss_kappa: Optional[float] = None
+    krippendorff_alpha: Optional[float] = None
+    labels: List[LabelAgreement] = []
+    computed_at: Optional[datetime] = None
+    seconds: Optional[float] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ProjectAgreement(BaseModel):
+    project_id: str
+    questions: List[QuestionAgreement]
\ No newline at end of file
@@ -0,0 +1,46 @@
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+from app.schemas.task import Task
+
+
+class WorkerAssignmentBase(BaseModel):
+    worker_id: str
+    task_id: str
+    project_id: Optional[str] = None
+
+
+class WorkerAssignmentInDBBase(WorkerAssignmentBase):
+    id: str
+    status: str
+    assigned_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class WorkerAssignment(WorkerAssignmentInDBBase):
+    pass
+
+
+class TaskCheckout(BaseModel):
+    """A leased task; submit before the assignment expires"""
+    assignment: WorkerAssignment
+    task: Task
+
+
+class TaskCheckoutBatch(BaseModel):
+    checkouts: List[TaskCheckout]
+
+
+class AssignmentReleaseBatch(BaseModel):
+    """Assignments to release; all of the worker's leases in the project if omitted"""
+    assignment_ids: Optional[List[str]] = None
+
+
+class AssignmentReleaseResult(BaseModel):
+    released: int
\ No newline at end of file
@@ -0,0 +1,46 @@
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel
+from datetime import datetime
+
+from app.models.import_job import ImportJobStatus
+
+
+class ImportJobBase(BaseModel):
+    file_format: str
+    file_name: Optional[str] = None
+    options: Dict[str, Any] = {}
+
+
+class ImportJobInDBBase(ImportJobBase):
+    id: str
+    project_id: str
+    created_by_id: str
+    status: ImportJobStatus
+    error_message: Optional[str] = None
+    rows_processed: int = 0
+    rows_created: int = 0
+    rows_failed: int = 0
+    rows_updated: int = 0
+    rows_skipped: int = 0
+    rows_duplicate: int = 0
+    rows_gold: int = 0
+    batches_committed: int = 0
+    bytes_total: int = 0
+    bytes_processed: int = 0
+    errors: List[Dict[str, Any]] = []
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ImportJob(ImportJobInDBBase):
+    pass
+
+
+class ImportJobWithProgress(ImportJobInDBBase):
+    throughput_rows_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    percent_complete: float = 0.0
\ No newline at end of file
@@ -0,0 +1,21 @@
+from typing import Optional, List
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class LabelModel(BaseModel):
+    question_id: str
+    labels: List[str]
+    priors: List[float]
+    tasks: int
+    workers: int
+    responses: int
+    iterations: int
+    converged: bool = False
+    warm_start: bool = False
+    log_likelihood: Optional[float] = None
+    computed_at: Optional[datetime] = None
+    seconds: Optional[float] = None
+    
+    class Config:
+        from_attributes = True
\ No newline at end of file
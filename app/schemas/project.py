@@ -1,8 +1,40 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from pydantic import BaseModel, Field
 from datetime import datetime
 
 from app.models.project import ProjectStatus, ProjectType
+from app.models.task import TaskPriority
+from app.models.worker import WorkerType
+
+
+class DataFieldSchema(BaseModel):
+    """Declared shape of one Task.data field"""
+    type: Optional[Literal["string", "number", "integer", "boolean", "object", "array"]] = None
+    required: bool = True
+    min_length: Optional[int] = Field(None, ge=0)  # Strings and arrays
+    max_length: Optional[int] = Field(None, ge=1)
+    enum: Optional[List[Any]] = None
+    pattern: Optional[str] = None  # Regex a string value must fully match
+
+
+class ScoreRange(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+
+class QualificationRequirements(BaseModel):
+    """Worker profile a qualification-gated project accepts; every rule given must hold"""
+    countries: Optional[List[str]] = None  # Worker.country is one of these
+    languages: Optional[List[str]] = None  # Worker speaks all of these
+    worker_types: Optional[List[WorkerType]] = None
+    certifications: Optional[List[str]] = None  # Worker holds all of these
+    qualifications: Dict[str, Any] = {}  # Value equals, is one of a list or lies in {"min", "max"}
+    test_scores: Dict[str, ScoreRange] = {}
+    min_quality_score: Optional[float] = None
+    min_accuracy_rate: Optional[float] = None
+    
+    class Config:
+        extra = "forbid"
 
 
 class ProjectBase(BaseModel):
@@ -19,14 +51,19 @@ class ProjectBase(BaseModel):
     gold_standard_percentage: int = Field(default=10, ge=0, le=100)
     min_accuracy_threshold: float = Field(default=0.8, ge=0, le=1)
     enable_tiebreaker: bool = True
+    priority: TaskPriority = TaskPriority.MEDIUM  # Share of workers' time across projects
+    deadline: Optional[datetime] = None
+    sharded_counters: bool = False  # Spread counter writes of very busy projects over shard rows
     use_private_workforce: bool = False
     require_qualification: bool = False
-    qualification_requirements: Dict[str, Any] = {}
+    qualification_requirements: Dict[str, Any] = {}  # Stored as is; rows may predate the schema
+    data_schema: Optional[Dict[str, DataFieldSchema]] = None  # Validated on task import
     tags: List[str] = []
     project_metadata: Dict[str, Any] = {}
 
 
 class ProjectCreate(ProjectBase):
+    qualification_requirements: QualificationRequirements = QualificationRequirements()
     team_ids: Optional[List[str]] = []
 
 
@@ -42,9 +79,13 @@ class ProjectUpdate(BaseModel):
     gold_standard_percentage: Optional[int] = None
     min_accuracy_threshold: Optional[float] = None
     enable_tiebreaker: Optional[bool] = None
+    priority: Optional[TaskPriority] = None
+    deadline: Optional[datetime] = None
+    sharded_counters: Optional[bool] = None
     use_private_workforce: Optional[bool] = None
     require_qualification: Optional[bool] = None
-    qualification_requirements: Optional[Dict[str, Any]] = None
+    qualification_requirements: Optional[QualificationRequirements] = None
+    data_schema: Optional[Dict[str, DataFieldSchema]] = None
     tags: Optional[List[str]] = None
     project_metadata: Optional[Dict[str, Any]] = None
     custom_css: Optional[str] = None
@@ -59,6 +100,7 @@ class ProjectInDBBase(ProjectBase):
     creator_id: str
     total_tasks: int = 0
     completed_tasks: int = 0
+    expired_tasks: int = 0
     total_responses: int = 0
     average_completion_time: Optional[float] = None
     created_at: datetime
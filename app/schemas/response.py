@@ -0,0 +1,41 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class ResponseValueCreate(BaseModel):
+    question_id: str
+    value: Any
+    annotations: Optional[List[Dict[str, Any]]] = None
+    confidence: Optional[float] = Field(None, ge=0, le=1)
+
+
+class ResponseCreate(BaseModel):
+    """Answers for a leased task; the lease is closed by the submission"""
+    assignment_id: str
+    values: List[ResponseValueCreate] = Field(min_length=1)
+    time_taken: Optional[int] = Field(None, ge=0)  # In seconds
+    response_metadata: Dict[str, Any] = {}
+
+
+class ResponseBatchCreate(BaseModel):
+    responses: List[ResponseCreate] = Field(min_length=1)
+
+
+class ResponseSubmission(BaseModel):
+    id: str
+    task_id: str
+    assignment_id: str
+    task_completed: bool = False  # This response completed the task
+    created_at: datetime
+
+
+class ResponseRejection(BaseModel):
+    assignment_id: str
+    status_code: int
+    detail: str
+
+
+class ResponseBatchResult(BaseModel):
+    submitted: List[ResponseSubmission] = []
+    rejected: List[ResponseRejection] = []
\ No newline at end of file
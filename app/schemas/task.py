@@ -1,6 +1,7 @@
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field
 from datetime import datetime
+import enum
 
 from app.models.task import TaskStatus, TaskPriority
 
@@ -17,7 +18,7 @@ class TaskBase(BaseModel):
     batch_id: Optional[str] = None
     exclusive_worker_ids: Optional[List[str]] = None
     excluded_worker_ids: Optional[List[str]] = None
-    expires_at: Optional[str] = None
+    expires_at: Optional[datetime] = None
 
 
 class TaskCreate(TaskBase):
@@ -28,6 +29,23 @@ class TaskBulkCreate(BaseModel):
     tasks: List[TaskCreate]
 
 
+class TaskConflictMode(str, enum.Enum):
+    ERROR = "error"  # Plain insert; a duplicate external_id rejects the batch
+    SKIP = "skip"  # Keep the existing task
+    UPDATE = "update"  # Overwrite the existing task in the same project
+
+
+class TaskBulkUpsert(TaskBulkCreate):
+    on_conflict: TaskConflictMode = TaskConflictMode.SKIP
+
+
+class TaskBulkUpsertResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    duplicates: int = 0  # Same content as an existing task of the project
+
+
 class TaskUpdate(BaseModel):
     data: Optional[Dict[str, Any]] = None
     metadata: Optional[Dict[str, Any]] = None
@@ -35,7 +53,9 @@ class TaskUpdate(BaseModel):
     is_gold_standard: Optional[bool] = None
     gold_standard_answers: Optional[Dict[str, Any]] = None
     required_responses: Optional[int] = None
-    expires_at: Optional[str] = None
+    exclusive_worker_ids: Optional[List[str]] = None
+    excluded_worker_ids: Optional[List[str]] = None
+    expires_at: Optional[datetime] = None
 
 
 class TaskInDBBase(TaskBase):
@@ -43,6 +63,7 @@ class TaskInDBBase(TaskBase):
     project_id: str
     status: TaskStatus
     completed_responses: int = 0
+    active_leases: int = 0
     consensus_score: Optional[float] = None
     average_time_taken: Optional[int] = None
     created_at: datetime
@@ -70,4 +91,90 @@ class TaskStats(BaseModel):
     rejected_tasks: int
     expired_tasks: int
     average_completion_time: Optional[float] = None
-    average_consensus_score: Optional[float] = None
\ No newline at end of file
+    average_consensus_score: Optional[float] = None
+
+
+class TaskImportMapping(BaseModel):
+    """Source columns for task fields; None disables a field"""
+    external_id: Optional[str] = "external_id"
+    batch_id: Optional[str] = None
+    priority: Optional[str] = None
+    data: Optional[str] = None  # Column holding the whole data object
+    data_columns: Optional[List[str]] = None  # Defaults to every unmapped column
+    gold_answers: Optional[str] = None  # Expected answers; rows with them are gold candidates
+    
+    def mapped_columns(self) -> set:
+        return {
+            name for name in (
+                self.external_id, self.batch_id, self.priority, self.data, self.gold_answers
+            )
+            if name
+        }
+
+
+class TaskImportOptions(BaseModel):
+    mapping: TaskImportMapping = TaskImportMapping()
+    on_conflict: TaskConflictMode = TaskConflictMode.ERROR
+    dry_run: bool = False  # Parse and validate only, nothing is written
+    gold_standard_percentage: Optional[int] = Field(None, ge=0, le=100)  # Defaults to the project's
+
+
+class TaskImportError(BaseModel):
+    row: int
+    message: str
+
+
+class TaskValidationIssue(BaseModel):
+    field: str
+    rule: str  # required, type, min_length, max_length, enum, pattern
+    message: str
+    count: int
+    rows: List[int] = []  # First offending rows
+
+
+class TaskImportDuplicate(BaseModel):
+    external_id: Optional[str] = None
+    task_id: str  # Existing task with the same content
+
+
+class TaskImportBatch(BaseModel):
+    batch: int
+    rows: int
+    created: int
+    failed: int
+    updated: int = 0
+    skipped: int = 0
+    duplicates: int = 0
+    gold: int = 0
+    last_row: int = 0
+
+
+class TaskImportResult(BaseModel):
+    message: str = ""
+    task_count: int = 0
+    total_rows: int = 0
+    failed_count: int = 0
+    updated_count: int = 0
+    skipped_count: int = 0
+    duplicate_count: int = 0
+    gold_count: int = 0
+    batches: List[TaskImportBatch] = []
+    errors: List[TaskImportError] = []
+    duplicates: List[TaskImportDuplicate] = []
+    validation: List[TaskValidationIssue] = []
+
+
+class TaskDuplicateGroup(BaseModel):
+    task_id: str  # Task kept for the content hash
+    duplicate_ids: List[str]
+
+
+class TaskDedupReport(BaseModel):
+    project_id: str
+    applied: bool = False
+    tasks_scanned: int = 0
+    duplicate_groups: int = 0
+    duplicate_tasks: int = 0
+    removed_tasks: int = 0  # Pending duplicates without responses, deleted when applied
+    hashes_updated: int = 0
+    groups: List[TaskDuplicateGroup] = []
@@ -0,0 +1,259 @@
+"""
+Project-wide inter-annotator agreement
+Each scored question is read as a sparse item x label count matrix, one entry
+per (task, label) pair, straight from the per-task histograms kept by
+app.services.consensus, so the scan costs one row per task rather than one
+per response. The metrics are closed-form sums over the entries, computed
+with NumPy bincounts:
+    
+    kappa    Fleiss' (P - Pe) / (1 - Pe), pairwise agreement against chance,
+             with per-task pair counts so tasks may have different numbers
+             of responses
+    alpha    Krippendorff's 1 - (n - 1) * observed / expected disagreement;
+             nominal, or interval (squared distance) for Likert questions
+    labels   per-label kappa and specific agreement, the share of pairs
+             involving a label in which both responses chose it
+
+Checkbox questions count every (task, option) as a selected / not selected
+item. Results are cached in QuestionAgreement and recomputed on request, or
+once the project has new responses and the cache is AGREEMENT_CACHE_SECONDS old.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import time
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.time import utcnow, ensure_utc
+from app.models.agreement import QuestionAgreement
+from app.models.project import Project
+from app.models.question import Question
+from app.models.task import TaskQuestionConsensus
+from app.services.consensus import (
+    Aggregator, MultiLabelAggregator, OrdinalAggregator, aggregator_for
+)
+from app.services.counters import ProjectCounterService
+
+
+@dataclass
+class LabelCounts:
+    """Sparse item x label count matrix of one question"""
+    items: np.ndarray  # Item of each entry
+    labels: np.ndarray  # Label of each entry
+    counts: np.ndarray  # Responses choosing the label on the item
+    totals: np.ndarray  # Responses per item, two or more
+    names: List[str]  # Label by index
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return float(numerator / denominator) if denominator else None
+
+
+def _kappa(observed: float, expected: float) -> Optional[float]:
+    return _ratio(observed - expected, 1 - expected)
+
+
+def nominal_agreement(m: LabelCounts) -> Dict[str, Optional[float]]:
+    """Fleiss' kappa and nominal Krippendorff's alpha of single-label answers"""
+    c = m.counts
+    n = m.totals[m.items]
+    total = m.totals.sum()
+    chosen = c * (c - 1)
+    
+    observed = (np.bincount(m.items, chosen, len(m.totals)) / (m.totals * (m.totals - 1))).mean()
+    used = np.bincount(m.labels, c, len(m.names))
+    expected = float(((used / total) ** 2).sum())
+    agreeing = (chosen / (n - 1)).sum()
+    return {
+        "observed_agreement": float(observed),
+        "expected_agreement": expected,
+        "fleiss_kappa": _kappa(observed, expected),
+        "krippendorff_alpha": _alpha(total, total - agreeing, total ** 2 - (used ** 2).sum()),
+    }
+
+
+def binary_agreement(m: LabelCounts) -> Dict[str, Optional[float]]:
+    """Agreement of multi-label answers, each (item, label) a selected / not selected item"""
+    c = m.counts
+    n = m.totals[m.items]
+    cells = len(m.totals) * len(m.names)
+    total = m.totals.sum() * len(m.names)
+    selected = c.sum()
+    chosen = c * (c - 1) + (n - c) * (n - c - 1)
+    
+    # Cells without an entry were left unselected by every response, so agree fully
+    observed = ((chosen / (n * (n - 1))).sum() + cells - len(c)) / cells
+    share = selected / total
+    expected = float(share ** 2 + (1 - share) ** 2)
+    agreeing = (chosen / (n - 1)).sum() + total - n.sum()
+    return {
+        "observed_agreement": float(observed),
+        "expected_agreement": expected,
+        "fleiss_kappa": _kappa(observed, expected),
+        "krippendorff_alpha": _alpha(
+            total, total - agreeing, total ** 2 - selected ** 2 - (total - selected) ** 2
+        ),
+    }
+
+
+def interval_alpha(m: LabelCounts, values: np.ndarray) -> Optional[float]:
+    """Krippendorff's alpha with squared differences between numeric answers"""
+    c = m.counts
+    v = values[m.labels]
+    first = np.bincount(m.items, c * v, len(m.totals))
+    second = np.bincount(m.items, c * v * v, len(m.totals))
+    observed = (2 * (m.totals * second - first ** 2) / (m.totals - 1)).sum()
+    total = m.totals.sum()
+    expected = 2 * (total * (c * v * v).sum() - (c * v).sum() ** 2)
+    return _alpha(total, observed, expected)
+
+
+def _alpha(total: float, observed: float, expected: float) -> Optional[float]:
+    """1 - observed / expected disagreement, both as pair sums"""
+    if expected <= 0:
+        return None
+    return float(1 - (total - 1) * observed / expected)
+
+
+def label_agreement(m: LabelCounts, limit: int) -> List[Dict[str, Any]]:
+    """Per-label kappa and specific agreement of the most used labels"""
+    c = m.counts
+    n = m.totals[m.items]
+    size = len(m.names)
+    used = np.bincount(m.labels, c, size)
+    share = used / m.totals.sum()
+    # Kappa of the label against all others, averaging tasks like fleiss_kappa does
+    disagreeing = np.bincount(m.labels, c * (n - c) / (n * (n - 1)), size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kappa = 1 - disagreeing / (len(m.totals) * share * (1 - share))
+        specific = np.bincount(m.labels, c * (c - 1), size) / np.bincount(m.labels, c * (n - 1), size)
+    
+    labels = []
+    for i in np.argsort(-used, kind="stable")[:limit]:
+        if not used[i]:
+            break
+        labels.append({
+            "label": m.names[i],
+            "responses": int(used[i]),
+            "share": float(share[i]),
+            "kappa": float(kappa[i]) if np.isfinite(kappa[i]) else None,
+            "agreement": float(specific[i]) if np.isfinite(specific[i]) else None,
+        })
+    return labels
+
+
+def agreement_metrics(m: LabelCounts, aggregator: Aggregator) -> Dict[str, Any]:
+    """QuestionAgreement fields for one question's count matrix"""
+    metrics: Dict[str, Any] = {
+        "metric": "nominal",
+        "items": len(m.totals),
+        "responses": int(m.totals.sum()),
+        "observed_agreement": None,
+        "expected_agreement": None,
+        "fleiss_kappa": None,
+        "krippendorff_alpha": None,
+        "labels": [],
+    }
+    if not len(m.totals):
+        return metrics
+    
+    if isinstance(aggregator, MultiLabelAggregator):
+        metrics.update(binary_agreement(m), metric="binary")
+    else:
+        metrics.update(nominal_agreement(m))
+        if isinstance(aggregator, OrdinalAggregator):
+            values = np.array([float(name) for name in m.names])
+            metrics.update(metric="interval", krippendorff_alpha=interval_alpha(m, values))
+    metrics["labels"] = label_agreement(m, settings.AGREEMENT_MAX_LABELS)
+    return metrics
+
+
+class AgreementService:
+    
+    @staticmethod
+    async def load(db: AsyncSession, question: Question, aggregator: Aggregator) -> LabelCounts:
+        """Count matrix of a question's tasks with two or more answers"""
+        multi_label = isinstance(aggregator, MultiLabelAggregator)
+        label_ids: Dict[str, int] = {}
+        if multi_label:
+            # Options nobody chose still count as agreed "not selected" cells
+            for option in question.options or []:
+                label_ids.setdefault(option["value"], len(label_ids))
+        items: List[int] = []
+        labels: List[int] = []
+        counts: List[int] = []
+        totals: List[int] = []
+        
+        stream = await db.stream(
+            select(TaskQuestionConsensus.responses, TaskQuestionConsensus.counts)
+            .where(
+                TaskQuestionConsensus.question_id == question.id,
+                TaskQuestionConsensus.responses > 1
+            )
+            .execution_options(yield_per=settings.TASK_INSERT_BATCH_SIZE)
+        )
+        async for responses, histogram in stream:
+            # Single-label answers without a label (non-numeric Likert, ...) do not pair
+            total = responses if multi_label else sum(histogram.values())
+            if total < 2:
+                continue
+            item = len(totals)
+            totals.append(total)
+            for label, count in histogram.items():
+                items.append(item)
+                labels.append(label_ids.setdefault(label, len(label_ids)))
+                counts.append(count)
+        
+        return LabelCounts(
+            items=np.array(items, dtype=np.int64),
+            labels=np.array(labels, dtype=np.int64),
+            counts=np.array(counts, dtype=np.float64),
+            totals=np.array(totals, dtype=np.float64),
+            names=list(label_ids)
+        )
+    
+    @staticmethod
+    async def compute(db: AsyncSession, project: Project) -> List[QuestionAgreement]:
+        """Recompute the agreement of every scored question of a project and commit"""
+        counters = await ProjectCounterService.totals(db, project)
+        rows = []
+        for question in sorted(project.questions, key=lambda q: q.order or 0):
+            aggregator = aggregator_for(question)
+            if aggregator is None:
+                continue
+            started = time.perf_counter()
+            matrix = await AgreementService.load(db, question, aggregator)
+            metrics = await run_in_threadpool(agreement_metrics, matrix, aggregator)
+            rows.append(QuestionAgreement(
+                question_id=question.id,
+                project_id=project.id,
+                project_responses=counters["total_responses"],
+                computed_at=utcnow(),
+                seconds=round(time.perf_counter() - started, 3),
+                **metrics
+            ))
+        
+        await db.execute(delete(QuestionAgreement).where(QuestionAgreement.project_id == project.id))
+        db.add_all(rows)
+        await db.commit()
+        return rows
+    
+    @staticmethod
+    async def get(db: AsyncSession, project: Project, refresh: bool = False) -> List[QuestionAgreement]:
+        """Cached agreement of a project, recomputed when missing, requested or stale"""
+        result = await db.execute(
+            select(QuestionAgreement).where(QuestionAgreement.project_id == project.id)
+        )
+        rows = result.scalars().all()
+        if rows and not refresh:
+            counters = await ProjectCounterService.totals(db, project)
+            computed_at = min(ensure_utc(row.computed_at) for row in rows)
+            fresh = (utcnow() - computed_at).total_seconds() < settings.AGREEMENT_CACHE_SECONDS
+            if fresh or all(row.project_responses == counters["total_responses"] for row in rows):
+                order = {question.id: question.order or 0 for question in project.questions}
+                return sorted(rows, key=lambda row: order.get(row.question_id, 0))
+        return await AgreementService.compute(db, project)
\ No newline at end of file
@@ -0,0 +1,389 @@
+"""
+Lease-based task checkout
+A checkout locks a few candidate tasks with FOR UPDATE SKIP LOCKED, claims a
+slot with a conditional UPDATE of Task.active_leases and records a
+WorkerAssignment lease that expires after TASK_LEASE_SECONDS. A task accepts
+leases while completed_responses + active_leases < required_responses, so
+concurrent annotators never overshoot it. SQLite has no row locks; its writes
+are serialized and the conditional UPDATE alone keeps the count exact.
+
+Projects with a ready queue (see app.services.dispatch) take candidates from
+the queue and only query tasks when it has nothing left for the worker.
+Lapsed leases are returned by the expiry sweeper (see app.services.expiry).
+"""
+from typing import Iterable, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta
+from collections import Counter
+
+from sqlalchemy import select, insert, update, and_, or_, case, exists, literal, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.time import utcnow
+from app.models.response import Response
+from app.models.task import Task, TaskStatus, ready_status_clause
+from app.models.worker import WorkerAssignment, AssignmentStatus, ACTIVE_ASSIGNMENT_STATUSES
+from app.services.dispatch import dispatch_queues
+from app.services.task import TaskService
+from app.services.task_restriction import TaskRestrictionService
+
+
+class AssignmentService:
+    
+    @staticmethod
+    def has_capacity():
+        # Gold tasks are shown to every worker they are interleaved for
+        return or_(
+            Task.is_gold_standard.is_(True),
+            Task.completed_responses + Task.active_leases < Task.required_responses
+        )
+    
+    @staticmethod
+    def candidate_query(project_id: UUID, worker_id: UUID, lock: bool = True):
+        """
+        Leasable tasks of a project for a worker, best first
+        
+        Walks idx_task_ready in order; every other condition is an index
+        probe per row, so LIMIT stops the scan early. Gold tasks are only
+        handed out by the ready queue, at the project's gold percentage.
+        With ``lock`` the rows are locked FOR UPDATE SKIP LOCKED for a claim.
+        """
+        query = (
+            select(Task.id)
+            .where(
+                Task.project_id == project_id,
+                ready_status_clause(),
+                Task.is_gold_standard.isnot(True),
+                Task.completed_responses + Task.active_leases < Task.required_responses,
+                ~exists().where(
+                    WorkerAssignment.task_id == Task.id,
+                    WorkerAssignment.worker_id == worker_id
+                ),
+                ~exists().where(Response.task_id == Task.id, Response.worker_id == worker_id),
+                *TaskRestrictionService.eligible(worker_id)
+            )
+            .order_by(Task.priority_rank, Task.created_at)
+        )
+        return query.with_for_update(skip_locked=True, of=Task) if lock else query
+    
+    @staticmethod
+    async def get_active_leases(
+        db: AsyncSession,
+        worker_id: UUID,
+        project_id: UUID,
+        now: Optional[datetime] = None
+    ) -> List[WorkerAssignment]:
+        result = await db.execute(
+            select(WorkerAssignment).where(
+                WorkerAssignment.worker_id == worker_id,
+                WorkerAssignment.project_id == project_id,
+                WorkerAssignment.status.in_(ACTIVE_ASSIGNMENT_STATUSES),
+                WorkerAssignment.expires_at > (now or utcnow())
+            ).order_by(WorkerAssignment.assigned_at)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def checkout(
+        db: AsyncSession,
+        project_id: UUID,
+        worker_id: UUID,
+        lease_seconds: Optional[int] = None
+    ) -> Optional[Tuple[WorkerAssignment, Task]]:
+        """Lease the next task of a project to a worker"""
+        checkouts = await AssignmentService.checkout_many(
+            db, project_id, worker_id, count=1, lease_seconds=lease_seconds
+        )
+        return checkouts[0] if checkouts else None
+    
+    @staticmethod
+    async def checkout_many(
+        db: AsyncSession,
+        project_id: UUID,
+        worker_id: UUID,
+        count: int,
+        lease_seconds: Optional[int] = None
+    ) -> List[Tuple[WorkerAssignment, Task]]:
+        """
+        Lease up to ``count`` tasks of a project to a worker
+        
+        Unexpired leases the worker already holds in the project count towards
+        ``count`` and are returned first, so retried requests do not take
+        extra slots. Slots are claimed with one UPDATE and the new leases are
+        written with one INSERT.
+        """
+        now = utcnow()
+        leases = await AssignmentService.get_active_leases(db, worker_id, project_id, now)
+        claimed: List[str] = []
+        
+        queue = dispatch_queues.get(project_id)
+        if queue is not None and len(leases) < count:
+            await queue.load_answered(db, worker_id)
+            for _ in range(settings.TASK_CHECKOUT_CANDIDATES):
+                wanted = count - len(leases) - len(claimed)
+                task_ids = []
+                while len(task_ids) < wanted:
+                    task_id = queue.pop(worker_id)
+                    if task_id is None:
+                        break
+                    task_ids.append(task_id)
+                if not task_ids:
+                    break
+                
+                won = await AssignmentService._claim(db, task_ids, worker_id)
+                for task_id in task_ids:
+                    if task_id not in won:
+                        queue.discard(task_id)
+                claimed.extend(task_id for task_id in task_ids if task_id in won)
+                if len(won) == len(task_ids):
+                    break
+        
+        candidates = AssignmentService.candidate_query(project_id, worker_id)
+        
+        for _ in range(3):
+            wanted = count - len(leases) - len(claimed)
+            if wanted <= 0:
+                break
+            query = candidates.limit(wanted)
+            if claimed:
+                query = query.where(Task.id.notin_(claimed))
+            task_ids = (await db.execute(query)).scalars().all()
+            if not task_ids:
+                break
+            
+            won = await AssignmentService._claim(db, task_ids, worker_id)
+            for task_id in task_ids:
+                if task_id in won:
+                    claimed.append(task_id)
+                    if queue is not None:
+                        queue.take(task_id, worker_id)
+        
+        created: List[WorkerAssignment] = []
+        if claimed:
+            created = await AssignmentService._create_leases(
+                db, claimed, project_id, worker_id, now, lease_seconds
+            )
+            leases.extend(created)
+        # Also ends the transaction when nothing was claimed, releasing row locks
+        await db.commit()
+        if queue is not None and len(created) < len(claimed):
+            leased = {lease.task_id for lease in created}
+            dispatch_queues.release(task_id for task_id in claimed if task_id not in leased)
+        
+        if not leases:
+            return []
+        result = await db.execute(
+            select(Task).where(Task.id.in_([lease.task_id for lease in leases]))
+        )
+        tasks = {task.id: task for task in result.scalars().all()}
+        return [(lease, tasks[lease.task_id]) for lease in leases]
+    
+    @staticmethod
+    async def _claim(db: AsyncSession, task_ids: List[str], worker_id: UUID) -> Set[str]:
+        """Take one slot on each task that still has one, returning the ids taken"""
+        # Worker lists and earlier leases are re-checked here, so a stale ready queue
+        # (another process may have leased the task to this worker) cannot bypass them
+        result = await db.execute(
+            update(Task)
+            .where(
+                Task.id.in_(task_ids),
+                ready_status_clause(),
+                AssignmentService.has_capacity(),
+                ~exists().where(
+                    WorkerAssignment.task_id == Task.id,
+                    WorkerAssignment.worker_id == worker_id
+                ),
+                *TaskRestrictionService.eligible(worker_id)
+            )
+            .values(active_leases=Task.active_leases + 1, status=TaskStatus.IN_PROGRESS)
+            .returning(Task.id)
+            .execution_options(synchronize_session=False)
+        )
+        return set(result.scalars().all())
+    
+    @staticmethod
+    async def _create_leases(
+        db: AsyncSession,
+        task_ids: List[str],
+        project_id: UUID,
+        worker_id: UUID,
+        now: datetime,
+        lease_seconds: Optional[int]
+    ) -> List[WorkerAssignment]:
+        """
+        Insert a lease per claimed task, skipping tasks the worker already holds one for
+        
+        A concurrent checkout of the same worker in another process can get
+        past _claim's check before either commits; idx_worker_task_unique then
+        keeps the first lease and the slot claimed for the second is given back.
+        """
+        lease_seconds = lease_seconds or settings.TASK_LEASE_SECONDS
+        expires_at = now + timedelta(seconds=lease_seconds)
+        rows = [
+            {
+                "id": str(uuid4()),
+                "worker_id": worker_id,
+                "task_id": task_id,
+                "project_id": project_id,
+                "status": AssignmentStatus.ASSIGNED.value,
+                "assigned_at": now,
+                "expires_at": expires_at,
+                "created_at": now
+            }
+            for task_id in task_ids
+        ]
+        dialect_insert = TaskService._dialect_insert(db)
+        result = await db.execute(
+            dialect_insert(WorkerAssignment)
+            .on_conflict_do_nothing(index_elements=["worker_id", "task_id"])
+            .returning(WorkerAssignment),
+            rows
+        )
+        leases = {lease.task_id: lease for lease in result.scalars().all()}
+        await AssignmentService.release_slots(
+            db, [task_id for task_id in task_ids if task_id not in leases]
+        )
+        return [leases[task_id] for task_id in task_ids if task_id in leases]
+    
+    @staticmethod
+    async def release_slots(db: AsyncSession, task_ids: Iterable[str]) -> None:
+        """Give back one lease slot per occurrence of a task id"""
+        counts = Counter(task_ids)
+        if not counts:
+            return
+        
+        table = Task.__table__
+        remaining = table.c.active_leases - bindparam("b_count")
+        await db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_task_id"))
+            .values(
+                active_leases=remaining,
+                # An unstarted task whose last lease lapsed is pending again
+                status=case(
+                    (
+                        and_(
+                            remaining <= 0,
+                            table.c.completed_responses == 0,
+                            table.c.status == TaskStatus.IN_PROGRESS
+                        ),
+                        literal(TaskStatus.PENDING, table.c.status.type)
+                    ),
+                    else_=table.c.status
+                )
+            ),
+            [{"b_task_id": task_id, "b_count": count} for task_id, count in counts.items()]
+        )
+    
+    @staticmethod
+    async def release(
+        db: AsyncSession,
+        assignment_id: str,
+        worker_id: UUID
+    ) -> bool:
+        """Hand a leased task back before its lease expires"""
+        released = await AssignmentService.release_many(
+            db, worker_id, assignment_ids=[assignment_id]
+        )
+        return released == 1
+    
+    @staticmethod
+    async def release_many(
+        db: AsyncSession,
+        worker_id: UUID,
+        project_id: Optional[UUID] = None,
+        assignment_ids: Optional[List[str]] = None
+    ) -> int:
+        """
+        Hand back a worker's active leases in one UPDATE
+        
+        Without ``assignment_ids`` every active lease of the worker, in
+        ``project_id`` if given, is released; the annotation UI calls this
+        when a session ends with tasks left unanswered.
+        """
+        conditions = [
+            WorkerAssignment.worker_id == worker_id,
+            WorkerAssignment.status.in_(ACTIVE_ASSIGNMENT_STATUSES)
+        ]
+        if project_id is not None:
+            conditions.append(WorkerAssignment.project_id == project_id)
+        if assignment_ids is not None:
+            conditions.append(WorkerAssignment.id.in_(assignment_ids))
+        
+        result = await db.execute(
+            update(WorkerAssignment)
+            .where(*conditions)
+            .values(status=AssignmentStatus.RELEASED.value)
+            .returning(WorkerAssignment.task_id)
+            .execution_options(synchronize_session=False)
+        )
+        task_ids = result.scalars().all()
+        await AssignmentService.release_slots(db, task_ids)
+        await db.commit()
+        dispatch_queues.release(task_ids)
+        return len(task_ids)
+    
+    @staticmethod
+    async def extend(
+        db: AsyncSession,
+        assignment_id: str,
+        worker_id: UUID,
+        lease_seconds: Optional[int] = None
+    ) -> bool:
+        """Push out the expiry of a lease that has not lapsed yet"""
+        now = utcnow()
+        expires_at = now + timedelta(seconds=lease_seconds or settings.TASK_LEASE_SECONDS)
+        result = await db.execute(
+            update(WorkerAssignment)
+            .where(
+                WorkerAssignment.id == assignment_id,
+                WorkerAssignment.worker_id == worker_id,
+                WorkerAssignment.status.in_(ACTIVE_ASSIGNMENT_STATUSES),
+                WorkerAssignment.expires_at > now
+            )
+            .values(expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount == 1
+    
+    @staticmethod
+    async def expire_leases(db: AsyncSession, now: Optional[datetime] = None) -> int:
+        """
+        Mark one batch of lapsed leases expired and return their slots
+        
+        Reads at most EXPIRY_SWEEP_BATCH_SIZE leases through
+        idx_assignment_status_expires and commits, so a sweep never holds
+        locks on more than one batch of tasks.
+        """
+        stale = (
+            select(WorkerAssignment.id)
+            .where(
+                WorkerAssignment.status.in_(ACTIVE_ASSIGNMENT_STATUSES),
+                WorkerAssignment.expires_at <= (now or utcnow())
+            )
+            .limit(settings.EXPIRY_SWEEP_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        assignment_ids = (await db.execute(stale)).scalars().all()
+        if not assignment_ids:
+            await db.commit()
+            return 0
+        
+        # The status guard makes concurrent sweeps return each lease only once
+        result = await db.execute(
+            update(WorkerAssignment)
+            .where(
+                WorkerAssignment.id.in_(assignment_ids),
+                WorkerAssignment.status.in_(ACTIVE_ASSIGNMENT_STATUSES)
+            )
+            .values(status=AssignmentStatus.EXPIRED.value)
+            .returning(WorkerAssignment.task_id)
+            .execution_options(synchronize_session=False)
+        )
+        task_ids: List[str] = result.scalars().all()
+        await AssignmentService.release_slots(db, task_ids)
+        await db.commit()
+        dispatch_queues.release(task_ids)
+        return len(task_ids)
@@ -0,0 +1,475 @@
+"""
+Incremental per-task consensus
+Every task keeps a label histogram per question (TaskQuestionConsensus), so a
+submission updates consensus in O(labels) instead of re-reading the task's
+responses. Aggregators turn an answer into histogram labels and a histogram
+into an agreement score between 0 and 1:
+    
+    MULTIPLE_CHOICE  share of responses on the most common option
+    CHECKBOX         per option, share of responses on the majority side
+                     (selected or not), averaged over the options seen
+    LIKERT           1 - variance / largest variance possible on the scale
+    FREE_RESPONSE    exact match after trimming, case folding and collapsing
+                     whitespace, scored like multiple choice
+
+A task's consensus_score is the mean over its scored questions. Once the task
+has its required responses the score decides it (see ConsensusService.decide).
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from collections import defaultdict
+import hashlib
+
+from sqlalchemy import select, insert, update, delete, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.project import Project
+from app.models.question import Question, QuestionType
+from app.models.response import Response, ResponseValue
+from app.models.task import Task, TaskQuestionConsensus, TaskStatus, READY_TASK_STATUSES
+from app.schemas.response import ResponseValueCreate
+
+# Longer free-text answers are keyed by their digest to keep histograms compact
+MAX_TEXT_LABEL = 200
+
+Counts = Dict[str, int]
+HistogramKey = Tuple[str, str]  # (task_id, question_id)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class Aggregator(ABC):
+    """Histogram labels and agreement for one question type"""
+    
+    @abstractmethod
+    def labels(self, value: Any) -> List[str]:
+        ...
+    
+    @abstractmethod
+    def score(self, counts: Counts, responses: int) -> float:
+        ...
+    
+    @abstractmethod
+    def agreement(self, counts: Counts, responses: int, value: Any) -> float:
+        """How well one response agrees with the histogram it is part of"""
+    
+    @abstractmethod
+    def leading(self, counts: Counts, responses: int) -> Any:
+        ...
+
+
+class CategoricalAggregator(Aggregator):
+    
+    def labels(self, value: Any) -> List[str]:
+        return [value] if isinstance(value, str) else []
+    
+    def score(self, counts: Counts, responses: int) -> float:
+        return max(counts.values()) / responses if counts else 0.0
+    
+    def agreement(self, counts: Counts, responses: int, value: Any) -> float:
+        labels = self.labels(value)
+        return counts.get(labels[0], 0) / responses if labels else 0.0
+    
+    def leading(self, counts: Counts, responses: int) -> Any:
+        return max(counts, key=counts.get) if counts else None
+
+
+class TextAggregator(CategoricalAggregator):
+    
+    def labels(self, value: Any) -> List[str]:
+        if not isinstance(value, str):
+            return []
+        text = " ".join(value.split()).casefold()
+        if len(text) > MAX_TEXT_LABEL:
+            text = "sha256:" + hashlib.sha256(text.encode()).hexdigest()
+        return [text]
+
+
+class MultiLabelAggregator(Aggregator):
+    
+    def labels(self, value: Any) -> List[str]:
+        if not isinstance(value, list):
+            return []
+        return sorted({item for item in value if isinstance(item, str)})
+    
+    def score(self, counts: Counts, responses: int) -> float:
+        if not counts:
+            return 1.0
+        agreeing = sum(max(count, responses - count) for count in counts.values())
+        return agreeing / (len(counts) * responses)
+    
+    def agreement(self, counts: Counts, responses: int, value: Any) -> float:
+        if not counts:
+            return 1.0
+        chosen = set(self.labels(value))
+        agreeing = sum(
+            count if label in chosen else responses - count for label, count in counts.items()
+        )
+        return agreeing / (len(counts) * responses)
+    
+    def leading(self, counts: Counts, responses: int) -> Any:
+        return sorted(label for label, count in counts.items() if 2 * count > responses)
+
+
+class OrdinalAggregator(Aggregator):
+    
+    def __init__(self, low: Optional[float] = None, high: Optional[float] = None) -> None:
+        self.low = low if _is_number(low) else None
+        self.high = high if _is_number(high) else None
+    
+    def labels(self, value: Any) -> List[str]:
+        return [str(value)] if _is_number(value) else []
+    
+    def _span(self, counts: Counts) -> float:
+        if self.low is not None and self.high is not None:
+            return self.high - self.low
+        points = [float(label) for label in counts]
+        return max(points) - min(points) if points else 0.0
+    
+    def _mean(self, counts: Counts) -> float:
+        total = sum(counts.values())
+        return sum(float(label) * count for label, count in counts.items()) / total
+    
+    def score(self, counts: Counts, responses: int) -> float:
+        span = self._span(counts)
+        if span <= 0:
+            return 1.0 if counts else 0.0
+        mean = self._mean(counts)
+        total = sum(counts.values())
+        variance = sum((float(label) - mean) ** 2 * count for label, count in counts.items()) / total
+        # A variance of (span / 2)^2 means responses split between both ends of the scale
+        return max(0.0, 1 - 4 * variance / span ** 2)
+    
+    def agreement(self, counts: Counts, responses: int, value: Any) -> float:
+        if not _is_number(value):
+            return 0.0
+        span = self._span(counts)
+        if span <= 0:
+            return 1.0
+        return max(0.0, 1 - abs(value - self._mean(counts)) / span)
+    
+    def leading(self, counts: Counts, responses: int) -> Any:
+        """The median answer"""
+        seen = 0
+        total = sum(counts.values())
+        for label in sorted(counts, key=float):
+            seen += counts[label]
+            if 2 * seen >= total:
+                point = float(label)
+                return int(point) if point.is_integer() else point
+        return None
+
+
+def aggregator_for(question: Question) -> Optional[Aggregator]:
+    """Aggregator of a question, or None if its type is not scored"""
+    kind = question.question_type
+    if kind == QuestionType.MULTIPLE_CHOICE:
+        return CategoricalAggregator()
+    if kind == QuestionType.CHECKBOX:
+        return MultiLabelAggregator()
+    if kind == QuestionType.LIKERT:
+        scale = question.settings or {}
+        return OrdinalAggregator(scale.get("scale_min"), scale.get("scale_max"))
+    if kind == QuestionType.FREE_RESPONSE:
+        return TextAggregator()
+    return None
+
+
+@dataclass
+class ConsensusPolicy:
+    """Project settings that decide a task once it has its required responses"""
+    threshold: float
+    tiebreaker: bool
+    max_responses: int
+    
+    @classmethod
+    def for_project(cls, project: Project) -> "ConsensusPolicy":
+        threshold = project.consensus_threshold
+        return cls(
+            threshold=settings.CONSENSUS_THRESHOLD if threshold is None else threshold,
+            tiebreaker=bool(project.enable_tiebreaker),
+            max_responses=project.max_responses_per_task or 0
+        )
+
+
+@dataclass
+class ConsensusUpdate:
+    """Outcome of adding responses to their tasks' histograms"""
+    task_scores: Dict[str, float] = field(default_factory=dict)
+    response_scores: Dict[str, float] = field(default_factory=dict)  # By task id
+    histograms: Dict[HistogramKey, Tuple[int, Counts]] = field(default_factory=dict)
+
+
+class ConsensusService:
+    
+    @staticmethod
+    def aggregators(questions: Iterable[Question]) -> Dict[str, Aggregator]:
+        aggregators = {}
+        for question in questions:
+            aggregator = aggregator_for(question)
+            if aggregator is not None:
+                aggregators[question.id] = aggregator
+        return aggregators
+    
+    @staticmethod
+    def decide(
+        policy: ConsensusPolicy,
+        status: TaskStatus,
+        is_gold: bool,
+        completed: int,
+        required: int,
+        score: Optional[float]
+    ) -> Tuple[TaskStatus, int]:
+        """
+        Status and required_responses a task should move to
+        
+        A task with its required responses is COMPLETED when its consensus
+        reaches the threshold, or has no scored questions. Below it, the task
+        gets one more response slot while the project allows tiebreakers and
+        max_responses_per_task is not reached, and goes to NEEDS_REVIEW
+        otherwise. Gold tasks stay open.
+        """
+        if is_gold or status not in READY_TASK_STATUSES or completed < required:
+            return status, required
+        if score is None or score >= policy.threshold:
+            return TaskStatus.COMPLETED, required
+        if policy.tiebreaker and completed < policy.max_responses:
+            return status, completed + 1
+        return TaskStatus.NEEDS_REVIEW, required
+    
+    @staticmethod
+    def _count(
+        histograms: Dict[HistogramKey, Tuple[int, Counts]],
+        aggregator: Aggregator,
+        key: HistogramKey,
+        value: Any
+    ) -> None:
+        responses, counts = histograms.get(key, (0, {}))
+        for label in aggregator.labels(value):
+            counts[label] = counts.get(label, 0) + 1
+        histograms[key] = (responses + 1, counts)
+    
+    @staticmethod
+    def _score(
+        aggregators: Dict[str, Aggregator],
+        histograms: Dict[HistogramKey, Tuple[int, Counts]],
+        changed: Iterable[HistogramKey]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        """Histogram rows to store for the changed keys, and the consensus of every task"""
+        changed = set(changed)
+        scores: Dict[str, List[float]] = defaultdict(list)
+        rows = []
+        for key, (responses, counts) in histograms.items():
+            aggregator = aggregators[key[1]]
+            score = aggregator.score(counts, responses)
+            scores[key[0]].append(score)
+            if key in changed:
+                rows.append({
+                    "task_id": key[0],
+                    "question_id": key[1],
+                    "responses": responses,
+                    "counts": counts,
+                    "label": aggregator.leading(counts, responses),
+                    "score": score
+                })
+        return rows, {task_id: sum(s) / len(s) for task_id, s in scores.items()}
+    
+    @staticmethod
+    async def record(
+        db: AsyncSession,
+        questions: Sequence[Question],
+        answers: Dict[str, List[ResponseValueCreate]]
+    ) -> ConsensusUpdate:
+        """
+        Add new responses to their tasks' histograms, without committing
+        
+        ``answers`` maps each task id to the values of one new response. The
+        caller must hold the task rows locked, so concurrent submissions on a
+        task update its histograms one after the other.
+        """
+        aggregators = ConsensusService.aggregators(questions)
+        outcome = ConsensusUpdate()
+        if not aggregators or not answers:
+            return outcome
+        
+        table = TaskQuestionConsensus
+        result = await db.execute(
+            select(table.task_id, table.question_id, table.responses, table.counts)
+            .where(table.task_id.in_(list(answers)))
+        )
+        histograms = outcome.histograms
+        for task_id, question_id, responses, counts in result.all():
+            if question_id in aggregators:
+                histograms[(task_id, question_id)] = (responses, dict(counts or {}))
+        existing = set(histograms)
+        
+        changed = set()
+        for task_id, values in answers.items():
+            for item in values:
+                aggregator = aggregators.get(item.question_id)
+                if aggregator is not None:
+                    key = (task_id, item.question_id)
+                    ConsensusService._count(histograms, aggregator, key, item.value)
+                    changed.add(key)
+        rows, outcome.task_scores = ConsensusService._score(aggregators, histograms, changed)
+        
+        for task_id, values in answers.items():
+            agreements = []
+            for item in values:
+                if item.question_id in aggregators:
+                    responses, counts = histograms[(task_id, item.question_id)]
+                    agreements.append(
+                        aggregators[item.question_id].agreement(counts, responses, item.value)
+                    )
+            if agreements:
+                outcome.response_scores[task_id] = sum(agreements) / len(agreements)
+        
+        await ConsensusService._write(db, rows, existing)
+        return outcome
+    
+    @staticmethod
+    async def _write(db: AsyncSession, rows: List[Dict[str, Any]], existing: set) -> None:
+        new_rows = [row for row in rows if (row["task_id"], row["question_id"]) not in existing]
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        for start in range(0, len(new_rows), batch_size):
+            await db.execute(insert(TaskQuestionConsensus), new_rows[start:start + batch_size])
+        
+        updated = [row for row in rows if (row["task_id"], row["question_id"]) in existing]
+        if updated:
+            table = TaskQuestionConsensus.__table__
+            await db.execute(
+                update(table)
+                .where(
+                    table.c.task_id == bindparam("b_task_id"),
+                    table.c.question_id == bindparam("b_question_id")
+                )
+                .values(
+                    responses=bindparam("b_responses"),
+                    counts=bindparam("b_counts"),
+                    label=bindparam("b_label"),
+                    score=bindparam("b_score")
+                ),
+                [{f"b_{key}": value for key, value in row.items()} for row in updated]
+            )
+    
+    @staticmethod
+    async def _answers(
+        db: AsyncSession,
+        aggregators: Dict[str, Aggregator],
+        task_ids: List[str]
+    ) -> List[Any]:
+        """(response id, task id, question id, value) of every scored answer on the tasks"""
+        result = await db.execute(
+            select(Response.id, Response.task_id, ResponseValue.question_id, ResponseValue.value)
+            .join(ResponseValue, ResponseValue.response_id == Response.id)
+            .where(
+                Response.task_id.in_(task_ids),
+                ResponseValue.question_id.in_(list(aggregators))
+            )
+        )
+        return result.all()
+    
+    @staticmethod
+    async def _rescore(
+        db: AsyncSession,
+        aggregators: Dict[str, Aggregator],
+        answers: List[Any],
+        histograms: Dict[HistogramKey, Tuple[int, Counts]]
+    ) -> None:
+        agreements: Dict[str, List[float]] = defaultdict(list)
+        for response_id, task_id, question_id, value in answers:
+            histogram = histograms.get((task_id, question_id))
+            if histogram is not None:
+                responses, counts = histogram
+                agreements[response_id].append(
+                    aggregators[question_id].agreement(counts, responses, value)
+                )
+        if not agreements:
+            return
+        
+        table = Response.__table__
+        await db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(consensus_score=bindparam("b_score")),
+            [
+                {"b_id": response_id, "b_score": sum(scores) / len(scores)}
+                for response_id, scores in agreements.items()
+            ]
+        )
+    
+    @staticmethod
+    async def rescore_responses(
+        db: AsyncSession,
+        questions: Sequence[Question],
+        task_ids: List[str],
+        histograms: Dict[HistogramKey, Tuple[int, Counts]]
+    ) -> None:
+        """Set Response.consensus_score of every response on tasks whose histograms are final"""
+        aggregators = ConsensusService.aggregators(questions)
+        if not aggregators or not task_ids:
+            return
+        answers = await ConsensusService._answers(db, aggregators, task_ids)
+        await ConsensusService._rescore(db, aggregators, answers, histograms)
+    
+    @staticmethod
+    async def rebuild(db: AsyncSession, project_ids: Optional[List[str]] = None) -> int:
+        """
+        Recompute histograms and consensus scores from stored responses and commit
+        
+        Covers responses submitted before histograms were kept. Task statuses
+        are left alone. Returns the number of histograms stored.
+        """
+        if project_ids is None:
+            result = await db.execute(select(Project.id))
+            project_ids = result.scalars().all()
+        
+        stored = 0
+        for project_id in project_ids:
+            result = await db.execute(select(Question).where(Question.project_id == project_id))
+            aggregators = ConsensusService.aggregators(result.scalars().all())
+            last_id = ""
+            while True:
+                result = await db.execute(
+                    select(Task.id)
+                    .where(Task.project_id == project_id, Task.id > last_id)
+                    .order_by(Task.id)
+                    .limit(settings.TASK_INSERT_BATCH_SIZE)
+                )
+                task_ids = result.scalars().all()
+                if not task_ids:
+                    break
+                last_id = task_ids[-1]
+                stored += await ConsensusService._rebuild_tasks(db, aggregators, task_ids)
+                await db.commit()
+        return stored
+    
+    @staticmethod
+    async def _rebuild_tasks(
+        db: AsyncSession,
+        aggregators: Dict[str, Aggregator],
+        task_ids: List[str]
+    ) -> int:
+        await db.execute(
+            delete(TaskQuestionConsensus).where(TaskQuestionConsensus.task_id.in_(task_ids))
+        )
+        answers = await ConsensusService._answers(db, aggregators, task_ids) if aggregators else []
+        histograms: Dict[HistogramKey, Tuple[int, Counts]] = {}
+        for _, task_id, question_id, value in answers:
+            ConsensusService._count(histograms, aggregators[question_id], (task_id, question_id), value)
+        rows, task_scores = ConsensusService._score(aggregators, histograms, histograms)
+        
+        await ConsensusService._write(db, rows, set())
+        table = Task.__table__
+        await db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(consensus_score=bindparam("b_score")),
+            [{"b_id": task_id, "b_score": task_scores.get(task_id)} for task_id in task_ids]
+        )
+        await ConsensusService._rescore(db, aggregators, answers, histograms)
+        return len(rows)
\ No newline at end of file
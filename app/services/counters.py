@@ -0,0 +1,365 @@
+"""
+Project and task counters
+Counters only ever move with atomic UPDATE ... SET x = x + :n statements, so
+concurrent writers never lose each other's updates. A project flagged with
+sharded_counters takes its increments on one of PROJECT_COUNTER_SHARDS
+ProjectCounterShard rows, picked at random, instead of its own row, which
+spreads lock contention for very hot projects; reads that need exact numbers
+add the shard sums, and the reconciler folds them back into the project row
+every COUNTER_FOLD_SECONDS.
+
+Reconciliation recomputes counters from the tasks, responses and assignments
+tables. Expected values and current counters are read in one statement, so
+both come from the same snapshot, and the difference is applied as an
+increment that leaves concurrent writers' own increments intact. Fold and
+reconcile hold an advisory lock on PostgreSQL, so only one process runs
+them at a time.
+"""
+from typing import Dict, Iterable, List, Optional
+from collections import defaultdict
+import asyncio
+import logging
+import random
+
+from sqlalchemy import select, insert, update, func, case, or_, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.project import Project, ProjectCounterShard, PROJECT_COUNTERS
+from app.models.response import Response
+from app.models.task import Task, TaskStatus
+from app.models.worker import WorkerAssignment, ACTIVE_ASSIGNMENT_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_xact_lock key serializing fold and reconcile across processes
+COUNTER_LOCK_KEY = 0x76657269
+
+
+def _increments(model, deltas: Dict[str, int]) -> Dict[str, object]:
+    return {field: getattr(model, field) + delta for field, delta in deltas.items()}
+
+
+class ProjectCounterService:
+    
+    @staticmethod
+    async def increment(db: AsyncSession, project_id: str, **deltas: int) -> None:
+        """Add to a project's counters without committing, e.g. total_tasks=-1"""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        
+        # The flag test keeps hot project rows out of the write path entirely
+        result = await db.execute(
+            update(Project)
+            .where(Project.id == project_id, Project.sharded_counters.isnot(True))
+            .values(**_increments(Project, deltas))
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return
+        
+        result = await db.execute(
+            update(ProjectCounterShard)
+            .where(
+                ProjectCounterShard.project_id == project_id,
+                ProjectCounterShard.shard == random.randrange(settings.PROJECT_COUNTER_SHARDS)
+            )
+            .values(**_increments(ProjectCounterShard, deltas))
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            # Shard rows not created yet
+            await db.execute(
+                update(Project)
+                .where(Project.id == project_id)
+                .values(**_increments(Project, deltas))
+                .execution_options(synchronize_session=False)
+            )
+    
+    @staticmethod
+    async def create_shards(db: AsyncSession, project_id: str) -> None:
+        """Add the shard rows a project needs to count on them, without committing"""
+        result = await db.execute(
+            select(ProjectCounterShard.shard).where(ProjectCounterShard.project_id == project_id)
+        )
+        existing = set(result.scalars().all())
+        missing = [
+            {"project_id": project_id, "shard": shard}
+            for shard in range(settings.PROJECT_COUNTER_SHARDS)
+            if shard not in existing
+        ]
+        if missing:
+            await db.execute(insert(ProjectCounterShard), missing)
+    
+    @staticmethod
+    async def totals(db: AsyncSession, project: Project) -> Dict[str, int]:
+        """A project's counters including counts not folded in from its shards yet"""
+        result = await db.execute(
+            select(*(
+                func.coalesce(func.sum(getattr(ProjectCounterShard, field)), 0)
+                for field in PROJECT_COUNTERS
+            ))
+            .where(ProjectCounterShard.project_id == project.id)
+        )
+        unfolded = result.one()
+        return {
+            field: (getattr(project, field) or 0) + unfolded[i]
+            for i, field in enumerate(PROJECT_COUNTERS)
+        }
+    
+    @staticmethod
+    async def _lock(db: AsyncSession) -> bool:
+        if db.get_bind().dialect.name != "postgresql":
+            return True
+        result = await db.execute(select(func.pg_try_advisory_xact_lock(COUNTER_LOCK_KEY)))
+        return bool(result.scalar())
+    
+    @staticmethod
+    async def _apply(
+        db: AsyncSession,
+        model,
+        key: str,
+        corrections: Dict[str, Dict[str, int]],
+        fields: Iterable[str]
+    ) -> None:
+        """Add per-row deltas to the given counter columns with one executemany UPDATE"""
+        if not corrections:
+            return
+        table = model.__table__
+        await db.execute(
+            update(table)
+            .where(table.c[key] == bindparam("b_key"))
+            .values(**{field: table.c[field] + bindparam(f"b_{field}") for field in fields}),
+            [
+                {"b_key": row_key, **{f"b_{field}": delta.get(field, 0) for field in fields}}
+                for row_key, delta in corrections.items()
+            ]
+        )
+    
+    @staticmethod
+    async def fold(db: AsyncSession) -> int:
+        """
+        Move shard counts into their project rows and commit
+        
+        Returns:
+            Number of projects updated, or 0 if another process holds the lock
+        """
+        if not await ProjectCounterService._lock(db):
+            await db.commit()
+            return 0
+        
+        result = await db.execute(
+            select(
+                ProjectCounterShard.project_id,
+                ProjectCounterShard.shard,
+                *(getattr(ProjectCounterShard, field) for field in PROJECT_COUNTERS)
+            )
+            .where(or_(*(getattr(ProjectCounterShard, field) != 0 for field in PROJECT_COUNTERS)))
+            .with_for_update()
+        )
+        shards = result.all()
+        if not shards:
+            await db.commit()
+            return 0
+        
+        moved: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(PROJECT_COUNTERS, 0))
+        for shard in shards:
+            for field in PROJECT_COUNTERS:
+                moved[shard.project_id][field] += getattr(shard, field)
+        
+        # Subtracting what was read, rather than zeroing, keeps increments made since
+        table = ProjectCounterShard.__table__
+        await db.execute(
+            update(table)
+            .where(table.c.project_id == bindparam("b_project_id"), table.c.shard == bindparam("b_shard"))
+            .values(**{field: table.c[field] - bindparam(f"b_{field}") for field in PROJECT_COUNTERS}),
+            [
+                {
+                    "b_project_id": shard.project_id,
+                    "b_shard": shard.shard,
+                    **{f"b_{field}": getattr(shard, field) for field in PROJECT_COUNTERS}
+                }
+                for shard in shards
+            ]
+        )
+        await ProjectCounterService._apply(db, Project, "id", moved, PROJECT_COUNTERS)
+        await db.commit()
+        return len(moved)
+    
+    @staticmethod
+    async def reconcile(
+        db: AsyncSession,
+        project_ids: Optional[List[str]] = None
+    ) -> Dict[str, int]:
+        """
+        Correct project and task counters that drifted from the source tables and commit
+        
+        Returns:
+            Number of projects and tasks corrected
+        """
+        counts = {"projects": 0, "tasks": 0}
+        if not await ProjectCounterService._lock(db):
+            await db.commit()
+            return counts
+        
+        project_corrections = await ProjectCounterService._project_drift(db, project_ids)
+        await ProjectCounterService._apply(
+            db, Project, "id", project_corrections, PROJECT_COUNTERS
+        )
+        task_corrections = await ProjectCounterService._task_drift(db, project_ids)
+        await ProjectCounterService._apply(
+            db, Task, "id", task_corrections, ("completed_responses", "active_leases")
+        )
+        await db.commit()
+        
+        counts["projects"] = len(project_corrections)
+        counts["tasks"] = len(task_corrections)
+        return counts
+    
+    @staticmethod
+    async def _project_drift(
+        db: AsyncSession,
+        project_ids: Optional[List[str]]
+    ) -> Dict[str, Dict[str, int]]:
+        tasks = (
+            select(
+                Task.project_id,
+                func.count(Task.id).label("total_tasks"),
+                func.sum(case((Task.status == TaskStatus.COMPLETED, 1), else_=0)).label("completed_tasks"),
+                func.sum(case((Task.status == TaskStatus.EXPIRED, 1), else_=0)).label("expired_tasks")
+            )
+            .group_by(Task.project_id)
+            .subquery()
+        )
+        responses = (
+            select(Task.project_id, func.count(Response.id).label("total_responses"))
+            .join(Task, Task.id == Response.task_id)
+            .group_by(Task.project_id)
+            .subquery()
+        )
+        shards = (
+            select(
+                ProjectCounterShard.project_id,
+                *(
+                    func.sum(getattr(ProjectCounterShard, field)).label(field)
+                    for field in PROJECT_COUNTERS
+                )
+            )
+            .group_by(ProjectCounterShard.project_id)
+            .subquery()
+        )
+        query = (
+            select(
+                Project.id,
+                *(func.coalesce(getattr(Project, field), 0) for field in PROJECT_COUNTERS),
+                *(func.coalesce(shards.c[field], 0) for field in PROJECT_COUNTERS),
+                func.coalesce(tasks.c.total_tasks, 0),
+                func.coalesce(tasks.c.completed_tasks, 0),
+                func.coalesce(tasks.c.expired_tasks, 0),
+                func.coalesce(responses.c.total_responses, 0)
+            )
+            .outerjoin(tasks, tasks.c.project_id == Project.id)
+            .outerjoin(responses, responses.c.project_id == Project.id)
+            .outerjoin(shards, shards.c.project_id == Project.id)
+        )
+        if project_ids is not None:
+            query = query.where(Project.id.in_(project_ids))
+        
+        width = len(PROJECT_COUNTERS)
+        corrections = {}
+        for row in (await db.execute(query)).all():
+            counted = [row[1 + i] + row[1 + width + i] for i in range(width)]
+            expected = row[1 + 2 * width:]
+            drift = {
+                field: expected[i] - counted[i]
+                for i, field in enumerate(PROJECT_COUNTERS)
+                if expected[i] != counted[i]
+            }
+            if drift:
+                corrections[row[0]] = drift
+        return corrections
+    
+    @staticmethod
+    async def _task_drift(
+        db: AsyncSession,
+        project_ids: Optional[List[str]]
+    ) -> Dict[str, Dict[str, int]]:
+        responses = (
+            select(Response.task_id, func.count(Response.id).label("responses"))
+            .group_by(Response.task_id)
+            .subquery()
+        )
+        leases = (
+            select(WorkerAssignment.task_id, func.count(WorkerAssignment.id).label("leases"))
+            .where(WorkerAssignment.status.in_(ACTIVE_ASSIGNMENT_STATUSES))
+            .group_by(WorkerAssignment.task_id)
+            .subquery()
+        )
+        response_count = func.coalesce(responses.c.responses, 0)
+        # Expired tasks hand back their slots even if a lease was left open
+        lease_count = case(
+            (Task.status == TaskStatus.EXPIRED, 0), else_=func.coalesce(leases.c.leases, 0)
+        )
+        completed = func.coalesce(Task.completed_responses, 0)
+        active = func.coalesce(Task.active_leases, 0)
+        query = (
+            select(Task.id, response_count - completed, lease_count - active)
+            .outerjoin(responses, responses.c.task_id == Task.id)
+            .outerjoin(leases, leases.c.task_id == Task.id)
+            .where(or_(response_count != completed, lease_count != active))
+        )
+        if project_ids is not None:
+            query = query.where(Task.project_id.in_(project_ids))
+        
+        return {
+            task_id: {"completed_responses": responses_drift, "active_leases": leases_drift}
+            for task_id, responses_drift, leases_drift in (await db.execute(query)).all()
+        }
+
+
+class CounterReconciler:
+    """Folds counter shards every COUNTER_FOLD_SECONDS and reconciles every COUNTER_RECONCILE_SECONDS"""
+    
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        if self._task is None and settings.COUNTER_FOLD_SECONDS > 0:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        reconciled_at = loop.time()
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await ProjectCounterService.fold(db)
+                    reconcile_every = settings.COUNTER_RECONCILE_SECONDS
+                    if reconcile_every > 0 and loop.time() - reconciled_at >= reconcile_every:
+                        reconciled_at = loop.time()
+                        counts = await ProjectCounterService.reconcile(db)
+                        if counts["projects"] or counts["tasks"]:
+                            logger.warning(
+                                "Corrected counters of %d projects and %d tasks",
+                                counts["projects"], counts["tasks"]
+                            )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Counter reconciliation failed")
+            
+            await asyncio.sleep(settings.COUNTER_FOLD_SECONDS)
+
+
+counter_reconciler = CounterReconciler()
\ No newline at end of file
@@ -0,0 +1,488 @@
+"""
+Per-project ready queues for task dispatch
+Each active project keeps an in-process heap of task ids that still have open
+response slots, ordered by priority and then age, plus the set of tasks every
+worker has already been given. Checkout pops from the heap instead of
+scanning tasks and responses; the conditional UPDATE in AssignmentService
+stays the source of truth, so a stale entry only costs one failed claim.
+
+Queues are rebuilt from the database on startup, when a project is launched
+or resumed and every DISPATCH_QUEUE_REFRESH_SECONDS, which also picks up
+changes made by other API processes. New tasks are staged on the session
+and pushed after it commits.
+
+Gold tasks are kept out of the shared heap and interleaved per worker at the
+project's gold_standard_percentage: in-memory counters of tasks and gold
+tasks given to each worker decide when the next pop serves gold, and a gold
+task is never given to the same worker twice. Gold tasks have no slot limit.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+import asyncio
+import bisect
+import heapq
+import itertools
+import logging
+import math
+import random
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, select, union, literal, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.project import Project, ProjectStatus
+from app.models.response import Response
+from app.models.task import (
+    Task, TaskWorkerRestriction, RestrictionType, priority_rank, ready_status_clause
+)
+from app.models.worker import WorkerAssignment
+
+logger = logging.getLogger(__name__)
+
+# Entries examined per pop before giving up to the SQL checkout
+MAX_SCAN = 1000
+
+_sequence = itertools.count()
+
+
+class ReadyQueue:
+    """Available tasks of one project with their open slot counts"""
+    
+    def __init__(self, project_id: str, gold_percentage: int = 0) -> None:
+        self.project_id = project_id
+        self.heap: List[Tuple[int, int, str]] = []
+        self.keys: Dict[str, Tuple[int, int]] = {}
+        self.slots: Dict[str, int] = {}
+        # Worker -> tasks already given to, answered by or excluded for the worker, least
+        # recently used first; reloaded after DISPATCH_ANSWERED_SECONDS to see other processes
+        self.answered: "OrderedDict[str, Set[str]]" = OrderedDict()
+        self.answered_at: Dict[str, float] = {}
+        # Exclusive tasks live in a heap per listed worker instead of the shared one
+        self.exclusive: Dict[str, List[Tuple[int, int, str]]] = {}
+        self.exclusive_workers: Dict[str, Tuple[str, ...]] = {}
+        # Gold tasks in dispatch order, and worker -> [tasks given, gold tasks given]
+        self.gold: List[Tuple[int, int, str]] = []
+        self.gold_ids: Set[str] = set()
+        self.gold_rate = gold_percentage / 100
+        self.exposure: Dict[str, List[int]] = {}
+        self.phases: Dict[str, float] = {}
+    
+    def __len__(self) -> int:
+        return (
+            len(self.heap) + len(self.gold_ids)
+            + sum(len(heap) for heap in self.exclusive.values())
+        )
+    
+    def add(
+        self,
+        task_id: str,
+        priority: Any,
+        slots: int,
+        exclusive_worker_ids: Optional[List[str]] = None,
+        excluded_worker_ids: Optional[List[str]] = None,
+        is_gold: bool = False
+    ) -> None:
+        if task_id in self.keys or task_id in self.gold_ids:
+            return
+        if is_gold:
+            self._add_gold(task_id, priority, excluded_worker_ids)
+            return
+        if slots <= 0:
+            return
+        self.keys[task_id] = (priority_rank(priority), next(_sequence))
+        self.slots[task_id] = slots
+        self.restrict(task_id, exclusive_worker_ids, excluded_worker_ids)
+    
+    def _add_gold(
+        self,
+        task_id: str,
+        priority: Any,
+        excluded_worker_ids: Optional[List[str]]
+    ) -> None:
+        bisect.insort(self.gold, (priority_rank(priority), next(_sequence), task_id))
+        self.gold_ids.add(task_id)
+        for worker_id in excluded_worker_ids or []:
+            if str(worker_id) in self.answered:
+                self.answered[str(worker_id)].add(task_id)
+    
+    def _gold_due(self, worker_id: str) -> bool:
+        """Whether the worker's next task should be gold to stay on the target rate"""
+        if not self.gold_rate or not self.gold_ids:
+            return False
+        given, gold = self.exposure.setdefault(worker_id, [0, 0])
+        # A random phase per worker spreads gold instead of always serving it first
+        phase = self.phases.get(worker_id)
+        if phase is None:
+            phase = self.phases[worker_id] = random.random()
+        return math.floor((given + 1) * self.gold_rate + phase) > gold
+    
+    def _pop_gold(self, worker_id: str, answered: Set[str]) -> Optional[str]:
+        # Every worker walks gold in the same order, so the scan mostly passes seen gold
+        for _, _, task_id in self.gold:
+            if task_id in self.gold_ids and task_id not in answered:
+                return task_id
+        return None
+    
+    def _count(self, worker_id: str, task_id: str) -> None:
+        exposure = self.exposure.setdefault(worker_id, [0, 0])
+        exposure[0] += 1
+        if task_id in self.gold_ids:
+            exposure[1] += 1
+    
+    def restrict(
+        self,
+        task_id: str,
+        exclusive_worker_ids: Optional[List[str]],
+        excluded_worker_ids: Optional[List[str]]
+    ) -> None:
+        """Apply a task's worker lists; entries left in the wrong heap are skipped on pop"""
+        if task_id in self.gold_ids:
+            for worker_id in excluded_worker_ids or []:
+                if str(worker_id) in self.answered:
+                    self.answered[str(worker_id)].add(task_id)
+            return
+        if task_id not in self.keys:
+            return
+        if exclusive_worker_ids:
+            self.exclusive_workers[task_id] = tuple(map(str, exclusive_worker_ids))
+        else:
+            self.exclusive_workers.pop(task_id, None)
+        for worker_id in excluded_worker_ids or []:
+            if str(worker_id) in self.answered:
+                self.answered[str(worker_id)].add(task_id)
+        if self.slots.get(task_id, 0) > 0:
+            self._push(task_id)
+    
+    def _push(self, task_id: str) -> None:
+        entry = (*self.keys[task_id], task_id)
+        workers = self.exclusive_workers.get(task_id)
+        if not workers:
+            heapq.heappush(self.heap, entry)
+        for worker_id in workers or ():
+            heapq.heappush(self.exclusive.setdefault(worker_id, []), entry)
+    
+    def _top(
+        self,
+        heap: List[Tuple[int, int, str]],
+        worker_id: Optional[str],
+        answered: Set[str],
+        skipped: List[Tuple[int, int, str]],
+        budget: List[int]
+    ) -> Optional[Tuple[int, int, str]]:
+        """Best usable entry of a heap, left in place; ``worker_id`` is set for exclusive heaps"""
+        while heap and budget[0] > 0:
+            budget[0] -= 1
+            task_id = heap[0][2]
+            workers = self.exclusive_workers.get(task_id)
+            stale = (
+                self.slots.get(task_id, 0) <= 0
+                or (worker_id is None and workers is not None)
+                or (worker_id is not None and worker_id not in (workers or ()))
+            )
+            if stale:
+                heapq.heappop(heap)
+            elif task_id in answered:
+                skipped.append(heapq.heappop(heap))
+            else:
+                return heap[0]
+        return None
+    
+    def pop(self, worker_id: str) -> Optional[str]:
+        """
+        Reserve one slot of the best task the worker has not been given yet
+        
+        Exclusive tasks listing the worker compete with the shared heap on
+        priority and age. Gold is served instead when the worker is due one.
+        Returns None when nothing is left for the worker within MAX_SCAN
+        entries; the caller then falls back to querying the database.
+        """
+        answered = self.answered.setdefault(worker_id, set())
+        if self._gold_due(worker_id):
+            task_id = self._pop_gold(worker_id, answered)
+            if task_id is not None:
+                answered.add(task_id)
+                self._count(worker_id, task_id)
+                return task_id
+        
+        budget = [MAX_SCAN]
+        candidates = []
+        
+        skipped_shared: List[Tuple[int, int, str]] = []
+        entry = self._top(self.heap, None, answered, skipped_shared, budget)
+        if entry:
+            candidates.append((entry, self.heap))
+        
+        own = self.exclusive.get(worker_id)
+        skipped_own: List[Tuple[int, int, str]] = []
+        if own:
+            entry = self._top(own, worker_id, answered, skipped_own, budget)
+            if entry:
+                candidates.append((entry, own))
+        
+        task_id = None
+        if candidates:
+            entry, heap = min(candidates)
+            task_id = entry[2]
+            self.slots[task_id] -= 1
+            if self.slots[task_id] <= 0:
+                heapq.heappop(heap)
+            # A failed claim discards the task anyway, so mark it right away
+            answered.add(task_id)
+            self._count(worker_id, task_id)
+        
+        for entry in skipped_shared:
+            heapq.heappush(self.heap, entry)
+        for entry in skipped_own:
+            heapq.heappush(own, entry)
+        return task_id
+    
+    def backlog(self) -> int:
+        """Open slots of ordinary tasks"""
+        return sum(slots for slots in self.slots.values() if slots > 0)
+    
+    def take(self, task_id: str, worker_id: str) -> None:
+        """Account for a slot claimed without going through pop"""
+        if task_id in self.slots:
+            self.slots[task_id] -= 1
+        if worker_id in self.answered:
+            self.answered[worker_id].add(task_id)
+        self._count(worker_id, task_id)
+    
+    def discard(self, task_id: str) -> None:
+        """Forget the open slots of a task the database refused to lease"""
+        if task_id in self.slots:
+            self.slots[task_id] = 0
+    
+    def remove(self, task_id: str) -> None:
+        """Drop a task that can no longer be leased by anyone, gold included"""
+        self.discard(task_id)
+        if task_id in self.gold_ids:
+            self.gold_ids.discard(task_id)
+            self.gold = [entry for entry in self.gold if entry[2] != task_id]
+    
+    def release(self, task_id: str) -> None:
+        if task_id not in self.keys:
+            return
+        self.slots[task_id] += 1
+        if self.slots[task_id] == 1:
+            self._push(task_id)
+    
+    async def load_answered(self, db: AsyncSession, worker_id: str) -> None:
+        """
+        Load the tasks a worker was assigned, answered or excluded from
+        
+        The set is kept for DISPATCH_ANSWERED_SECONDS, and only for the
+        DISPATCH_ANSWERED_MAX_WORKERS most recent workers. Also seeds the
+        worker's gold exposure from the tasks they were given.
+        """
+        loaded_at = self.answered_at.get(worker_id)
+        if loaded_at is not None and worker_id in self.answered:
+            if time.monotonic() - loaded_at < settings.DISPATCH_ANSWERED_SECONDS:
+                self.answered.move_to_end(worker_id)
+                return
+        
+        assigned = (
+            select(WorkerAssignment.task_id, literal(True).label("given"))
+            .join(Task, Task.id == WorkerAssignment.task_id)
+            .where(WorkerAssignment.worker_id == worker_id, Task.project_id == self.project_id)
+        )
+        responded = (
+            select(Response.task_id, literal(True).label("given"))
+            .join(Task, Task.id == Response.task_id)
+            .where(Response.worker_id == worker_id, Task.project_id == self.project_id)
+        )
+        excluded = select(TaskWorkerRestriction.task_id, literal(False).label("given")).where(
+            TaskWorkerRestriction.worker_id == worker_id,
+            TaskWorkerRestriction.project_id == self.project_id,
+            TaskWorkerRestriction.restriction_type == RestrictionType.EXCLUDED
+        )
+        result = await db.execute(union(assigned, responded, excluded))
+        answered: Set[str] = set()
+        given: Set[str] = set()
+        for task_id, was_given in result.all():
+            answered.add(task_id)
+            if was_given:
+                given.add(task_id)
+        self.answered[worker_id] = answered
+        self.answered.move_to_end(worker_id)
+        self.answered_at[worker_id] = time.monotonic()
+        self.exposure[worker_id] = [len(given), len(given & self.gold_ids)]
+        while len(self.answered) > settings.DISPATCH_ANSWERED_MAX_WORKERS:
+            evicted, _ = self.answered.popitem(last=False)
+            self.answered_at.pop(evicted, None)
+            self.exposure.pop(evicted, None)
+            self.phases.pop(evicted, None)
+
+
+class DispatchQueues:
+    """Ready queues of all active projects in this process"""
+    
+    def __init__(self) -> None:
+        self.queues: Dict[str, ReadyQueue] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def get(self, project_id: UUID) -> Optional[ReadyQueue]:
+        return self.queues.get(str(project_id))
+    
+    def drop(self, project_id: UUID) -> None:
+        self.queues.pop(str(project_id), None)
+    
+    async def rebuild(self, db: AsyncSession, project_id: UUID) -> ReadyQueue:
+        """Replace a project's queue with the open tasks currently in the database"""
+        result = await db.execute(
+            select(Project.enable_gold_standard, Project.gold_standard_percentage)
+            .where(Project.id == project_id)
+        )
+        gold = result.first()
+        gold_percentage = (gold[1] or 0) if gold and gold[0] else 0
+        queue = ReadyQueue(str(project_id), gold_percentage)
+        
+        exclusive: Dict[str, List[str]] = {}
+        result = await db.execute(
+            select(TaskWorkerRestriction.task_id, TaskWorkerRestriction.worker_id).where(
+                TaskWorkerRestriction.project_id == project_id,
+                TaskWorkerRestriction.restriction_type == RestrictionType.EXCLUSIVE
+            )
+        )
+        for task_id, worker_id in result.all():
+            exclusive.setdefault(task_id, []).append(worker_id)
+        
+        result = await db.stream(
+            select(
+                Task.id,
+                Task.priority,
+                Task.required_responses - Task.completed_responses - Task.active_leases,
+                Task.is_exclusive,
+                Task.is_gold_standard
+            )
+            .where(
+                Task.project_id == project_id,
+                ready_status_clause(),
+                or_(
+                    Task.is_gold_standard.is_(True),
+                    Task.completed_responses + Task.active_leases < Task.required_responses
+                )
+            )
+            .order_by(Task.created_at)
+            .execution_options(yield_per=settings.TASK_INSERT_BATCH_SIZE)
+        )
+        async for task_id, priority, slots, is_exclusive, is_gold in result:
+            if is_exclusive and task_id not in exclusive:
+                continue
+            queue.add(task_id, priority, slots, exclusive.get(task_id), is_gold=bool(is_gold))
+        
+        # Keep the already-given sets and gold exposure until they expire
+        previous = self.queues.get(queue.project_id)
+        if previous:
+            queue.answered = previous.answered
+            queue.answered_at = previous.answered_at
+            queue.exposure = previous.exposure
+            queue.phases = previous.phases
+        self.queues[queue.project_id] = queue
+        return queue
+    
+    async def rebuild_active(self, db: AsyncSession) -> None:
+        result = await db.execute(
+            select(Project.id).where(Project.status == ProjectStatus.ACTIVE)
+        )
+        project_ids = set(result.scalars().all())
+        for project_id in list(self.queues):
+            if project_id not in project_ids:
+                self.drop(project_id)
+        for project_id in project_ids:
+            await self.rebuild(db, project_id)
+    
+    def release(self, task_ids: Iterable[str]) -> None:
+        for task_id in task_ids:
+            for queue in self.queues.values():
+                queue.release(task_id)
+    
+    def remove(self, task_ids: Iterable[str]) -> None:
+        for task_id in task_ids:
+            for queue in self.queues.values():
+                queue.remove(task_id)
+    
+    def stage(self, db: AsyncSession, rows: Iterable[Dict[str, Any]]) -> None:
+        """Hold inserted task rows until the session commits, then add them"""
+        if not self.queues:
+            return
+        staged = db.info.setdefault("dispatch_tasks", [])
+        staged.extend(
+            (
+                str(row["project_id"]), row["id"], row.get("priority"),
+                row.get("required_responses") or 0,
+                row.get("exclusive_worker_ids"), row.get("excluded_worker_ids"),
+                bool(row.get("is_gold_standard"))
+            )
+            for row in rows
+        )
+    
+    def add_tasks(self, tasks: Iterable[Task]) -> None:
+        """Add committed tasks to their project's queue"""
+        self.publish([
+            (
+                str(task.project_id), task.id, task.priority,
+                task.required_responses - task.completed_responses,
+                task.exclusive_worker_ids, task.excluded_worker_ids,
+                bool(task.is_gold_standard)
+            )
+            for task in tasks
+        ])
+    
+    def publish(self, staged: List[Tuple[Any, ...]]) -> None:
+        for project_id, task_id, *task in staged:
+            queue = self.queues.get(project_id)
+            if queue is not None:
+                queue.add(task_id, *task)
+    
+    def restrict(self, task: Task) -> None:
+        """Apply changed worker lists of a committed task"""
+        queue = self.queues.get(str(task.project_id))
+        if queue is not None:
+            queue.restrict(task.id, task.exclusive_worker_ids, task.excluded_worker_ids)
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.rebuild_active(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Dispatch queue rebuild failed")
+            
+            if settings.DISPATCH_QUEUE_REFRESH_SECONDS <= 0:
+                return
+            await asyncio.sleep(settings.DISPATCH_QUEUE_REFRESH_SECONDS)
+
+
+dispatch_queues = DispatchQueues()
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_staged_tasks(session: Session) -> None:
+    staged = session.info.pop("dispatch_tasks", None)
+    if staged:
+        dispatch_queues.publish(staged)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_staged_tasks(session: Session) -> None:
+    session.info.pop("dispatch_tasks", None)
\ No newline at end of file
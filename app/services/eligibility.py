@@ -0,0 +1,384 @@
+"""
+Worker eligibility for qualification-gated projects
+Project.qualification_requirements is compiled into a predicate over the
+worker profile columns, and every (worker, project) pair it accepts is stored
+in worker_project_eligibility. Checkout and the available-projects list then
+need a single primary key probe or join instead of evaluating JSON per request.
+
+A flush listener notes workers whose profile changed and projects whose
+requirements changed on the session; once it commits they are handed to a
+background refresher, which re-matches each worker against all gated
+projects and each project against all workers in its own transaction.
+Eligibility therefore trails a commit by one refresh. Processes that do not
+run the refresher (scripts, CLIs) re-match inside the flushing transaction
+instead. Bulk UPDATEs bypass the listener: callers must pass the affected
+ids to EligibilityService.stage, or run backfill_worker_eligibility.py
+afterwards.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from itertools import chain
+import asyncio
+import logging
+
+from sqlalchemy import select, insert, delete, exists, or_, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.project import Project, ProjectStatus
+from app.models.worker import Worker, WorkerProjectEligibility
+from app.schemas.project import QualificationRequirements, ScoreRange
+
+logger = logging.getLogger(__name__)
+
+Predicate = Callable[[Any], bool]
+
+# Worker columns requirements can test; a change to any of them triggers a recompute
+WORKER_PROFILE_FIELDS = (
+    "country", "languages", "worker_type", "certifications", "qualifications",
+    "test_scores", "overall_quality_score", "accuracy_rate"
+)
+PROJECT_REQUIREMENT_FIELDS = ("require_qualification", "qualification_requirements")
+
+
+def _in_range(value: Any, bounds: ScoreRange) -> bool:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    if bounds.min is not None and value < bounds.min:
+        return False
+    if bounds.max is not None and value > bounds.max:
+        return False
+    return True
+
+
+def _qualification_check(key: str, expected: Any) -> Predicate:
+    if isinstance(expected, dict):
+        bounds = ScoreRange(**expected)
+        return lambda worker: _in_range((worker.qualifications or {}).get(key), bounds)
+    if isinstance(expected, list):
+        return lambda worker: (worker.qualifications or {}).get(key) in expected
+    return lambda worker: (worker.qualifications or {}).get(key) == expected
+
+
+def _score_check(test: str, bounds: ScoreRange) -> Predicate:
+    return lambda worker: _in_range((worker.test_scores or {}).get(test), bounds)
+
+
+def compile_requirements(requirements: Optional[Dict[str, Any]]) -> Predicate:
+    """
+    Build a predicate over a worker (model or row of WORKER_PROFILE_FIELDS)
+    
+    Raises:
+        ValidationError: if the requirements do not parse
+    """
+    rules = QualificationRequirements.model_validate(requirements or {})
+    checks: List[Predicate] = []
+    
+    if rules.countries:
+        countries = {country.upper() for country in rules.countries}
+        checks.append(lambda worker: (worker.country or "").upper() in countries)
+    if rules.languages:
+        languages = {language.lower() for language in rules.languages}
+        checks.append(
+            lambda worker: languages <= {str(code).lower() for code in worker.languages or []}
+        )
+    if rules.worker_types:
+        worker_types = set(rules.worker_types)
+        checks.append(lambda worker: worker.worker_type in worker_types)
+    if rules.certifications:
+        certifications = set(rules.certifications)
+        checks.append(
+            lambda worker: certifications <= {str(c) for c in worker.certifications or []}
+        )
+    for key, expected in rules.qualifications.items():
+        checks.append(_qualification_check(key, expected))
+    for test, bounds in rules.test_scores.items():
+        checks.append(_score_check(test, bounds))
+    if rules.min_quality_score is not None:
+        minimum = rules.min_quality_score
+        checks.append(lambda worker: (worker.overall_quality_score or 0.0) >= minimum)
+    if rules.min_accuracy_rate is not None:
+        minimum = rules.min_accuracy_rate
+        checks.append(lambda worker: (worker.accuracy_rate or 0.0) >= minimum)
+    
+    return lambda worker: all(check(worker) for check in checks)
+
+
+def _never(worker: Any) -> bool:
+    return False
+
+
+def _worker_profiles():
+    return select(Worker.id, *(getattr(Worker, field) for field in WORKER_PROFILE_FIELDS))
+
+
+class EligibilityService:
+    
+    @staticmethod
+    def predicates(
+        session: Session,
+        project_ids: Optional[Iterable[str]] = None
+    ) -> Dict[str, Predicate]:
+        """Compiled requirements of gated projects; unparseable ones match nobody"""
+        query = select(Project.id, Project.qualification_requirements).where(
+            Project.require_qualification.is_(True)
+        )
+        if project_ids is not None:
+            query = query.where(Project.id.in_(list(project_ids)))
+        
+        predicates = {}
+        for project_id, requirements in session.execute(query).all():
+            try:
+                predicates[project_id] = compile_requirements(requirements)
+            except ValidationError:
+                logger.warning("Project %s has invalid qualification requirements", project_id)
+                predicates[project_id] = _never
+        return predicates
+    
+    @staticmethod
+    def stage(
+        session: Session,
+        worker_ids: Iterable[str] = (),
+        project_ids: Iterable[str] = ()
+    ) -> None:
+        """
+        Queue workers and projects for a refresh once the session commits
+        
+        Without a running eligibility_refresher they are refreshed right away,
+        in the session's transaction. The flush listener stages ORM changes
+        itself; bulk UPDATEs of worker profile or project requirement columns
+        must call this, from async code through ``db.run_sync``.
+        """
+        if not eligibility_refresher.running:
+            if project_ids:
+                EligibilityService.refresh_projects(session, set(project_ids))
+            if worker_ids:
+                EligibilityService.refresh_workers(session, set(worker_ids))
+            return
+        session.info.setdefault("eligibility_workers", set()).update(worker_ids)
+        session.info.setdefault("eligibility_projects", set()).update(project_ids)
+    
+    @staticmethod
+    def _insert(session: Session, rows: List[Dict[str, str]]) -> None:
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        for start in range(0, len(rows), batch_size):
+            session.execute(insert(WorkerProjectEligibility), rows[start:start + batch_size])
+    
+    @staticmethod
+    def refresh_workers(session: Session, worker_ids: Set[str]) -> None:
+        """Re-match workers against every gated project"""
+        eligibility = WorkerProjectEligibility
+        session.execute(delete(eligibility).where(eligibility.worker_id.in_(worker_ids)))
+        predicates = EligibilityService.predicates(session)
+        if not predicates:
+            return
+        
+        workers = session.execute(
+            _worker_profiles().where(Worker.id.in_(worker_ids))
+        ).all()
+        EligibilityService._insert(session, [
+            {"worker_id": worker.id, "project_id": project_id}
+            for worker in workers
+            for project_id, predicate in predicates.items()
+            if predicate(worker)
+        ])
+    
+    @staticmethod
+    def refresh_projects(session: Session, project_ids: Set[str]) -> int:
+        """Re-match projects against every worker, returning the pairs stored"""
+        eligibility = WorkerProjectEligibility
+        session.execute(delete(eligibility).where(eligibility.project_id.in_(project_ids)))
+        predicates = EligibilityService.predicates(session, project_ids)
+        if not predicates:
+            return 0
+        
+        # Matches are collected before inserting so the worker cursor is closed first
+        rows = []
+        workers = session.execute(
+            _worker_profiles().execution_options(yield_per=settings.TASK_INSERT_BATCH_SIZE)
+        )
+        for worker in workers:
+            for project_id, predicate in predicates.items():
+                if predicate(worker):
+                    rows.append({"worker_id": worker.id, "project_id": project_id})
+        EligibilityService._insert(session, rows)
+        return len(rows)
+    
+    @staticmethod
+    async def rebuild(db: AsyncSession, project_ids: Optional[List[str]] = None) -> int:
+        """Recompute the eligibility of the given, or all, projects and commit"""
+        if project_ids is None:
+            result = await db.execute(select(Project.id))
+            project_ids = result.scalars().all()
+        count = await db.run_sync(EligibilityService.refresh_projects, set(project_ids))
+        await db.commit()
+        return count
+    
+    @staticmethod
+    async def is_eligible(db: AsyncSession, worker_id: str, project: Project) -> bool:
+        if not project.require_qualification:
+            return True
+        result = await db.execute(
+            select(WorkerProjectEligibility.project_id).where(
+                WorkerProjectEligibility.worker_id == worker_id,
+                WorkerProjectEligibility.project_id == project.id
+            )
+        )
+        return result.first() is not None
+    
+    @staticmethod
+    def available_condition(worker: Worker, organization_id: Optional[str]) -> list:
+        """Conditions limiting a Project query to active projects the worker may join"""
+        return [
+            Project.status == ProjectStatus.ACTIVE,
+            Project.id.notin_(worker.blocked_project_ids or []),
+            or_(
+                Project.use_private_workforce.isnot(True),
+                Project.organization_id == organization_id
+            ),
+            or_(
+                Project.require_qualification.isnot(True),
+                exists().where(
+                    WorkerProjectEligibility.worker_id == worker.id,
+                    WorkerProjectEligibility.project_id == Project.id
+                )
+            )
+        ]
+    
+    @staticmethod
+    async def available_projects(
+        db: AsyncSession,
+        worker: Worker,
+        organization_id: Optional[str],
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Project]:
+        result = await db.execute(
+            select(Project)
+            .where(*EligibilityService.available_condition(worker, organization_id))
+            .order_by(Project.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+
+class EligibilityRefresher:
+    """Re-matches workers and projects changed by committed transactions, off the request path"""
+    
+    def __init__(self) -> None:
+        self.worker_ids: Set[str] = set()
+        self.project_ids: Set[str] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+    
+    def enqueue(self, worker_ids: Iterable[str] = (), project_ids: Iterable[str] = ()) -> None:
+        if not self.running:
+            # Staged before a shutdown; nothing would ever drain them
+            logger.warning(
+                "Eligibility refresher stopped; %d workers and %d projects need "
+                "backfill_worker_eligibility.py", len(set(worker_ids)), len(set(project_ids))
+            )
+            return
+        self.worker_ids.update(worker_ids)
+        self.project_ids.update(project_ids)
+        if self.worker_ids or self.project_ids:
+            self._wake.set()
+    
+    async def refresh_pending(self) -> None:
+        """Refresh everything queued so far in one transaction"""
+        worker_ids, self.worker_ids = self.worker_ids, set()
+        project_ids, self.project_ids = self.project_ids, set()
+        if not worker_ids and not project_ids:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                if project_ids:
+                    await db.run_sync(EligibilityService.refresh_projects, project_ids)
+                if worker_ids:
+                    await db.run_sync(EligibilityService.refresh_workers, worker_ids)
+                await db.commit()
+        except Exception:
+            # Requeue, e.g. after a concurrent refresh of the same rows in another process
+            self.worker_ids |= worker_ids
+            self.project_ids |= project_ids
+            raise
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wake = None
+            try:
+                await self.refresh_pending()
+            except Exception:
+                logger.exception("Eligibility refresh failed")
+    
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            try:
+                await self.refresh_pending()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Eligibility refresh failed")
+                await asyncio.sleep(1)
+                self._wake.set()
+
+
+eligibility_refresher = EligibilityRefresher()
+
+
+def _changed(obj: Any, fields: Iterable[str]) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[field].history.has_changes() for field in fields)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_eligibility_changes(session: Session, flush_context: Any) -> None:
+    worker_ids: Set[str] = set()
+    project_ids: Set[str] = set()
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, Worker):
+            if obj in session.new or _changed(obj, WORKER_PROFILE_FIELDS):
+                worker_ids.add(obj.id)
+        elif isinstance(obj, Project):
+            if obj in session.new:
+                if obj.require_qualification:
+                    project_ids.add(obj.id)
+            elif _changed(obj, PROJECT_REQUIREMENT_FIELDS):
+                project_ids.add(obj.id)
+    
+    if worker_ids or project_ids:
+        EligibilityService.stage(session, worker_ids, project_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_eligibility_changes(session: Session) -> None:
+    worker_ids = session.info.pop("eligibility_workers", None)
+    project_ids = session.info.pop("eligibility_projects", None)
+    if worker_ids or project_ids:
+        eligibility_refresher.enqueue(worker_ids or (), project_ids or ())
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_eligibility_changes(session: Session) -> None:
+    session.info.pop("eligibility_workers", None)
+    session.info.pop("eligibility_projects", None)
\ No newline at end of file
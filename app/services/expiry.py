@@ -0,0 +1,137 @@
+"""
+Lease and task expiry
+Leases past WorkerAssignment.expires_at hand their slot back to the task, and
+open tasks past Task.expires_at become EXPIRED along with any leases still
+held on them. Both are found through indexed timestamp columns and updated in
+batches of EXPIRY_SWEEP_BATCH_SIZE, one transaction per batch, so a sweep
+never locks large parts of tasks. Every API process runs the sweeper; the
+status guards on each UPDATE let concurrent sweeps overlap safely.
+"""
+from typing import Dict, Optional
+from datetime import datetime
+from collections import Counter
+import asyncio
+import logging
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.time import utcnow
+from app.db.session import AsyncSessionLocal
+from app.models.task import Task, TaskStatus, ready_status_clause
+from app.models.worker import WorkerAssignment, AssignmentStatus, ACTIVE_ASSIGNMENT_STATUSES
+from app.services.assignment import AssignmentService
+from app.services.counters import ProjectCounterService
+from app.services.dispatch import dispatch_queues
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiryService:
+    
+    @staticmethod
+    async def expire_tasks(db: AsyncSession, now: Optional[datetime] = None) -> int:
+        """Mark one batch of open tasks past their deadline EXPIRED"""
+        stale = (
+            select(Task.id)
+            .where(ready_status_clause(), Task.expires_at <= (now or utcnow()))
+            .limit(settings.EXPIRY_SWEEP_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        task_ids = (await db.execute(stale)).scalars().all()
+        if not task_ids:
+            await db.commit()
+            return 0
+        
+        result = await db.execute(
+            update(Task)
+            .where(Task.id.in_(task_ids), ready_status_clause())
+            .values(status=TaskStatus.EXPIRED, active_leases=0)
+            .returning(Task.id, Task.project_id)
+            .execution_options(synchronize_session=False)
+        )
+        expired = result.all()
+        if expired:
+            expired_ids = [task_id for task_id, _ in expired]
+            await db.execute(
+                update(WorkerAssignment)
+                .where(
+                    WorkerAssignment.task_id.in_(expired_ids),
+                    WorkerAssignment.status.in_(ACTIVE_ASSIGNMENT_STATUSES)
+                )
+                .values(status=AssignmentStatus.EXPIRED.value)
+                .execution_options(synchronize_session=False)
+            )
+            
+            counts = Counter(project_id for _, project_id in expired)
+            for project_id, count in counts.items():
+                await ProjectCounterService.increment(db, project_id, expired_tasks=count)
+        await db.commit()
+        
+        dispatch_queues.remove(task_id for task_id, _ in expired)
+        return len(expired)
+    
+    @staticmethod
+    async def sweep(db: AsyncSession, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Expire everything that is due, one committed batch at a time
+        
+        Returns:
+            Number of leases and tasks expired
+        """
+        now = now or utcnow()
+        batch_size = settings.EXPIRY_SWEEP_BATCH_SIZE
+        counts = {"leases": 0, "tasks": 0}
+        
+        # Tasks first, so their leases are closed without handing slots back
+        while True:
+            expired = await ExpiryService.expire_tasks(db, now)
+            counts["tasks"] += expired
+            if expired < batch_size:
+                break
+        while True:
+            expired = await AssignmentService.expire_leases(db, now)
+            counts["leases"] += expired
+            if expired < batch_size:
+                break
+        return counts
+
+
+class ExpirySweeper:
+    """Runs ExpiryService.sweep every EXPIRY_SWEEP_SECONDS"""
+    
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        if self._task is None and settings.EXPIRY_SWEEP_SECONDS > 0:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    counts = await ExpiryService.sweep(db)
+                if counts["leases"] or counts["tasks"]:
+                    logger.info(
+                        "Expired %d leases and %d tasks", counts["leases"], counts["tasks"]
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Expiry sweep failed")
+            
+            await asyncio.sleep(settings.EXPIRY_SWEEP_SECONDS)
+
+
+expiry_sweeper = ExpirySweeper()
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+Gold-standard sampling for task ingestion
+Rows that carry expected answers are gold candidates. Within each batch_id the
+sampler keeps the share of gold tasks at the configured percentage of all tasks
+in that batch, counting tasks already in the project, so sampling stays
+stratified across import batches, repeated imports and resumed jobs.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+import math
+import random
+
+from sqlalchemy import select, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.project import Project
+from app.models.task import Task
+
+
+class GoldStandardSampler:
+    """Marks candidate rows as gold per batch_id stratum, in place"""
+    
+    def __init__(
+        self,
+        percentage: int,
+        counts: Optional[Dict[Optional[str], Tuple[int, int]]] = None,
+        seed: Optional[int] = None
+    ) -> None:
+        self.rate = percentage / 100
+        # Stratum -> [tasks seen, gold tasks]
+        self.counts = {key: list(value) for key, value in (counts or {}).items()}
+        self.offsets: Dict[Optional[str], float] = {}
+        self.random = random.Random(seed)
+    
+    @classmethod
+    async def for_project(
+        cls,
+        db: AsyncSession,
+        project_id: UUID,
+        percentage: Optional[int] = None
+    ) -> Optional["GoldStandardSampler"]:
+        """Sampler seeded with the project's per-batch task and gold counts"""
+        project = await db.get(Project, project_id)
+        if project is None or not project.enable_gold_standard:
+            return None
+        if percentage is None:
+            percentage = project.gold_standard_percentage or 0
+        
+        result = await db.execute(
+            select(
+                Task.batch_id,
+                func.count(Task.id),
+                func.sum(case((Task.is_gold_standard.is_(True), 1), else_=0))
+            )
+            .where(Task.project_id == project_id)
+            .group_by(Task.batch_id)
+        )
+        counts = {batch_id: (total, gold or 0) for batch_id, total, gold in result.all()}
+        return cls(percentage, counts)
+    
+    def _quota(self, stratum: Optional[str], seen: int) -> int:
+        # A random phase per stratum spreads picks instead of always taking the first row
+        offset = self.offsets.get(stratum)
+        if offset is None:
+            offset = self.offsets[stratum] = self.random.random()
+        return math.floor(seen * self.rate + offset)
+    
+    def sample(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Set is_gold_standard on rows until each stratum meets its quota
+        
+        A stratum that is due a gold task takes the next row with answers.
+        Answers on rows that are not picked are dropped.
+        
+        Returns:
+            Number of gold rows in ``rows``
+        """
+        gold = 0
+        for row in rows:
+            stratum = row.get("batch_id")
+            counts = self.counts.setdefault(stratum, [0, 0])
+            counts[0] += 1
+            
+            if row.get("is_gold_standard"):
+                counts[1] += 1
+                gold += 1
+            elif row.get("gold_standard_answers"):
+                if counts[1] < self._quota(stratum, counts[0]):
+                    row["is_gold_standard"] = True
+                    counts[1] += 1
+                    gold += 1
+                else:
+                    row["gold_standard_answers"] = None
+        return gold
\ No newline at end of file
@@ -0,0 +1,391 @@
+"""
+Background task import jobs
+Uploads are stored on disk and ingested batch by batch by an in-process worker.
+Progress is committed together with each batch, so an interrupted job resumes
+from its last committed batch after a restart.
+
+A running job heartbeats every IMPORT_JOB_STALE_SECONDS / 3 from a separate
+session, however long a batch takes; a job whose heartbeat goes stale may be
+claimed by another worker. Each claim stores a fresh token, and batch and
+final commits only apply while the job still carries it, so a worker that
+lost its job rolls back instead of ingesting the batch a second time.
+"""
+from typing import Any, BinaryIO, Dict, List, Optional
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import shutil
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.time import utcnow, ensure_utc
+from app.db.session import AsyncSessionLocal
+from app.models.import_job import ImportJob, ImportJobStatus
+from app.schemas.task import TaskCreate, TaskImportBatch, TaskImportOptions, TaskImportResult
+from app.services.task_import import TaskImportService, IMPORT_FORMATS
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJobLost(Exception):
+    """The job was reclaimed by another worker after this one's heartbeat went stale"""
+
+
+def _copy_to_storage(fileobj: BinaryIO, path: str) -> int:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fileobj.seek(0)
+    with open(path, "wb") as out:
+        shutil.copyfileobj(fileobj, out, length=1024 * 1024)
+        return out.tell()
+
+
+def _write_tasks(tasks_in: List[TaskCreate], path: str) -> int:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as out:
+        for task_in in tasks_in:
+            out.write(task_in.model_dump_json().encode("utf-8") + b"\n")
+        return out.tell()
+
+
+class ImportJobService:
+    
+    @staticmethod
+    def storage_path(job_id: str) -> str:
+        return os.path.join(settings.IMPORT_STORAGE_DIR, f"{job_id}.upload")
+    
+    @staticmethod
+    async def create_from_file(
+        db: AsyncSession,
+        project_id: UUID,
+        created_by_id: str,
+        fileobj: BinaryIO,
+        file_format: str,
+        file_name: Optional[str] = None,
+        options: Optional[TaskImportOptions] = None
+    ) -> ImportJob:
+        """Store an uploaded file and queue it for import"""
+        if file_format not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported import format: {file_format}")
+        
+        job_id = str(uuid4())
+        path = ImportJobService.storage_path(job_id)
+        size = await run_in_threadpool(_copy_to_storage, fileobj, path)
+        
+        return await ImportJobService._create(
+            db, job_id, project_id, created_by_id, file_format, file_name, path, size,
+            options.model_dump() if options else None
+        )
+    
+    @staticmethod
+    async def create_from_tasks(
+        db: AsyncSession,
+        project_id: UUID,
+        created_by_id: str,
+        tasks_in: List[TaskCreate],
+        options: Optional[TaskImportOptions] = None
+    ) -> ImportJob:
+        """Store a bulk task payload as NDJSON and queue it for import"""
+        job_id = str(uuid4())
+        path = ImportJobService.storage_path(job_id)
+        size = await run_in_threadpool(_write_tasks, tasks_in, path)
+        
+        return await ImportJobService._create(
+            db, job_id, project_id, created_by_id, "tasks", None, path, size,
+            options.model_dump() if options else None
+        )
+    
+    @staticmethod
+    async def _create(
+        db: AsyncSession,
+        job_id: str,
+        project_id: UUID,
+        created_by_id: str,
+        file_format: str,
+        file_name: Optional[str],
+        path: str,
+        size: int,
+        options: Optional[Dict[str, Any]]
+    ) -> ImportJob:
+        job = ImportJob(
+            id=job_id,
+            project_id=project_id,
+            created_by_id=created_by_id,
+            file_format=file_format,
+            file_name=file_name,
+            file_path=path,
+            options=options or {},
+            status=ImportJobStatus.QUEUED,
+            bytes_total=size
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        
+        import_job_worker.notify()
+        return job
+    
+    @staticmethod
+    async def get(db: AsyncSession, job_id: str) -> Optional[ImportJob]:
+        result = await db.execute(
+            select(ImportJob).where(ImportJob.id == job_id)
+        )
+        return result.scalar_one_or_none()
+    
+    @staticmethod
+    async def list_project_jobs(
+        db: AsyncSession,
+        project_id: UUID,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[ImportJob]:
+        result = await db.execute(
+            select(ImportJob)
+            .where(ImportJob.project_id == project_id)
+            .order_by(ImportJob.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.scalars().all()
+    
+    @staticmethod
+    def progress(job: ImportJob) -> Dict[str, Any]:
+        """Throughput and ETA for the current run of a job"""
+        throughput = None
+        eta_seconds = None
+        percent_complete = (
+            min(job.bytes_processed / job.bytes_total * 100, 100.0)
+            if job.bytes_total
+            else 0.0
+        )
+        
+        started_at = ensure_utc(job.started_at)
+        if started_at and job.status == ImportJobStatus.RUNNING:
+            elapsed = (utcnow() - started_at).total_seconds()
+            rows_this_run = job.rows_processed - (job.resumed_from_row or 0)
+            if elapsed > 0 and rows_this_run > 0:
+                throughput = rows_this_run / elapsed
+                # Rows per byte so far extrapolated over the bytes still to read
+                if job.bytes_processed:
+                    remaining_rows = (
+                        (job.bytes_total - job.bytes_processed)
+                        * job.rows_processed / job.bytes_processed
+                    )
+                    eta_seconds = remaining_rows / throughput
+        elif job.status == ImportJobStatus.COMPLETED:
+            percent_complete = 100.0
+            eta_seconds = 0.0
+        
+        return {
+            "throughput_rows_per_second": throughput,
+            "eta_seconds": eta_seconds,
+            "percent_complete": percent_complete
+        }
+    
+    @staticmethod
+    def _runnable(now: datetime):
+        stale_before = now - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS)
+        return or_(
+            ImportJob.status == ImportJobStatus.QUEUED,
+            and_(
+                ImportJob.status == ImportJobStatus.RUNNING,
+                or_(
+                    ImportJob.heartbeat_at.is_(None),
+                    ImportJob.heartbeat_at < stale_before
+                )
+            )
+        )
+    
+    @staticmethod
+    async def runnable_job_ids(db: AsyncSession) -> List[str]:
+        """Queued jobs plus running jobs whose worker stopped heartbeating"""
+        result = await db.execute(
+            select(ImportJob.id)
+            .where(ImportJobService._runnable(utcnow()))
+            .order_by(ImportJob.created_at)
+        )
+        return result.scalars().all()
+    
+    @staticmethod
+    async def claim(db: AsyncSession, job_id: str) -> Optional[str]:
+        """Atomically take ownership of a runnable job, returning the claim token"""
+        now = utcnow()
+        token = str(uuid4())
+        result = await db.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJobService._runnable(now))
+            .values(
+                status=ImportJobStatus.RUNNING,
+                started_at=now,
+                heartbeat_at=now,
+                claim_token=token,
+                resumed_from_row=ImportJob.rows_processed
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return token if result.rowcount == 1 else None
+    
+    @staticmethod
+    async def _heartbeat(job_id: str, token: str) -> None:
+        """Keep a claimed job fresh until cancelled or reclaimed"""
+        interval = max(settings.IMPORT_JOB_STALE_SECONDS / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    result = await db.execute(
+                        update(ImportJob)
+                        .where(ImportJob.id == job_id, ImportJob.claim_token == token)
+                        .values(heartbeat_at=utcnow())
+                        .execution_options(synchronize_session=False)
+                    )
+                    await db.commit()
+            except Exception:
+                logger.exception("Import job %s heartbeat failed", job_id)
+                continue
+            if result.rowcount != 1:
+                return
+    
+    @staticmethod
+    async def run(job_id: str) -> None:
+        """Claim and ingest a job, resuming after its last committed batch"""
+        async with AsyncSessionLocal() as db:
+            token = await ImportJobService.claim(db, job_id)
+            if token is None:
+                return
+            
+            job = await ImportJobService.get(db, job_id)
+            file_path = job.file_path
+            heartbeat = asyncio.create_task(ImportJobService._heartbeat(job_id, token))
+            try:
+                await ImportJobService._ingest(db, job, token)
+                values = dict(
+                    status=ImportJobStatus.COMPLETED,
+                    bytes_processed=ImportJob.bytes_total
+                )
+            except ImportJobLost:
+                logger.warning("Import job %s was reclaimed by another worker", job_id)
+                await db.rollback()
+                return
+            except Exception as exc:
+                logger.exception("Import job %s failed", job_id)
+                await db.rollback()
+                values = dict(status=ImportJobStatus.FAILED, error_message=str(exc))
+            finally:
+                heartbeat.cancel()
+            
+            result = await db.execute(
+                update(ImportJob)
+                .where(ImportJob.id == job_id, ImportJob.claim_token == token)
+                .values(finished_at=utcnow(), **values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        
+        if result.rowcount == 1 and values["status"] == ImportJobStatus.COMPLETED:
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    async def _ingest(db: AsyncSession, job: ImportJob, token: str) -> None:
+        result = TaskImportResult()
+        errors = list(job.errors or [])
+        # A rejected batch rolls back and expires the job, so avoid touching its attributes
+        job_id = job.id
+        
+        with open(job.file_path, "rb") as raw:
+            
+            async def on_batch(db: AsyncSession, stats: TaskImportBatch) -> None:
+                # Staged in the batch transaction, so progress never runs ahead of data
+                values = dict(
+                    rows_processed=stats.last_row,
+                    rows_created=ImportJob.rows_created + stats.created,
+                    rows_failed=ImportJob.rows_failed + stats.failed,
+                    rows_updated=ImportJob.rows_updated + stats.updated,
+                    rows_skipped=ImportJob.rows_skipped + stats.skipped,
+                    rows_duplicate=ImportJob.rows_duplicate + stats.duplicates,
+                    rows_gold=ImportJob.rows_gold + stats.gold,
+                    batches_committed=ImportJob.batches_committed + 1,
+                    bytes_processed=raw.tell(),
+                    heartbeat_at=utcnow()
+                )
+                if result.errors and len(errors) < settings.TASK_IMPORT_MAX_ERRORS:
+                    errors.extend(e.model_dump() for e in result.errors)
+                    del errors[settings.TASK_IMPORT_MAX_ERRORS:]
+                    values["errors"] = list(errors)
+                result.errors.clear()
+                
+                # Only the current claim may commit; otherwise the batch is rolled back
+                updated = await db.execute(
+                    update(ImportJob)
+                    .where(ImportJob.id == job_id, ImportJob.claim_token == token)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                if updated.rowcount != 1:
+                    raise ImportJobLost(job_id)
+            
+            await TaskImportService.import_file(
+                db,
+                fileobj=raw,
+                file_format=job.file_format,
+                project_id=job.project_id,
+                options=TaskImportOptions(**(job.options or {})),
+                start_row=job.rows_processed or 0,
+                on_batch=on_batch,
+                result=result
+            )
+
+
+class ImportJobWorker:
+    """Polls for queued and interrupted import jobs and runs them one at a time"""
+    
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def notify(self) -> None:
+        self._wakeup.set()
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    job_ids = await ImportJobService.runnable_job_ids(db)
+                for job_id in job_ids:
+                    await ImportJobService.run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Import job worker iteration failed")
+            
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=settings.IMPORT_JOB_POLL_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+import_job_worker = ImportJobWorker()
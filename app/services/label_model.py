@@ -0,0 +1,402 @@
+"""
+Dawid-Skene label aggregation
+Majority vote treats every worker alike. The Dawid-Skene model instead fits,
+by expectation maximization, a confusion matrix per worker (the probability
+of each given answer for each true label) together with the true label
+priors, and from them a posterior over the true label of every task.
+
+Answers to a multiple choice question form a sparse task x worker x label
+tensor held as three index arrays, one entry per response. Each EM step is
+K NumPy bincounts over the entries, K being the number of labels:
+    
+    M step   confusion[worker, true, given] += P(task is true), per entry
+    E step   log P(task is true) = log prior + sum of log confusion[worker, true, given]
+
+Gold tasks are held at their expected answer. Fits are stored in LabelModel
+and WorkerConfusion; the next fit starts from them (new workers from their
+accuracy_rate), so re-running after new responses converges in a few
+iterations. Results are written back in bulk: the posterior label of each
+task in TaskQuestionConsensus, and each worker's overall_quality_score as the
+response-weighted mean of their per-question quality, after which their
+project eligibility is refreshed.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import time
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, insert, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.time import utcnow
+from app.models.label_model import LabelModel, WorkerConfusion
+from app.models.project import Project
+from app.models.question import Question, QuestionType
+from app.models.response import Response, ResponseValue
+from app.models.task import Task, TaskQuestionConsensus
+from app.models.worker import Worker
+from app.services.consensus import CategoricalAggregator
+from app.services.eligibility import EligibilityService
+from app.services.task import TaskService
+
+
+@dataclass
+class ResponseTensor:
+    """Sparse task x worker x label answers of one question"""
+    tasks: np.ndarray  # Task of each response
+    workers: np.ndarray  # Worker of each response
+    labels: np.ndarray  # Given label of each response
+    task_ids: List[str]
+    worker_ids: List[str]
+    names: List[str]  # Label by index
+
+
+@dataclass
+class LabelFit:
+    posteriors: np.ndarray  # tasks x labels
+    confusion: np.ndarray  # workers x true label x given label
+    priors: np.ndarray
+    iterations: int
+    converged: bool
+    log_likelihood: float
+
+
+def default_confusion(accuracy: np.ndarray, size: int) -> np.ndarray:
+    """Confusion matrices that are right with the given probability and wrong uniformly"""
+    wrong = (1 - accuracy) / max(size - 1, 1)
+    confusion = np.repeat(wrong[:, None, None], size, axis=1).repeat(size, axis=2)
+    diagonal = np.arange(size)
+    confusion[:, diagonal, diagonal] = accuracy[:, None]
+    return confusion
+
+
+def _m_step(tensor: ResponseTensor, posteriors: np.ndarray, smoothing: float) -> Tuple[np.ndarray, np.ndarray]:
+    size = len(tensor.names)
+    cells = len(tensor.worker_ids) * size
+    given = tensor.workers * size + tensor.labels
+    counts = np.full((len(tensor.worker_ids), size, size), smoothing)
+    for true in range(size):
+        counts[:, true, :] += np.bincount(
+            given, posteriors[tensor.tasks, true], cells
+        ).reshape(-1, size)
+    confusion = counts / counts.sum(axis=2, keepdims=True)
+    priors = (posteriors.sum(axis=0) + smoothing) / (len(posteriors) + size * smoothing)
+    return confusion, priors
+
+
+def _e_step(
+    tensor: ResponseTensor,
+    confusion: np.ndarray,
+    priors: np.ndarray,
+    gold: Dict[int, int]
+) -> Tuple[np.ndarray, float]:
+    size = len(tensor.names)
+    log_confusion = np.log(confusion)
+    scores = np.tile(np.log(priors), (len(tensor.task_ids), 1))
+    for true in range(size):
+        scores[:, true] += np.bincount(
+            tensor.tasks, log_confusion[tensor.workers, true, tensor.labels], len(tensor.task_ids)
+        )
+    peak = scores.max(axis=1, keepdims=True)
+    posteriors = np.exp(scores - peak)
+    totals = posteriors.sum(axis=1, keepdims=True)
+    log_likelihood = float((np.log(totals) + peak).sum())
+    posteriors /= totals
+    if gold:
+        rows = np.fromiter(gold.keys(), dtype=np.int64)
+        posteriors[rows] = 0.0
+        posteriors[rows, np.fromiter(gold.values(), dtype=np.int64)] = 1.0
+    return posteriors, log_likelihood
+
+
+def dawid_skene(
+    tensor: ResponseTensor,
+    gold: Dict[int, int],
+    confusion: Optional[np.ndarray] = None,
+    priors: Optional[np.ndarray] = None,
+    max_iterations: int = 100,
+    tolerance: float = 1e-6,
+    smoothing: float = 0.01
+) -> LabelFit:
+    """
+    Fit worker confusion matrices and task posteriors by EM
+    
+    Starts from ``confusion`` and ``priors`` when given, otherwise from the
+    majority vote of each task. Stops once an iteration improves the log
+    likelihood by less than ``tolerance`` relative to it.
+    """
+    size = len(tensor.names)
+    if confusion is not None and priors is not None:
+        posteriors, log_likelihood = _e_step(tensor, confusion, priors, gold)
+    else:
+        votes = np.bincount(
+            tensor.tasks * size + tensor.labels, minlength=len(tensor.task_ids) * size
+        ).reshape(-1, size).astype(np.float64)
+        posteriors = votes / votes.sum(axis=1, keepdims=True)
+        if gold:
+            rows = np.fromiter(gold.keys(), dtype=np.int64)
+            posteriors[rows] = 0.0
+            posteriors[rows, np.fromiter(gold.values(), dtype=np.int64)] = 1.0
+        log_likelihood = float("-inf")
+    
+    converged = False
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+        confusion, priors = _m_step(tensor, posteriors, smoothing)
+        previous = log_likelihood
+        posteriors, log_likelihood = _e_step(tensor, confusion, priors, gold)
+        if abs(log_likelihood - previous) <= tolerance * abs(log_likelihood):
+            converged = True
+            break
+    return LabelFit(posteriors, confusion, priors, iterations, converged, log_likelihood)
+
+
+class LabelModelService:
+    
+    @staticmethod
+    def questions(project: Project) -> List[Question]:
+        """Questions the label model applies to"""
+        return sorted(
+            (q for q in project.questions if q.question_type == QuestionType.MULTIPLE_CHOICE),
+            key=lambda q: q.order or 0
+        )
+    
+    @staticmethod
+    async def load(db: AsyncSession, question: Question, previous: Optional[LabelModel]) -> ResponseTensor:
+        """Every answer to a question, labels ordered as in the previous fit"""
+        label_ids: Dict[str, int] = {}
+        for name in (previous.labels if previous else []):
+            label_ids.setdefault(name, len(label_ids))
+        for option in question.options or []:
+            label_ids.setdefault(option["value"], len(label_ids))
+        task_ids: Dict[str, int] = {}
+        worker_ids: Dict[str, int] = {}
+        tasks: List[int] = []
+        workers: List[int] = []
+        labels: List[int] = []
+        
+        stream = await db.stream(
+            select(Response.task_id, Response.worker_id, ResponseValue.value)
+            .join(ResponseValue, ResponseValue.response_id == Response.id)
+            .where(ResponseValue.question_id == question.id)
+            .execution_options(yield_per=settings.TASK_INSERT_BATCH_SIZE)
+        )
+        async for task_id, worker_id, value in stream:
+            if not isinstance(value, str) or worker_id is None:
+                continue
+            tasks.append(task_ids.setdefault(task_id, len(task_ids)))
+            workers.append(worker_ids.setdefault(worker_id, len(worker_ids)))
+            labels.append(label_ids.setdefault(value, len(label_ids)))
+        
+        return ResponseTensor(
+            tasks=np.array(tasks, dtype=np.int64),
+            workers=np.array(workers, dtype=np.int64),
+            labels=np.array(labels, dtype=np.int64),
+            task_ids=list(task_ids),
+            worker_ids=list(worker_ids),
+            names=list(label_ids)
+        )
+    
+    @staticmethod
+    async def _gold(db: AsyncSession, question: Question, tensor: ResponseTensor) -> Dict[int, int]:
+        """Expected label of the gold tasks among the answered ones, by task index"""
+        result = await db.execute(
+            select(Task.id, Task.gold_standard_answers)
+            .where(Task.project_id == question.project_id, Task.is_gold_standard.is_(True))
+        )
+        task_index = {task_id: i for i, task_id in enumerate(tensor.task_ids)}
+        label_index = {name: i for i, name in enumerate(tensor.names)}
+        gold = {}
+        for task_id, answers in result.all():
+            answers = answers or {}
+            expected = answers.get(question.identifier, answers.get(question.id))
+            if task_id in task_index and expected in label_index:
+                gold[task_index[task_id]] = label_index[expected]
+        return gold
+    
+    @staticmethod
+    async def _warm_start(
+        db: AsyncSession,
+        question: Question,
+        previous: Optional[LabelModel],
+        tensor: ResponseTensor
+    ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """The previous fit's parameters, if its labels still describe the answers"""
+        if previous is None or list(previous.labels) != tensor.names:
+            return None, None
+        
+        result = await db.execute(
+            select(WorkerConfusion.worker_id, WorkerConfusion.matrix)
+            .where(WorkerConfusion.question_id == question.id)
+        )
+        known = dict(result.all())
+        accuracy = np.full(len(tensor.worker_ids), settings.LABEL_MODEL_DEFAULT_ACCURACY)
+        index = {worker_id: i for i, worker_id in enumerate(tensor.worker_ids)}
+        new_workers = [worker_id for worker_id in tensor.worker_ids if worker_id not in known]
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        for start in range(0, len(new_workers), batch_size):
+            result = await db.execute(
+                select(Worker.id, Worker.accuracy_rate)
+                .where(Worker.id.in_(new_workers[start:start + batch_size]))
+            )
+            for worker_id, rate in result.all():
+                if rate and 0 < rate < 1:
+                    accuracy[index[worker_id]] = rate
+        
+        confusion = default_confusion(accuracy, len(tensor.names))
+        for i, worker_id in enumerate(tensor.worker_ids):
+            if worker_id in known:
+                confusion[i] = np.array(known[worker_id])
+        return confusion, np.array(previous.priors)
+    
+    @staticmethod
+    async def fit(db: AsyncSession, project: Project) -> List[LabelModel]:
+        """Fit every multiple choice question of a project, write the results back and commit"""
+        fits = []
+        for question in LabelModelService.questions(project):
+            fitted = await LabelModelService.fit_question(db, project, question)
+            if fitted is not None:
+                fits.append(fitted)
+        await db.commit()
+        return fits
+    
+    @staticmethod
+    async def fit_question(db: AsyncSession, project: Project, question: Question) -> Optional[LabelModel]:
+        started = time.perf_counter()
+        previous = await db.get(LabelModel, question.id)
+        tensor = await LabelModelService.load(db, question, previous)
+        if not len(tensor.tasks):
+            return None
+        gold = await LabelModelService._gold(db, question, tensor)
+        confusion, priors = await LabelModelService._warm_start(db, question, previous, tensor)
+        fit = await run_in_threadpool(
+            dawid_skene, tensor, gold, confusion, priors,
+            settings.LABEL_MODEL_MAX_ITERATIONS,
+            settings.LABEL_MODEL_TOLERANCE,
+            settings.LABEL_MODEL_SMOOTHING
+        )
+        
+        await LabelModelService._write_tasks(db, question, tensor, fit)
+        await LabelModelService._write_workers(db, question, tensor, fit)
+        
+        model = previous or LabelModel(question_id=question.id, project_id=project.id)
+        model.labels = tensor.names
+        model.priors = fit.priors.tolist()
+        model.tasks = len(tensor.task_ids)
+        model.workers = len(tensor.worker_ids)
+        model.responses = len(tensor.tasks)
+        model.iterations = fit.iterations
+        model.converged = fit.converged
+        model.warm_start = confusion is not None
+        model.log_likelihood = fit.log_likelihood
+        model.computed_at = utcnow()
+        model.seconds = round(time.perf_counter() - started, 3)
+        db.add(model)
+        return model
+    
+    @staticmethod
+    async def _write_tasks(
+        db: AsyncSession,
+        question: Question,
+        tensor: ResponseTensor,
+        fit: LabelFit
+    ) -> None:
+        """
+        Posterior label of each task, onto its consensus histogram row
+        
+        Tasks without a row yet (answers written around the consensus
+        service) get one built from the fitted answers.
+        """
+        best = fit.posteriors.argmax(axis=1)
+        confidence = fit.posteriors[np.arange(len(best)), best]
+        size = len(tensor.names)
+        histograms = np.bincount(
+            tensor.tasks * size + tensor.labels, minlength=len(tensor.task_ids) * size
+        ).reshape(len(tensor.task_ids), size)
+        aggregator = CategoricalAggregator()
+        
+        rows = []
+        for task_id, histogram, label, probability in zip(
+            tensor.task_ids, histograms.tolist(), best.tolist(), confidence.tolist()
+        ):
+            counts = {name: n for name, n in zip(tensor.names, histogram) if n}
+            responses = sum(histogram)
+            rows.append({
+                "task_id": task_id,
+                "question_id": question.id,
+                "responses": responses,
+                "counts": counts,
+                "label": aggregator.leading(counts, responses),
+                "score": aggregator.score(counts, responses),
+                "posterior_label": tensor.names[label],
+                "posterior": probability
+            })
+        
+        # Existing rows keep their histogram, which the consensus service maintains
+        statement = TaskService._dialect_insert(db)(TaskQuestionConsensus)
+        statement = statement.on_conflict_do_update(
+            index_elements=["task_id", "question_id"],
+            set_={
+                "posterior_label": statement.excluded.posterior_label,
+                "posterior": statement.excluded.posterior
+            }
+        )
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        for start in range(0, len(rows), batch_size):
+            await db.execute(statement, rows[start:start + batch_size])
+    
+    @staticmethod
+    async def _write_workers(
+        db: AsyncSession,
+        question: Question,
+        tensor: ResponseTensor,
+        fit: LabelFit
+    ) -> None:
+        """Replace the question's confusion matrices and refresh the workers' quality scores"""
+        diagonal = np.arange(len(tensor.names))
+        quality = (fit.confusion[:, diagonal, diagonal] * fit.priors).sum(axis=1)
+        responses = np.bincount(tensor.workers, minlength=len(tensor.worker_ids))
+        rows = [
+            {
+                "question_id": question.id,
+                "worker_id": worker_id,
+                "matrix": fit.confusion[i].tolist(),
+                "quality": float(quality[i]),
+                "responses": int(responses[i])
+            }
+            for i, worker_id in enumerate(tensor.worker_ids)
+        ]
+        
+        await db.execute(delete(WorkerConfusion).where(WorkerConfusion.question_id == question.id))
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        for start in range(0, len(rows), batch_size):
+            await db.execute(insert(WorkerConfusion), rows[start:start + batch_size])
+        
+        # Response-weighted over every question the worker has a confusion matrix for
+        weighted = (
+            select(
+                func.sum(WorkerConfusion.quality * WorkerConfusion.responses)
+                / func.nullif(func.sum(WorkerConfusion.responses), 0)
+            )
+            .where(WorkerConfusion.worker_id == Worker.id)
+            .scalar_subquery()
+        )
+        await db.execute(
+            update(Worker)
+            .where(Worker.id.in_(
+                select(WorkerConfusion.worker_id).where(WorkerConfusion.question_id == question.id)
+            ))
+            .values(overall_quality_score=func.coalesce(weighted, Worker.overall_quality_score))
+            .execution_options(synchronize_session=False)
+        )
+        # The bulk UPDATE bypasses the flush listener; min_quality_score gates may have moved
+        await db.run_sync(EligibilityService.stage, set(tensor.worker_ids))
+    
+    @staticmethod
+    async def get(db: AsyncSession, project: Project) -> List[LabelModel]:
+        result = await db.execute(select(LabelModel).where(LabelModel.project_id == project.id))
+        order = {question.id: question.order or 0 for question in project.questions}
+        return sorted(result.scalars().all(), key=lambda model: order.get(model.question_id, 0))
\ No newline at end of file
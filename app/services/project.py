@@ -9,6 +9,9 @@ from app.models.team import Team
 from app.models.question import Question
 from app.schemas.project import ProjectCreate, ProjectUpdate
 from app.schemas.question import QuestionCreate
+from app.services.counters import ProjectCounterService
+from app.services.dispatch import dispatch_queues
+from app.services.scheduler import project_scheduler
 
 
 class ProjectService:
@@ -101,8 +104,12 @@ class ProjectService:
         for field, value in update_data.items():
             setattr(db_obj, field, value)
         
+        if update_data.get("sharded_counters"):
+            await ProjectCounterService.create_shards(db, db_obj.id)
+        
         await db.commit()
         await db.refresh(db_obj)
+        project_scheduler.invalidate()
         return db_obj
     
     @staticmethod
@@ -123,6 +130,7 @@ class ProjectService:
         project.status = ProjectStatus.ACTIVE
         await db.commit()
         await db.refresh(project)
+        await dispatch_queues.rebuild(db, project.id)
         return project
     
     @staticmethod
@@ -136,6 +144,7 @@ class ProjectService:
         project.status = ProjectStatus.PAUSED
         await db.commit()
         await db.refresh(project)
+        dispatch_queues.drop(project.id)
         return project
     
     @staticmethod
@@ -149,6 +158,7 @@ class ProjectService:
         project.status = ProjectStatus.ACTIVE
         await db.commit()
         await db.refresh(project)
+        await dispatch_queues.rebuild(db, project.id)
         return project
     
     @staticmethod
@@ -162,6 +172,7 @@ class ProjectService:
         project.status = ProjectStatus.COMPLETED
         await db.commit()
         await db.refresh(project)
+        dispatch_queues.drop(project.id)
         return project
     
     @staticmethod
@@ -175,6 +186,7 @@ class ProjectService:
         project.status = ProjectStatus.CANCELLED
         await db.commit()
         await db.refresh(project)
+        dispatch_queues.drop(project.id)
         return project
     
     @staticmethod
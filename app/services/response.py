@@ -0,0 +1,331 @@
+"""
+Response submission
+A submission closes the worker's lease and stores the Response with all its
+ResponseValues in one transaction. Counters move with SQL-side increments, so
+a submit costs the same handful of statements however busy the task or
+project is, and a batch of responses costs the same statements as one:
+    
+    UPDATE worker_assignments ... RETURNING   close the leases
+    UPDATE tasks ... RETURNING                count responses, free lease slots
+    SELECT, INSERT/UPDATE consensus           per-task label histograms
+    INSERT responses, INSERT response_values  multi-row
+    UPDATE tasks                              consensus score and status
+    UPDATE responses                          only for tasks this finalized
+    UPDATE projects, UPDATE workers           totals and pending payments
+
+A task with its required responses is completed, given a tiebreaker slot or
+sent to review by its live consensus (see app.services.consensus). Gold tasks
+are never completed by submissions; they stay leasable so every worker they
+are interleaved for can answer them.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import uuid4
+import re
+
+from sqlalchemy import update, insert, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.time import utcnow
+from app.models.project import Project
+from app.models.question import Question, QuestionType
+from app.models.response import Response, ResponseValue
+from app.models.task import Task, TaskStatus
+from app.models.worker import (
+    Worker, WorkerAssignment, AssignmentStatus, ACTIVE_ASSIGNMENT_STATUSES
+)
+from app.schemas.response import (
+    ResponseCreate, ResponseValueCreate, ResponseBatchResult, ResponseRejection,
+    ResponseSubmission
+)
+from app.services.consensus import ConsensusService, ConsensusPolicy
+from app.services.counters import ProjectCounterService
+from app.services.dispatch import dispatch_queues
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def check_answer(question: Question, value: Any) -> Optional[str]:
+    """Problem with an answer to a question, or None if it is acceptable"""
+    options = {option["value"] for option in question.options or []}
+    kind = question.question_type
+    
+    if kind == QuestionType.MULTIPLE_CHOICE:
+        if not isinstance(value, str):
+            return "expected an option value"
+        if options and value not in options:
+            return f"'{value}' is not one of the options"
+    
+    elif kind == QuestionType.CHECKBOX:
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            return "expected a list of option values"
+        if len(set(value)) != len(value):
+            return "options are selected more than once"
+        unknown = [item for item in value if options and item not in options]
+        if unknown:
+            return f"{', '.join(unknown)} are not options"
+        if question.min_selections is not None and len(value) < question.min_selections:
+            return f"select at least {question.min_selections} options"
+        if question.max_selections is not None and len(value) > question.max_selections:
+            return f"select at most {question.max_selections} options"
+    
+    elif kind == QuestionType.LIKERT:
+        if not _is_number(value):
+            return "expected a number on the scale"
+        scale = question.settings or {}
+        if scale.get("scale_min") is not None and value < scale["scale_min"]:
+            return f"below the scale minimum {scale['scale_min']}"
+        if scale.get("scale_max") is not None and value > scale["scale_max"]:
+            return f"above the scale maximum {scale['scale_max']}"
+    
+    elif kind == QuestionType.FREE_RESPONSE:
+        if not isinstance(value, str):
+            return "expected text"
+        if question.min_length is not None and len(value) < question.min_length:
+            return f"shorter than {question.min_length} characters"
+        if question.max_length is not None and len(value) > question.max_length:
+            return f"longer than {question.max_length} characters"
+        if question.regex_pattern and not re.fullmatch(question.regex_pattern, value):
+            return question.regex_error_message or "does not match the expected format"
+    
+    return None
+
+
+class ResponseService:
+    
+    @staticmethod
+    def validate(
+        questions: Sequence[Question],
+        values: List[ResponseValueCreate]
+    ) -> Optional[str]:
+        """Check answers against the project's questions, returning the first problem"""
+        by_id = {question.id: question for question in questions}
+        answered = set()
+        for item in values:
+            question = by_id.get(item.question_id)
+            if question is None:
+                return f"Question {item.question_id} is not part of this project"
+            if item.question_id in answered:
+                return f"Question {question.identifier} is answered more than once"
+            answered.add(item.question_id)
+            
+            if item.value is None:
+                return f"Question {question.identifier} has no answer"
+            problem = check_answer(question, item.value)
+            if problem:
+                return f"Question {question.identifier}: {problem}"
+        
+        # Conditional questions may legitimately be hidden, so only unconditional ones are enforced
+        missing = sorted(
+            question.identifier for question in questions
+            if question.required and not question.show_if and question.id not in answered
+        )
+        if missing:
+            return f"Missing answers to required questions: {', '.join(missing)}"
+        return None
+    
+    @staticmethod
+    async def submit(
+        db: AsyncSession,
+        project: Project,
+        worker_id: str,
+        response_in: ResponseCreate
+    ) -> ResponseSubmission:
+        """Submit the answers for one lease"""
+        result = await ResponseService.submit_many(db, project, worker_id, [response_in])
+        if result.rejected:
+            rejection = result.rejected[0]
+            raise HTTPException(status_code=rejection.status_code, detail=rejection.detail)
+        return result.submitted[0]
+    
+    @staticmethod
+    async def submit_many(
+        db: AsyncSession,
+        project: Project,
+        worker_id: str,
+        responses_in: List[ResponseCreate]
+    ) -> ResponseBatchResult:
+        """
+        Submit answers for many leases of a project in one transaction
+        
+        Responses that fail validation, or whose lease is no longer active,
+        are reported as rejected; the others are stored.
+        """
+        result = ResponseBatchResult()
+        accepted: Dict[str, ResponseCreate] = {}
+        for response_in in responses_in:
+            if response_in.assignment_id in accepted:
+                problem, code = "Assignment is submitted more than once", status.HTTP_400_BAD_REQUEST
+            else:
+                problem = ResponseService.validate(project.questions, response_in.values)
+                code = status.HTTP_422_UNPROCESSABLE_ENTITY
+            if problem:
+                result.rejected.append(ResponseRejection(
+                    assignment_id=response_in.assignment_id, status_code=code, detail=problem
+                ))
+            else:
+                accepted[response_in.assignment_id] = response_in
+        if not accepted:
+            return result
+        
+        now = utcnow()
+        # The status guard admits each lease once, however many times it is submitted;
+        # a lapsed lease the sweeper has not reached yet still holds its slot
+        closed = await db.execute(
+            update(WorkerAssignment)
+            .where(
+                WorkerAssignment.id.in_(list(accepted)),
+                WorkerAssignment.worker_id == worker_id,
+                WorkerAssignment.project_id == project.id,
+                WorkerAssignment.status.in_(ACTIVE_ASSIGNMENT_STATUSES)
+            )
+            .values(status=AssignmentStatus.COMPLETED.value, completed_at=now)
+            .returning(WorkerAssignment.id, WorkerAssignment.task_id)
+            .execution_options(synchronize_session=False)
+        )
+        leases = dict(closed.all())
+        for assignment_id in accepted:
+            if assignment_id not in leases:
+                result.rejected.append(ResponseRejection(
+                    assignment_id=assignment_id,
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Active assignment not found"
+                ))
+        if not leases:
+            await db.commit()
+            return result
+        
+        # Locks the task rows before their histograms are read
+        counted = await ResponseService._count_responses(db, list(leases.values()))
+        consensus = await ConsensusService.record(
+            db, project.questions,
+            {task_id: accepted[assignment_id].values for assignment_id, task_id in leases.items()}
+        )
+        
+        payment = project.payment_per_response or 0.0
+        responses = []
+        values = []
+        response_ids = {}
+        for assignment_id, task_id in leases.items():
+            response_in = accepted[assignment_id]
+            response_id = response_ids[assignment_id] = str(uuid4())
+            responses.append({
+                "id": response_id,
+                "task_id": task_id,
+                "worker_id": worker_id,
+                "time_taken": response_in.time_taken,
+                "consensus_score": consensus.response_scores.get(task_id),
+                "payment_amount": payment,
+                "payment_status": "pending",
+                "response_metadata": response_in.response_metadata,
+                "created_at": now
+            })
+            values.extend(
+                {"id": str(uuid4()), "response_id": response_id, **item.model_dump()}
+                for item in response_in.values
+            )
+        
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        for start in range(0, len(responses), batch_size):
+            await db.execute(insert(Response), responses[start:start + batch_size])
+        for start in range(0, len(values), batch_size):
+            await db.execute(insert(ResponseValue), values[start:start + batch_size])
+        
+        decided = await ResponseService._settle_tasks(db, project, counted, consensus.task_scores)
+        completed = [task_id for task_id, state in decided.items() if state == TaskStatus.COMPLETED]
+        finalized = [task_id for task_id, state in decided.items() if state is not None]
+        extended = [task_id for task_id, state in decided.items() if state is None]
+        if finalized:
+            await ConsensusService.rescore_responses(
+                db, project.questions, finalized, consensus.histograms
+            )
+        
+        await ProjectCounterService.increment(
+            db, project.id, total_responses=len(responses), completed_tasks=len(completed)
+        )
+        await db.execute(
+            update(Worker)
+            .where(Worker.id == worker_id)
+            .values(
+                total_tasks_completed=Worker.total_tasks_completed + len(responses),
+                pending_payments=Worker.pending_payments + payment * len(responses)
+            )
+        )
+        await db.commit()
+        dispatch_queues.remove(finalized)
+        dispatch_queues.release(extended)
+        
+        for assignment_id, task_id in leases.items():
+            result.submitted.append(ResponseSubmission(
+                id=response_ids[assignment_id],
+                task_id=task_id,
+                assignment_id=assignment_id,
+                task_completed=task_id in completed,
+                created_at=now
+            ))
+        return result
+    
+    @staticmethod
+    async def _count_responses(db: AsyncSession, task_ids: List[str]) -> List[Any]:
+        """Count one response on each task and free its lease slot, returning the task rows"""
+        result = await db.execute(
+            update(Task)
+            .where(Task.id.in_(task_ids))
+            .values(
+                completed_responses=Task.completed_responses + 1,
+                active_leases=Task.active_leases - 1
+            )
+            .returning(
+                Task.id, Task.status, Task.is_gold_standard,
+                Task.completed_responses, Task.required_responses
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.all()
+    
+    @staticmethod
+    async def _settle_tasks(
+        db: AsyncSession,
+        project: Project,
+        rows: List[Any],
+        scores: Dict[str, float]
+    ) -> Dict[str, Optional[TaskStatus]]:
+        """
+        Store each task's consensus score and the status it decides
+        
+        Returns the tasks this moved out of the ready statuses, with their new
+        status, and the tasks given a tiebreaker slot, with None.
+        """
+        policy = ConsensusPolicy.for_project(project)
+        params = []
+        decided: Dict[str, Optional[TaskStatus]] = {}
+        for row in rows:
+            score = scores.get(row.id)
+            new_status, required = ConsensusService.decide(
+                policy, row.status, row.is_gold_standard,
+                row.completed_responses, row.required_responses, score
+            )
+            if new_status != row.status:
+                decided[row.id] = new_status
+            elif required > row.required_responses:
+                decided[row.id] = None
+            params.append({
+                "b_id": row.id, "b_status": new_status, "b_required": required, "b_score": score
+            })
+        
+        # Rows stay locked since the counting UPDATE read their status, so no guard is needed
+        table = Task.__table__
+        await db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                status=bindparam("b_status"),
+                required_responses=bindparam("b_required"),
+                consensus_score=bindparam("b_score")
+            ),
+            params
+        )
+        return decided
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Cross-project fair-share scheduling
+Workers asking for "any task" are spread over active projects with stride
+scheduling: every project holds a pass value and a weight derived from its
+priority, how close its deadline is and the size of its ready queue. The
+project with the lowest pass the worker may join serves the task, and its
+pass then advances by 1 / weight, so over time each project receives worker
+time in proportion to its weight and urgent projects are never starved.
+
+Project settings are cached in memory and refreshed every
+SCHEDULER_REFRESH_SECONDS or when the set of ready queues changes; picking a
+project only sorts that in-memory list.
+"""
+from typing import Dict, List, Optional, Set
+from datetime import datetime
+import math
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.time import utcnow, ensure_utc
+from app.models.project import Project, ProjectStatus
+from app.models.task import priority_rank
+from app.models.worker import Worker, WorkerProjectEligibility
+from app.services.dispatch import dispatch_queues
+
+# Weight by Project.priority rank, CRITICAL first
+PRIORITY_WEIGHTS = (8.0, 4.0, 2.0, 1.0)
+
+# Deadlines closer than this start to raise a project's weight, up to DEADLINE_BOOST
+DEADLINE_HORIZON_SECONDS = 72 * 3600
+DEADLINE_BOOST = 4.0
+
+
+def _has_work(project_id: str) -> bool:
+    queue = dispatch_queues.get(project_id)
+    return queue is not None and len(queue) > 0
+
+
+class ProjectShare:
+    """Scheduling state of one active project"""
+    
+    __slots__ = (
+        "project_id", "organization_id", "private", "gated", "rank", "deadline",
+        "weight", "pass_value"
+    )
+    
+    def __init__(self, project: Project, pass_value: float) -> None:
+        self.project_id = project.id
+        self.organization_id = project.organization_id
+        self.private = bool(project.use_private_workforce)
+        self.gated = bool(project.require_qualification)
+        self.rank = priority_rank(project.priority)
+        self.deadline = ensure_utc(project.deadline)
+        self.weight = 1.0
+        self.pass_value = pass_value
+    
+    def reweigh(self, backlog: int, now: datetime) -> None:
+        weight = PRIORITY_WEIGHTS[min(self.rank, len(PRIORITY_WEIGHTS) - 1)]
+        if self.deadline is not None:
+            remaining = (self.deadline - now).total_seconds()
+            urgency = min(max(1 - remaining / DEADLINE_HORIZON_SECONDS, 0.0), 1.0)
+            weight *= 1 + (DEADLINE_BOOST - 1) * urgency
+        # Backlog counts logarithmically so one huge project cannot take every worker
+        weight *= 1 + math.log10(1 + backlog)
+        self.weight = weight
+
+
+class ProjectScheduler:
+    
+    def __init__(self) -> None:
+        self.shares: Dict[str, ProjectShare] = {}
+        self._queue_ids: Set[str] = set()
+        self._refreshed_at = 0.0
+    
+    def invalidate(self) -> None:
+        self._refreshed_at = 0.0
+    
+    def _stale(self) -> bool:
+        if time.monotonic() - self._refreshed_at >= settings.SCHEDULER_REFRESH_SECONDS:
+            return True
+        return set(dispatch_queues.queues) != self._queue_ids
+    
+    async def refresh(self, db: AsyncSession) -> None:
+        """Reload project settings and weights; passes of known projects are kept"""
+        self._queue_ids = set(dispatch_queues.queues)
+        result = await db.execute(
+            select(Project).where(
+                Project.status == ProjectStatus.ACTIVE,
+                Project.id.in_(list(self._queue_ids))
+            )
+        )
+        projects = result.scalars().all()
+        backlogs = {
+            project.id: dispatch_queues.queues[project.id].backlog()
+            for project in projects if project.id in dispatch_queues.queues
+        }
+        # Newcomers, and projects that sat idle, resume at the lowest pass among busy
+        # projects so they cannot monopolize workers to catch up
+        start = min(
+            (
+                share.pass_value for share in self.shares.values()
+                if backlogs.get(share.project_id)
+            ),
+            default=0.0
+        )
+        now = utcnow()
+        shares = {}
+        for project in projects:
+            previous = self.shares.get(project.id)
+            share = ProjectShare(project, max(previous.pass_value, start) if previous else start)
+            share.reweigh(backlogs.get(project.id, 0), now)
+            shares[project.id] = share
+        self.shares = shares
+        self._refreshed_at = time.monotonic()
+    
+    async def candidates(
+        self,
+        db: AsyncSession,
+        worker: Worker,
+        organization_id: Optional[str]
+    ) -> List[str]:
+        """Projects the worker may take a task from, in the order they should be tried"""
+        if self._stale():
+            await self.refresh(db)
+        
+        blocked = set(worker.blocked_project_ids or [])
+        shares = [
+            share for share in self.shares.values()
+            if share.project_id not in blocked
+            and (not share.private or share.organization_id == organization_id)
+            and _has_work(share.project_id)
+        ]
+        if any(share.gated for share in shares):
+            qualified = await self._qualified(db, worker.id)
+            shares = [share for share in shares if not share.gated or share.project_id in qualified]
+        
+        shares.sort(key=lambda share: (share.pass_value, share.rank))
+        return [share.project_id for share in shares]
+    
+    async def _qualified(self, db: AsyncSession, worker_id: str) -> Set[str]:
+        result = await db.execute(
+            select(WorkerProjectEligibility.project_id).where(
+                WorkerProjectEligibility.worker_id == worker_id
+            )
+        )
+        return set(result.scalars().all())
+    
+    def charge(self, project_id: str, tasks: int = 1) -> None:
+        """Advance a project's pass after it served tasks"""
+        share = self.shares.get(project_id)
+        if share is not None:
+            share.pass_value += tasks / share.weight
+
+
+project_scheduler = ProjectScheduler()
\ No newline at end of file
@@ -1,15 +1,31 @@
-from typing import List, Optional, Dict, Any
-from uuid import UUID
+from typing import List, Optional, Dict, Any, Tuple
+from uuid import UUID, uuid4
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
-import json
 
-from app.models.task import Task, TaskStatus
-from app.models.project import Project, ProjectStatus
-from app.models.response import Response
-from app.schemas.task import TaskCreate, TaskUpdate, TaskBulkCreate
+from app.core.config import settings
+from app.models.task import (
+    Task, TaskStatus, READY_TASK_STATUSES, priority_rank, ready_status_clause
+)
+from app.models.project import Project
+from app.schemas.task import TaskCreate, TaskUpdate, TaskConflictMode, TaskBulkUpsertResult
+from app.services.consensus import ConsensusService, ConsensusPolicy
+from app.services.counters import ProjectCounterService
+from app.services.dispatch import dispatch_queues
+from app.services.task_dedup import TaskDedupService, content_hash
+from app.services.task_restriction import TaskRestrictionService
+from app.services.task_validation import TaskValidator
+
+# Columns an upsert may overwrite on an existing task
+UPSERT_COLUMNS = (
+    "data", "metadata", "priority", "is_gold_standard", "gold_standard_answers",
+    "preexisting_annotations", "required_responses", "batch_id",
+    "exclusive_worker_ids", "excluded_worker_ids", "is_exclusive", "expires_at", "content_hash",
+    "priority_rank"
+)
 
 
 class TaskService:
@@ -20,57 +36,234 @@ class TaskService:
         obj_in: TaskCreate,
         project_id: UUID
     ) -> Task:
+        await TaskService.validate_data(db, project_id, [obj_in.data])
+        
+        digest = content_hash(obj_in.data)
+        existing = await TaskDedupService.existing_hashes(db, project_id, [digest])
+        if existing:
+            # Same content as an existing task: link to it instead of paying for it twice
+            return await TaskService.get(db, task_id=existing[digest])
+        
         # Create task
         db_task = Task(
             **obj_in.model_dump(),
             project_id=project_id,
-            status=TaskStatus.PENDING
+            status=TaskStatus.PENDING,
+            content_hash=digest,
+            is_exclusive=bool(obj_in.exclusive_worker_ids)
         )
         
         db.add(db_task)
+        if obj_in.exclusive_worker_ids or obj_in.excluded_worker_ids:
+            await db.flush()
+            await TaskRestrictionService.insert(db, [{
+                "id": db_task.id,
+                "project_id": project_id,
+                "exclusive_worker_ids": obj_in.exclusive_worker_ids,
+                "excluded_worker_ids": obj_in.excluded_worker_ids
+            }])
         
-        # Update project task count
-        result = await db.execute(
-            select(Project).where(Project.id == project_id)
-        )
-        project = result.scalar_one()
-        project.total_tasks += 1
-        
+        await ProjectCounterService.increment(db, project_id, total_tasks=1)
         await db.commit()
         await db.refresh(db_task)
+        dispatch_queues.add_tasks([db_task])
         return db_task
     
+    @staticmethod
+    async def validate_data(
+        db: AsyncSession,
+        project_id: UUID,
+        datas: List[Dict[str, Any]]
+    ) -> None:
+        """Reject task data the project's questions or data schema cannot use"""
+        validator = await TaskValidator.for_project(db, project_id)
+        _, issues = validator.validate(datas)
+        if issues:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={
+                    "message": "Task data failed validation",
+                    "issues": [issue.model_dump() for issue in issues]
+                }
+            )
+    
+    @staticmethod
+    def build_row(task_in: TaskCreate, project_id: UUID) -> Dict[str, Any]:
+        """Build a column mapping for the bulk insert path"""
+        return {
+            **task_in.model_dump(),
+            "id": str(uuid4()),
+            "project_id": project_id,
+            "status": TaskStatus.PENDING,
+            "is_exclusive": bool(task_in.exclusive_worker_ids),
+            "priority_rank": priority_rank(task_in.priority)
+        }
+    
+    @staticmethod
+    async def bulk_insert(
+        db: AsyncSession,
+        rows: List[Dict[str, Any]],
+        returning: bool = True
+    ) -> List[Task]:
+        """Insert task rows with multi-row INSERT statements, without committing"""
+        tasks = []
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            if returning:
+                # One INSERT ... VALUES (...), (...) RETURNING per chunk
+                result = await db.execute(insert(Task).returning(Task), chunk)
+                tasks.extend(result.scalars().all())
+            else:
+                await db.execute(insert(Task), chunk)
+            await TaskRestrictionService.insert(db, chunk)
+            dispatch_queues.stage(db, chunk)
+        
+        return tasks
+    
+    @staticmethod
+    def _dialect_insert(db: AsyncSession):
+        """INSERT construct with ON CONFLICT support for the session's database"""
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert
+        if dialect == "sqlite":
+            return sqlite.insert
+        raise NotImplementedError(f"Upsert is not supported on {dialect}")
+    
+    @staticmethod
+    async def bulk_upsert(
+        db: AsyncSession,
+        rows: List[Dict[str, Any]],
+        project_id: UUID,
+        on_conflict: TaskConflictMode
+    ) -> Tuple[int, int, int]:
+        """
+        Insert task rows, resolving external_id conflicts in the database
+        
+        Rows are first written with ON CONFLICT DO NOTHING, which makes the
+        created count exact. In update mode the rows that conflicted are then
+        written with ON CONFLICT DO UPDATE, limited to tasks of the same
+        project; the last occurrence of a repeated external_id wins.
+        Project.total_tasks only grows by the number of rows inserted.
+        
+        Returns:
+            (created, updated, skipped)
+        """
+        dialect_insert = TaskService._dialect_insert(db)
+        table = Task.__table__
+        created = updated = skipped = 0
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            
+            stmt = (
+                dialect_insert(Task)
+                .on_conflict_do_nothing(index_elements=[Task.external_id])
+                .returning(Task.id)
+            )
+            result = await db.execute(stmt, chunk)
+            inserted_ids = set(result.scalars().all())
+            created += len(inserted_ids)
+            inserted = [row for row in chunk if row["id"] in inserted_ids]
+            await TaskRestrictionService.insert(db, inserted)
+            dispatch_queues.stage(db, inserted)
+            
+            conflicting = [row for row in chunk if row["id"] not in inserted_ids]
+            if on_conflict != TaskConflictMode.UPDATE or not conflicting:
+                skipped += len(conflicting)
+                continue
+            
+            latest = {row["external_id"]: row for row in conflicting}
+            skipped += len(conflicting) - len(latest)
+            
+            stmt = dialect_insert(Task)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Task.external_id],
+                set_={
+                    **{table.c[name]: stmt.excluded[name] for name in UPSERT_COLUMNS},
+                    table.c.updated_at: func.now()
+                },
+                where=table.c.project_id == stmt.excluded.project_id
+            ).returning(Task.id, Task.external_id)
+            result = await db.execute(stmt, list(latest.values()))
+            written = result.all()
+            updated += len(written)
+            skipped += len(latest) - len(written)
+            
+            # Updated rows keep their existing task id
+            await TaskRestrictionService.replace(
+                db, [{**latest[external_id], "id": task_id} for task_id, external_id in written]
+            )
+        
+        await TaskService.increment_project_task_count(db, project_id, created)
+        return created, updated, skipped
+    
+    @staticmethod
+    async def increment_project_task_count(
+        db: AsyncSession,
+        project_id: UUID,
+        count: int
+    ) -> None:
+        """Adjust Project.total_tasks with a single UPDATE"""
+        await ProjectCounterService.increment(db, project_id, total_tasks=count)
+    
     @staticmethod
     async def create_many(
         db: AsyncSession,
         tasks_in: List[TaskCreate],
         project_id: UUID
     ) -> List[Task]:
-        # Create all tasks
-        db_tasks = []
-        for task_in in tasks_in:
-            db_task = Task(
-                **task_in.model_dump(),
-                project_id=project_id,
-                status=TaskStatus.PENDING
-            )
-            db_tasks.append(db_task)
-            db.add(db_task)
+        await TaskService.validate_data(db, project_id, [task_in.data for task_in in tasks_in])
         
-        # Update project task count
-        result = await db.execute(
-            select(Project).where(Project.id == project_id)
-        )
-        project = result.scalar_one()
-        project.total_tasks += len(db_tasks)
+        rows = [TaskService.build_row(task_in, project_id) for task_in in tasks_in]
+        new_rows, duplicates = await TaskDedupService.partition(db, rows, project_id)
+        
+        # Insert in a few multi-row statements and build the result from RETURNING
+        db_tasks = await TaskService.bulk_insert(db, new_rows)
+        await TaskService.increment_project_task_count(db, project_id, len(db_tasks))
         
         await db.commit()
+        if not duplicates:
+            return db_tasks
+        
+        # Duplicates resolve to the task already holding their content
+        linked = {row["id"]: task_id for row, task_id in duplicates}
+        tasks_by_id = {task.id: task for task in db_tasks}
+        missing = set(linked.values()) - tasks_by_id.keys()
+        if missing:
+            result = await db.execute(select(Task).where(Task.id.in_(missing)))
+            tasks_by_id.update((task.id, task) for task in result.scalars().all())
+        return [tasks_by_id[linked.get(row["id"], row["id"])] for row in rows]
+    
+    @staticmethod
+    async def upsert_many(
+        db: AsyncSession,
+        tasks_in: List[TaskCreate],
+        project_id: UUID,
+        on_conflict: TaskConflictMode
+    ) -> TaskBulkUpsertResult:
+        await TaskService.validate_data(db, project_id, [task_in.data for task_in in tasks_in])
+        
+        rows = [TaskService.build_row(task_in, project_id) for task_in in tasks_in]
+        rows, duplicates = await TaskDedupService.partition(
+            db, rows, project_id, match_external_id=on_conflict != TaskConflictMode.ERROR
+        )
+        result = TaskBulkUpsertResult(duplicates=len(duplicates))
         
-        # Refresh all tasks
-        for task in db_tasks:
-            await db.refresh(task)
+        if on_conflict == TaskConflictMode.ERROR:
+            await TaskService.bulk_insert(db, rows, returning=False)
+            await TaskService.increment_project_task_count(db, project_id, len(rows))
+            result.created = len(rows)
+        else:
+            result.created, result.updated, result.skipped = await TaskService.bulk_upsert(
+                db, rows, project_id, on_conflict
+            )
         
-        return db_tasks
+        await db.commit()
+        return result
     
     @staticmethod
     async def get(db: AsyncSession, task_id: UUID) -> Optional[Task]:
@@ -124,11 +317,34 @@ class TaskService:
     ) -> Task:
         update_data = obj_in.model_dump(exclude_unset=True)
         
+        if "data" in update_data:
+            await TaskService.validate_data(db, db_obj.project_id, [update_data["data"]])
+            digest = content_hash(update_data["data"])
+            existing = await TaskDedupService.existing_hashes(db, db_obj.project_id, [digest])
+            if existing.get(digest, db_obj.id) != db_obj.id:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Task {existing[digest]} already has this data"
+                )
+            update_data["content_hash"] = digest
+        
+        restricted = "exclusive_worker_ids" in update_data or "excluded_worker_ids" in update_data
         for field, value in update_data.items():
             setattr(db_obj, field, value)
         
+        if restricted:
+            db_obj.is_exclusive = bool(db_obj.exclusive_worker_ids)
+            await TaskRestrictionService.replace(db, [{
+                "id": db_obj.id,
+                "project_id": db_obj.project_id,
+                "exclusive_worker_ids": db_obj.exclusive_worker_ids,
+                "excluded_worker_ids": db_obj.excluded_worker_ids
+            }])
+        
         await db.commit()
         await db.refresh(db_obj)
+        if restricted:
+            dispatch_queues.restrict(db_obj)
         return db_obj
     
     @staticmethod
@@ -151,48 +367,59 @@ class TaskService:
         worker_id: UUID,
         exclude_task_ids: Optional[List[UUID]] = None
     ) -> Optional[Task]:
-        """Get next available task for a worker"""
-        # Build query to find available tasks
-        query = select(Task).where(
-            and_(
-                Task.project_id == project_id,
-                Task.status == TaskStatus.PENDING,
-                Task.completed_responses < Task.required_responses
-            )
-        )
-        
-        # Exclude specific tasks
-        if exclude_task_ids:
-            query = query.where(~Task.id.in_(exclude_task_ids))
+        """
+        Next task checkout would lease to a worker, without leasing it
         
-        # Exclude tasks the worker has already worked on
-        subquery = select(Response.task_id).where(Response.worker_id == worker_id)
-        query = query.where(~Task.id.in_(subquery))
+        Uses the checkout predicate (AssignmentService.candidate_query); call
+        AssignmentService.checkout to actually take the task.
+        """
+        # Imported here: the assignment service builds on this module
+        from app.services.assignment import AssignmentService
         
-        # Order by priority and creation date
-        query = query.order_by(Task.priority.desc(), Task.created_at)
-        
-        result = await db.execute(query.limit(1))
-        return result.scalar_one_or_none()
+        query = AssignmentService.candidate_query(project_id, worker_id, lock=False)
+        if exclude_task_ids:
+            query = query.where(Task.id.notin_([str(task_id) for task_id in exclude_task_ids]))
+        task_id = (await db.execute(query.limit(1))).scalar_one_or_none()
+        return await db.get(Task, task_id) if task_id is not None else None
     
     @staticmethod
     async def update_completion_status(
         db: AsyncSession,
-        task: Task
+        task: Task,
+        project: Optional[Project] = None
     ) -> Task:
-        """Update task status based on responses"""
-        if task.completed_responses >= task.required_responses:
-            task.status = TaskStatus.COMPLETED
-            
-            # Update project completed count
+        """
+        Update task status from its responses and live consensus score
+        
+        Below the project's consensus threshold the task gets a tiebreaker
+        slot or goes to review (see ConsensusService.decide).
+        """
+        if project is None:
+            project = await db.get(Project, task.project_id)
+        new_status, required = ConsensusService.decide(
+            ConsensusPolicy.for_project(project), task.status, task.is_gold_standard,
+            task.completed_responses, task.required_responses, task.consensus_score
+        )
+        changed = False
+        if (new_status, required) != (task.status, task.required_responses):
+            # The status guard applies the decision once however many callers race here
             result = await db.execute(
-                select(Project).where(Project.id == task.project_id)
+                update(Task)
+                .where(Task.id == task.id, ready_status_clause())
+                .values(status=new_status, required_responses=required)
+                .execution_options(synchronize_session=False)
             )
-            project = result.scalar_one()
-            project.completed_tasks += 1
+            changed = bool(result.rowcount)
+            if changed and new_status == TaskStatus.COMPLETED:
+                await ProjectCounterService.increment(db, task.project_id, completed_tasks=1)
         
         await db.commit()
         await db.refresh(task)
+        if changed:
+            if task.status in READY_TASK_STATUSES:
+                dispatch_queues.release([task.id])
+            else:
+                dispatch_queues.remove([task.id])
         return task
     
     @staticmethod
@@ -240,14 +467,12 @@ class TaskService:
     
     @staticmethod
     async def delete(db: AsyncSession, task: Task) -> None:
-        # Update project task count
-        result = await db.execute(
-            select(Project).where(Project.id == task.project_id)
+        await ProjectCounterService.increment(
+            db,
+            task.project_id,
+            total_tasks=-1,
+            completed_tasks=-int(task.status == TaskStatus.COMPLETED),
+            expired_tasks=-int(task.status == TaskStatus.EXPIRED)
         )
-        project = result.scalar_one()
-        project.total_tasks -= 1
-        if task.status == TaskStatus.COMPLETED:
-            project.completed_tasks -= 1
-        
         await db.delete(task)
         await db.commit()
\ No newline at end of file
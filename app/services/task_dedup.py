@@ -0,0 +1,211 @@
+"""
+Content-hash deduplication of task payloads
+Every task stores a SHA-256 of its canonical JSON data, unique per project.
+Ingestion resolves duplicates with one hash lookup per batch; the offline
+scan backfills hashes for existing tasks and reports or removes duplicates.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+import hashlib
+import json
+
+from sqlalchemy import select, update, delete, exists, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.task import Task, TaskStatus
+from app.models.project import Project
+from app.models.response import Response
+from app.models.worker import WorkerAssignment
+from app.schemas.task import TaskDedupReport, TaskDuplicateGroup
+from app.services.counters import ProjectCounterService
+from app.services.dispatch import dispatch_queues
+
+
+def content_hash(data: Optional[Dict[str, Any]]) -> str:
+    """SHA-256 of the task data serialized with sorted keys and no whitespace"""
+    canonical = json.dumps(
+        data or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class TaskDedupService:
+    
+    @staticmethod
+    async def existing_hashes(
+        db: AsyncSession,
+        project_id: UUID,
+        hashes: List[str]
+    ) -> Dict[str, str]:
+        """Map content hashes already stored in the project to their task ids"""
+        if not hashes:
+            return {}
+        result = await db.execute(
+            select(Task.content_hash, Task.id).where(
+                Task.project_id == project_id,
+                Task.content_hash.in_(set(hashes))
+            )
+        )
+        return dict(result.all())
+    
+    @staticmethod
+    async def partition(
+        db: AsyncSession,
+        rows: List[Dict[str, Any]],
+        project_id: UUID,
+        match_external_id: bool = False
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], str]]]:
+        """
+        Hash task rows and split off those whose content already exists
+        
+        Runs one lookup per TASK_INSERT_BATCH_SIZE rows. Repeats within
+        ``rows`` are linked to their first occurrence. With
+        ``match_external_id`` (upserts) a row whose content belongs to the
+        stored task with its own external_id is kept, so the upsert can
+        update or skip that task instead of reporting it as a duplicate.
+        
+        Returns:
+            (new rows, [(duplicate row, id of the task it duplicates)])
+        """
+        unique = []
+        duplicates = []
+        seen: Dict[str, str] = {}
+        owners: Dict[str, Optional[str]] = {}
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            for row in chunk:
+                row["content_hash"] = content_hash(row.get("data"))
+            
+            hashes = {row["content_hash"] for row in chunk} - seen.keys()
+            if hashes:
+                result = await db.execute(
+                    select(Task.content_hash, Task.id, Task.external_id).where(
+                        Task.project_id == project_id,
+                        Task.content_hash.in_(hashes)
+                    )
+                )
+                for digest, task_id, external_id in result.all():
+                    seen[digest] = task_id
+                    owners[digest] = external_id
+            for row in chunk:
+                digest = row["content_hash"]
+                task_id = seen.get(digest)
+                external_id = row.get("external_id")
+                if (
+                    match_external_id
+                    and external_id is not None
+                    and owners.get(digest) == external_id
+                ):
+                    # Same task resubmitted: the upsert decides, once per batch
+                    owners[digest] = None
+                    unique.append(row)
+                elif task_id is None:
+                    seen[digest] = row["id"]
+                    unique.append(row)
+                else:
+                    duplicates.append((row, task_id))
+        
+        return unique, duplicates
+    
+    @staticmethod
+    async def scan_project(
+        db: AsyncSession,
+        project_id: UUID,
+        apply: bool = False
+    ) -> TaskDedupReport:
+        """
+        Find tasks of a project with identical data
+        
+        For each hash the task already holding it is kept, otherwise the
+        oldest. With ``apply`` the kept tasks get their hash written, the
+        other copies have theirs cleared, and pending copies that have no
+        responses or assignments are deleted.
+        """
+        report = TaskDedupReport(project_id=str(project_id), applied=apply)
+        groups: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        
+        stream = await db.stream(
+            select(Task.id, Task.data, Task.content_hash)
+            .where(Task.project_id == project_id)
+            .order_by(Task.created_at, Task.id)
+            .execution_options(yield_per=settings.TASK_INSERT_BATCH_SIZE)
+        )
+        async for task_id, data, stored_hash in stream:
+            report.tasks_scanned += 1
+            groups.setdefault(content_hash(data), []).append((task_id, stored_hash))
+        
+        set_hash = []
+        clear_hash = []
+        copies = []
+        for digest, members in groups.items():
+            keep = next(
+                (task_id for task_id, stored in members if stored == digest),
+                members[0][0]
+            )
+            for task_id, stored in members:
+                if task_id == keep:
+                    if stored != digest:
+                        set_hash.append({"b_id": task_id, "b_hash": digest})
+                else:
+                    copies.append(task_id)
+                    if stored is not None:
+                        clear_hash.append({"b_id": task_id, "b_hash": None})
+            
+            if len(members) > 1:
+                report.duplicate_groups += 1
+                report.duplicate_tasks += len(members) - 1
+                if len(report.groups) < settings.TASK_DEDUP_REPORT_GROUPS:
+                    report.groups.append(TaskDuplicateGroup(
+                        task_id=keep,
+                        duplicate_ids=[task_id for task_id, _ in members if task_id != keep]
+                    ))
+        
+        report.hashes_updated = len(set_hash) + len(clear_hash)
+        if not apply:
+            return report
+        
+        # Clear first so no kept task collides with a stale hash on the unique index
+        stmt = (
+            update(Task.__table__)
+            .where(Task.__table__.c.id == bindparam("b_id"))
+            .values(content_hash=bindparam("b_hash"))
+        )
+        for params in (clear_hash, set_hash):
+            if params:
+                await db.execute(stmt, params)
+        
+        removed: List[str] = []
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        for start in range(0, len(copies), batch_size):
+            result = await db.execute(
+                delete(Task)
+                .where(
+                    Task.id.in_(copies[start:start + batch_size]),
+                    Task.status == TaskStatus.PENDING,
+                    Task.completed_responses == 0,
+                    ~exists().where(Response.task_id == Task.id),
+                    ~exists().where(WorkerAssignment.task_id == Task.id)
+                )
+                .returning(Task.id)
+                .execution_options(synchronize_session=False)
+            )
+            removed.extend(result.scalars().all())
+        report.removed_tasks = len(removed)
+        
+        await ProjectCounterService.increment(db, project_id, total_tasks=-report.removed_tasks)
+        await db.commit()
+        # Deleted copies must not be dispatched until the next queue rebuild
+        dispatch_queues.remove(removed)
+        return report
+    
+    @staticmethod
+    async def scan_all(db: AsyncSession, apply: bool = False) -> List[TaskDedupReport]:
+        """Run the dedup scan over every project"""
+        result = await db.execute(select(Project.id).order_by(Project.created_at))
+        return [
+            await TaskDedupService.scan_project(db, project_id, apply=apply)
+            for project_id in result.scalars().all()
+        ]
\ No newline at end of file
@@ -0,0 +1,534 @@
+"""
+Streaming task import
+Parses uploaded task files incrementally and writes them in fixed-size batches
+"""
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID, uuid4
+from itertools import islice
+from dataclasses import dataclass, field
+import csv
+import io
+import json
+import shutil
+import tempfile
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.compression import (
+    DECOMPRESSION_ERRORS, open_decompressed, sniff_compression, strip_compression_suffix
+)
+from app.core.config import settings
+from app.models.task import TaskPriority, TaskStatus, priority_rank
+from app.schemas.task import (
+    TaskConflictMode, TaskCreate, TaskImportBatch, TaskImportDuplicate, TaskImportError,
+    TaskImportMapping, TaskImportOptions, TaskImportResult
+)
+from app.services.task import TaskService
+from app.services.gold_standard import GoldStandardSampler
+from app.services.task_dedup import TaskDedupService
+from app.services.task_validation import TaskValidator, merge_issues
+
+BatchCallback = Callable[[AsyncSession, TaskImportBatch], Awaitable[None]]
+
+
+@dataclass
+class ParsedBatch:
+    """A slice of the source file converted to task rows"""
+    first_row: int
+    last_row: int
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    row_numbers: List[int] = field(default_factory=list)  # Source row of each entry in rows
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+
+def iter_csv_records(fileobj: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield CSV rows one at a time from a binary file object"""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        for row in csv.DictReader(text):
+            yield row
+    finally:
+        # Leave the underlying upload file open for the caller
+        text.detach()
+
+
+def iter_ndjson_records(fileobj: BinaryIO) -> Iterator[Any]:
+    """Yield non-empty lines, left for the row parser to decode"""
+    for line in fileobj:
+        if line.strip():
+            yield line
+
+
+def _decode_line(record: Any) -> Dict[str, Any]:
+    if isinstance(record, (bytes, str)):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("Each line must be a JSON object")
+    return record
+
+
+def _gold_answers(value: Any) -> Optional[Dict[str, Any]]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    if not isinstance(value, dict):
+        raise ValueError("gold_standard_answers: Input should be a valid dictionary")
+    return value or None
+
+
+def mapped_record_to_task(record: Dict[str, Any], mapping: TaskImportMapping) -> TaskCreate:
+    """Convert a flat or nested record to a task using a column mapping"""
+    if mapping.data:
+        data = record.get(mapping.data)
+        if isinstance(data, str):
+            data = json.loads(data)
+    elif mapping.data_columns:
+        data = {k: record.get(k) for k in mapping.data_columns}
+    else:
+        mapped = mapping.mapped_columns()
+        data = {k: v for k, v in record.items() if k not in mapped}
+    
+    fields = {"data": data}
+    external_id = record.get(mapping.external_id) if mapping.external_id else None
+    if external_id not in (None, ""):
+        fields["external_id"] = str(external_id)
+    batch_id = record.get(mapping.batch_id) if mapping.batch_id else None
+    if batch_id not in (None, ""):
+        fields["batch_id"] = str(batch_id)
+    priority = record.get(mapping.priority) if mapping.priority else None
+    if priority not in (None, ""):
+        fields["priority"] = str(priority).lower()
+    if mapping.gold_answers:
+        fields["gold_standard_answers"] = _gold_answers(record.get(mapping.gold_answers))
+    
+    return TaskCreate(**fields)
+
+
+def json_line_to_task(line: bytes) -> TaskCreate:
+    """Convert a serialized TaskCreate payload line back to a task"""
+    return TaskCreate(**json.loads(line))
+
+
+def _format_error(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+            for err in exc.errors()
+        )
+    return str(exc)
+
+
+def record_batches(
+    records: Iterator[Any],
+    row_parser: Callable[[Any], TaskCreate],
+    project_id: UUID,
+    batch_size: int,
+    start_row: int = 0
+) -> Iterator[ParsedBatch]:
+    """Group records into batches and parse them row by row"""
+    numbered = islice(enumerate(records, start=1), start_row, None)
+    while True:
+        batch = list(islice(numbered, batch_size))
+        if not batch:
+            return
+        
+        parsed = ParsedBatch(first_row=batch[0][0], last_row=batch[-1][0])
+        for row_number, record in batch:
+            try:
+                task_in = row_parser(record)
+            except (ValidationError, ValueError, TypeError) as exc:
+                parsed.errors.append((row_number, _format_error(exc)))
+                continue
+            parsed.rows.append(TaskService.build_row(task_in, project_id))
+            parsed.row_numbers.append(row_number)
+        yield parsed
+
+
+def _open_arrow_batches(fileobj: BinaryIO, file_format: str, batch_size: int) -> Iterator[Any]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("pyarrow is required for Parquet and Arrow imports")
+    
+    if sniff_compression(fileobj):
+        # Both readers need random access; inflate to a temporary file, not to memory
+        spilled = tempfile.TemporaryFile()
+        shutil.copyfileobj(open_decompressed(fileobj), spilled, length=1024 * 1024)
+        spilled.seek(0)
+        try:
+            yield from _open_arrow_batches(spilled, file_format, batch_size)
+        finally:
+            spilled.close()
+        return
+    
+    if file_format == "parquet":
+        yield from pq.ParquetFile(fileobj).iter_batches(batch_size=batch_size)
+        return
+    
+    # Arrow IPC: random-access file format, falling back to the streaming format
+    try:
+        reader = pa.ipc.open_file(fileobj)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        fileobj.seek(0)
+        batches = pa.ipc.open_stream(fileobj)
+    for record_batch in batches:
+        # IPC batches keep the writer's size; re-slice to ours
+        for offset in range(0, record_batch.num_rows, batch_size):
+            yield record_batch.slice(offset, batch_size)
+
+
+def _arrow_column(record_batch: Any, name: Optional[str]) -> List[Any]:
+    import pyarrow as pa
+    
+    if not name or name not in record_batch.schema.names:
+        return [None] * record_batch.num_rows
+    
+    column = record_batch.column(record_batch.schema.get_field_index(name))
+    # Cast scalar types JSON cannot hold to strings for the whole column at once
+    if pa.types.is_temporal(column.type) or pa.types.is_decimal(column.type):
+        column = column.cast(pa.string())
+    elif pa.types.is_binary(column.type) or pa.types.is_large_binary(column.type):
+        column = column.cast(pa.string())
+    return column.to_pylist()
+
+
+def arrow_batch_to_rows(
+    record_batch: Any,
+    mapping: TaskImportMapping,
+    project_id: UUID,
+    first_row: int
+) -> ParsedBatch:
+    """
+    Convert an Arrow record batch to task rows column by column
+    
+    Columns are extracted once per batch and rows are assembled directly as
+    insert parameters, skipping per-row Pydantic validation; only priority
+    and the data shape need checking since Arrow columns are already typed.
+    """
+    parsed = ParsedBatch(first_row=first_row, last_row=first_row + record_batch.num_rows - 1)
+    
+    external_ids = _arrow_column(record_batch, mapping.external_id)
+    batch_ids = _arrow_column(record_batch, mapping.batch_id)
+    priorities = _arrow_column(record_batch, mapping.priority)
+    gold_answers = _arrow_column(record_batch, mapping.gold_answers)
+    if mapping.data:
+        data_values = _arrow_column(record_batch, mapping.data)
+    else:
+        mapped = mapping.mapped_columns()
+        names = mapping.data_columns or [n for n in record_batch.schema.names if n not in mapped]
+        columns = [_arrow_column(record_batch, n) for n in names]
+        data_values = (
+            [dict(zip(names, values)) for values in zip(*columns)]
+            if names
+            else [{} for _ in range(record_batch.num_rows)]
+        )
+    
+    valid_priorities = {p.value: p for p in TaskPriority}
+    defaults = TaskCreate(data={}).model_dump()
+    
+    for i, data in enumerate(data_values):
+        row_number = first_row + i
+        if isinstance(data, str):
+            try:
+                data = json.loads(data)
+            except ValueError as exc:
+                parsed.errors.append((row_number, f"data: {exc}"))
+                continue
+        if not isinstance(data, dict):
+            parsed.errors.append((row_number, "data: Input should be a valid dictionary"))
+            continue
+        
+        priority = priorities[i]
+        if priority is not None:
+            priority = valid_priorities.get(str(priority).lower())
+            if priority is None:
+                parsed.errors.append((row_number, f"priority: invalid value {priorities[i]!r}"))
+                continue
+        
+        try:
+            answers = _gold_answers(gold_answers[i])
+        except ValueError as exc:
+            parsed.errors.append((row_number, str(exc)))
+            continue
+        
+        external_id = external_ids[i]
+        batch_id = batch_ids[i]
+        parsed.rows.append({
+            **defaults,
+            "id": str(uuid4()),
+            "project_id": project_id,
+            "status": TaskStatus.PENDING,
+            "data": data,
+            "external_id": str(external_id) if external_id not in (None, "") else None,
+            "batch_id": str(batch_id) if batch_id not in (None, "") else None,
+            "priority": priority or defaults["priority"],
+            "priority_rank": priority_rank(priority or defaults["priority"]),
+            "gold_standard_answers": answers
+        })
+        parsed.row_numbers.append(row_number)
+    
+    return parsed
+
+
+def arrow_batches(
+    fileobj: BinaryIO,
+    file_format: str,
+    mapping: TaskImportMapping,
+    project_id: UUID,
+    batch_size: int,
+    start_row: int = 0
+) -> Iterator[ParsedBatch]:
+    """Read Parquet or Arrow IPC data record batch by record batch"""
+    position = 0
+    for record_batch in _open_arrow_batches(fileobj, file_format, batch_size):
+        num_rows = record_batch.num_rows
+        if position + num_rows <= start_row:
+            position += num_rows
+            continue
+        if position < start_row:
+            record_batch = record_batch.slice(start_row - position)
+            position = start_row
+        
+        yield arrow_batch_to_rows(record_batch, mapping, project_id, first_row=position + 1)
+        position += record_batch.num_rows
+
+
+# Supported upload formats; "tasks" is the internal NDJSON form of TaskBulkCreate
+IMPORT_FORMATS = ("csv", "ndjson", "parquet", "arrow", "tasks")
+
+FILE_EXTENSIONS = {
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".arrows": "arrow",
+    ".feather": "arrow",
+}
+
+
+def detect_format(file_name: Optional[str], file_format: Optional[str] = None) -> str:
+    """Resolve an upload's format from an explicit value or its file extension"""
+    if file_format:
+        detected = file_format.lower()
+    else:
+        name = (strip_compression_suffix(file_name) or "").lower()
+        detected = next(
+            (fmt for ext, fmt in FILE_EXTENSIONS.items() if name.endswith(ext)),
+            None
+        )
+    
+    if detected not in FILE_EXTENSIONS.values():
+        raise ValueError("Unsupported or unknown file format")
+    return detected
+
+
+def parse_batches(
+    fileobj: BinaryIO,
+    file_format: str,
+    project_id: UUID,
+    options: TaskImportOptions,
+    batch_size: int,
+    start_row: int = 0
+) -> Iterator[ParsedBatch]:
+    """Build the parsed-batch iterator for a stored or uploaded file"""
+    mapping = options.mapping
+    
+    if file_format in ("parquet", "arrow"):
+        return arrow_batches(fileobj, file_format, mapping, project_id, batch_size, start_row)
+    
+    # Row formats read sequentially, so compressed files are inflated as they are parsed
+    fileobj = open_decompressed(fileobj)
+    if file_format == "csv":
+        return record_batches(
+            iter_csv_records(fileobj),
+            lambda record: mapped_record_to_task(record, mapping),
+            project_id, batch_size, start_row
+        )
+    if file_format == "ndjson":
+        return record_batches(
+            iter_ndjson_records(fileobj),
+            lambda record: mapped_record_to_task(_decode_line(record), mapping),
+            project_id, batch_size, start_row
+        )
+    if file_format == "tasks":
+        return record_batches(
+            iter_ndjson_records(fileobj), json_line_to_task, project_id, batch_size, start_row
+        )
+    raise ValueError(f"Unsupported import format: {file_format}")
+
+
+class TaskImportService:
+    
+    @staticmethod
+    async def import_file(
+        db: AsyncSession,
+        fileobj: BinaryIO,
+        file_format: str,
+        project_id: UUID,
+        options: Optional[TaskImportOptions] = None,
+        batch_size: Optional[int] = None,
+        start_row: int = 0,
+        on_batch: Optional[BatchCallback] = None,
+        result: Optional[TaskImportResult] = None
+    ) -> TaskImportResult:
+        """
+        Parse a task file and insert it in fixed-size batches, committing after each batch
+        
+        Batches are read and parsed in a worker thread one at a time, so only a
+        single batch is ever held in memory.
+        
+        Args:
+            start_row: Number of leading records to skip (already imported)
+            on_batch: Called before each commit so callers can record progress
+                in the same transaction as the batch
+            result: Result to accumulate into, readable from on_batch
+        """
+        options = options or TaskImportOptions()
+        batch_size = batch_size or settings.TASK_IMPORT_BATCH_SIZE
+        result = result or TaskImportResult()
+        batches = parse_batches(fileobj, file_format, project_id, options, batch_size, start_row)
+        validator = await TaskValidator.for_project(db, project_id)
+        sampler = await GoldStandardSampler.for_project(
+            db, project_id, options.gold_standard_percentage
+        )
+        
+        while True:
+            try:
+                parsed = await run_in_threadpool(next, batches, None)
+            except DECOMPRESSION_ERRORS as exc:
+                raise ValueError(f"Could not decompress upload: {exc}")
+            if parsed is None:
+                break
+            await TaskImportService._write_batch(
+                db, parsed, project_id, options, validator, sampler, result, on_batch
+            )
+        
+        if options.dry_run:
+            result.message = (
+                f"Dry run: {result.total_rows - result.failed_count} of "
+                f"{result.total_rows} rows valid"
+            )
+            if result.duplicate_count:
+                result.message += f", {result.duplicate_count} duplicates"
+            return result
+        
+        result.message = f"Successfully created {result.task_count} tasks"
+        if result.updated_count or result.skipped_count:
+            result.message += (
+                f", {result.updated_count} updated, {result.skipped_count} skipped"
+            )
+        if result.duplicate_count:
+            result.message += f", {result.duplicate_count} duplicates linked"
+        if result.gold_count:
+            result.message += f", {result.gold_count} marked gold standard"
+        if result.failed_count:
+            result.message += f", {result.failed_count} rows failed"
+        return result
+    
+    @staticmethod
+    async def _write_batch(
+        db: AsyncSession,
+        parsed: ParsedBatch,
+        project_id: UUID,
+        options: TaskImportOptions,
+        validator: TaskValidator,
+        sampler: Optional[GoldStandardSampler],
+        result: TaskImportResult,
+        on_batch: Optional[BatchCallback]
+    ) -> None:
+        for row_number, message in parsed.errors:
+            TaskImportService._add_error(result, row_number, message)
+        
+        # Column-wise checks against the project's questions and data schema
+        rows = parsed.rows
+        valid, issues = validator.validate([row["data"] for row in rows], parsed.row_numbers)
+        if issues:
+            merge_issues(result.validation, issues)
+            rows = [row for row, ok in zip(rows, valid) if ok]
+        
+        stats = TaskImportBatch(
+            batch=len(result.batches) + 1,
+            rows=parsed.last_row - parsed.first_row + 1,
+            created=len(rows),
+            failed=len(parsed.errors) + len(parsed.rows) - len(rows),
+            last_row=parsed.last_row
+        )
+        try:
+            rows, duplicates = await TaskDedupService.partition(
+                db, rows, project_id,
+                match_external_id=options.on_conflict != TaskConflictMode.ERROR
+            )
+            stats.created = len(rows)
+            stats.duplicates = len(duplicates)
+            if sampler is not None:
+                # Flags and answers go out with the insert itself
+                stats.gold = sampler.sample(rows)
+            
+            if options.dry_run:
+                stats.created = 0
+            elif rows and options.on_conflict == TaskConflictMode.ERROR:
+                await TaskService.bulk_insert(db, rows, returning=False)
+                await TaskService.increment_project_task_count(db, project_id, len(rows))
+            elif rows:
+                stats.created, stats.updated, stats.skipped = await TaskService.bulk_upsert(
+                    db, rows, project_id, options.on_conflict
+                )
+            await TaskImportService._commit_batch(db, result, stats, on_batch)
+            for row, task_id in duplicates:
+                TaskImportService._add_duplicate(result, row.get("external_id"), task_id)
+        except SQLAlchemyError as exc:
+            # The whole batch is rolled back; report it against its first row
+            await db.rollback()
+            TaskImportService._add_error(
+                result,
+                parsed.first_row,
+                f"Batch {stats.batch} rejected: {exc.__class__.__name__}: "
+                f"{getattr(exc, 'orig', exc)}"
+            )
+            stats.failed = stats.rows
+            stats.created = stats.updated = stats.skipped = stats.duplicates = stats.gold = 0
+            await TaskImportService._commit_batch(db, result, stats, on_batch)
+    
+    @staticmethod
+    async def _commit_batch(
+        db: AsyncSession,
+        result: TaskImportResult,
+        stats: TaskImportBatch,
+        on_batch: Optional[BatchCallback]
+    ) -> None:
+        if on_batch:
+            await on_batch(db, stats)
+        await db.commit()
+        
+        result.total_rows += stats.rows
+        result.task_count += stats.created
+        result.failed_count += stats.failed
+        result.updated_count += stats.updated
+        result.skipped_count += stats.skipped
+        result.duplicate_count += stats.duplicates
+        result.gold_count += stats.gold
+        result.batches.append(stats)
+    
+    @staticmethod
+    def _add_error(result: TaskImportResult, row: int, message: str) -> None:
+        # Keep the report bounded; failed_count still reflects every failure
+        if len(result.errors) < settings.TASK_IMPORT_MAX_ERRORS:
+            result.errors.append(TaskImportError(row=row, message=message))
+    
+    @staticmethod
+    def _add_duplicate(
+        result: TaskImportResult,
+        external_id: Optional[str],
+        task_id: str
+    ) -> None:
+        if len(result.duplicates) < settings.TASK_IMPORT_MAX_ERRORS:
+            result.duplicates.append(
+                TaskImportDuplicate(external_id=external_id, task_id=task_id)
+            )
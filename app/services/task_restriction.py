@@ -0,0 +1,136 @@
+"""
+Indexed task-worker restrictions
+Task.exclusive_worker_ids and Task.excluded_worker_ids stay the API-facing
+source, but checkout cannot filter JSON lists efficiently. Every listed
+worker is mirrored as a row of task_worker_restrictions, keyed by
+(task_id, worker_id, restriction_type), so checking a task for a worker is a
+primary key probe. Task.is_exclusive lets unrestricted tasks skip the
+exclusive probe altogether.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, insert, update, delete, exists, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.task import Task, TaskWorkerRestriction, RestrictionType
+
+
+def restriction_rows(
+    task_id: str,
+    project_id: UUID,
+    exclusive_worker_ids: Optional[List[str]],
+    excluded_worker_ids: Optional[List[str]]
+) -> List[Dict[str, Any]]:
+    rows = []
+    for restriction_type, worker_ids in (
+        (RestrictionType.EXCLUSIVE, exclusive_worker_ids),
+        (RestrictionType.EXCLUDED, excluded_worker_ids)
+    ):
+        for worker_id in dict.fromkeys(worker_ids or []):
+            rows.append({
+                "task_id": task_id,
+                "worker_id": str(worker_id),
+                "restriction_type": restriction_type,
+                "project_id": project_id
+            })
+    return rows
+
+
+class TaskRestrictionService:
+    
+    @staticmethod
+    def eligible(worker_id: UUID) -> list:
+        """Conditions limiting a Task query to tasks the worker may take"""
+        restriction = TaskWorkerRestriction
+        return [
+            or_(
+                Task.is_exclusive.isnot(True),
+                exists().where(
+                    restriction.task_id == Task.id,
+                    restriction.worker_id == worker_id,
+                    restriction.restriction_type == RestrictionType.EXCLUSIVE
+                )
+            ),
+            ~exists().where(
+                restriction.task_id == Task.id,
+                restriction.worker_id == worker_id,
+                restriction.restriction_type == RestrictionType.EXCLUDED
+            )
+        ]
+    
+    @staticmethod
+    async def insert(db: AsyncSession, rows: Iterable[Dict[str, Any]]) -> None:
+        """Index the worker lists of newly inserted task rows, without committing"""
+        restrictions = []
+        for row in rows:
+            restrictions.extend(restriction_rows(
+                row["id"],
+                row["project_id"],
+                row.get("exclusive_worker_ids"),
+                row.get("excluded_worker_ids")
+            ))
+        
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        for start in range(0, len(restrictions), batch_size):
+            await db.execute(
+                insert(TaskWorkerRestriction), restrictions[start:start + batch_size]
+            )
+    
+    @staticmethod
+    async def replace(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+        """Re-index existing tasks whose worker lists may have changed"""
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        for start in range(0, len(rows), batch_size):
+            task_ids = [row["id"] for row in rows[start:start + batch_size]]
+            await db.execute(
+                delete(TaskWorkerRestriction).where(TaskWorkerRestriction.task_id.in_(task_ids))
+            )
+        await TaskRestrictionService.insert(db, rows)
+    
+    @staticmethod
+    async def backfill(db: AsyncSession, project_id: Optional[UUID] = None) -> int:
+        """
+        Rebuild the index and Task.is_exclusive from the JSON lists
+        
+        Returns:
+            Number of tasks with restrictions
+        """
+        # JSON columns may hold a JSON null, so empty lists are filtered here
+        query = select(
+            Task.id, Task.project_id, Task.exclusive_worker_ids, Task.excluded_worker_ids
+        ).execution_options(yield_per=settings.TASK_INSERT_BATCH_SIZE)
+        delete_stmt = delete(TaskWorkerRestriction)
+        reset_stmt = update(Task).values(is_exclusive=False)
+        if project_id is not None:
+            query = query.where(Task.project_id == project_id)
+            delete_stmt = delete_stmt.where(TaskWorkerRestriction.project_id == project_id)
+            reset_stmt = reset_stmt.where(Task.project_id == project_id)
+        
+        rows = []
+        async for task_id, task_project_id, exclusive, excluded in await db.stream(query):
+            if exclusive or excluded:
+                rows.append({
+                    "id": task_id,
+                    "project_id": task_project_id,
+                    "exclusive_worker_ids": exclusive,
+                    "excluded_worker_ids": excluded
+                })
+        
+        await db.execute(delete_stmt)
+        await db.execute(reset_stmt.execution_options(synchronize_session=False))
+        await TaskRestrictionService.insert(db, rows)
+        
+        exclusive_ids = [row["id"] for row in rows if row["exclusive_worker_ids"]]
+        batch_size = settings.TASK_INSERT_BATCH_SIZE
+        for start in range(0, len(exclusive_ids), batch_size):
+            await db.execute(
+                update(Task)
+                .where(Task.id.in_(exclusive_ids[start:start + batch_size]))
+                .values(is_exclusive=True)
+                .execution_options(synchronize_session=False)
+            )
+        
+        await db.commit()
+        return len(rows)
\ No newline at end of file
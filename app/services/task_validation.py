@@ -0,0 +1,216 @@
+"""
+Pre-insert validation of Task.data
+The validator is compiled once per project from the fields its instructions and
+questions reference as {{field}} (or name in a question's data_field setting)
+and from the project's optional data_schema. Batches are checked one field at
+a time over the whole column, and failures are reported per field and rule
+rather than per row.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+import re
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.project import Project
+from app.models.question import Question
+from app.schemas.project import DataFieldSchema
+from app.schemas.task import TaskValidationIssue
+
+PLACEHOLDER_PATTERN = re.compile(r"{{\s*([A-Za-z_][\w-]*)")
+QUESTION_DATA_SETTINGS = ("data_field", "source_field")
+MAX_ISSUE_ROWS = 20
+
+_MISSING = object()
+
+_TYPE_CHECKS = {
+    "string": lambda v: isinstance(v, str),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+}
+
+
+def _is_blank(value: Any) -> bool:
+    return (
+        value is _MISSING
+        or value is None
+        or (isinstance(value, str) and not value.strip())
+    )
+
+
+def referenced_fields(text: Optional[str]) -> List[str]:
+    """Top-level data fields referenced as {{field}} or {{field.path}}"""
+    return PLACEHOLDER_PATTERN.findall(text or "")
+
+
+@dataclass
+class FieldRule:
+    name: str
+    spec: DataFieldSchema
+    sources: List[str] = field(default_factory=list)  # What depends on the field
+
+
+class TaskValidator:
+    """Column-wise validator for batches of task data"""
+    
+    def __init__(self, rules: Dict[str, FieldRule]) -> None:
+        self.rules = rules
+        self.patterns = {
+            name: re.compile(rule.spec.pattern)
+            for name, rule in rules.items()
+            if rule.spec.pattern
+        }
+    
+    @classmethod
+    def build(
+        cls,
+        instructions: Optional[str],
+        questions: Sequence[Question],
+        data_schema: Optional[Dict[str, Any]] = None
+    ) -> "TaskValidator":
+        rules: Dict[str, FieldRule] = {
+            name: FieldRule(name, DataFieldSchema.model_validate(spec), ["data_schema"])
+            for name, spec in (data_schema or {}).items()
+        }
+        
+        def require(name: str, source: str) -> None:
+            rule = rules.setdefault(name, FieldRule(name, DataFieldSchema()))
+            rule.spec.required = True
+            if source not in rule.sources:
+                rule.sources.append(source)
+        
+        for name in referenced_fields(instructions):
+            require(name, "instructions")
+        
+        for question in questions:
+            source = f"question {question.identifier}"
+            texts = (question.label, question.description, question.placeholder)
+            for name in (n for text in texts for n in referenced_fields(text)):
+                require(name, source)
+            for key in QUESTION_DATA_SETTINGS:
+                name = (question.settings or {}).get(key)
+                if isinstance(name, str) and name:
+                    require(name, source)
+        
+        return cls(rules)
+    
+    @classmethod
+    async def for_project(cls, db: AsyncSession, project_id: UUID) -> "TaskValidator":
+        project = await db.get(Project, project_id)
+        result = await db.execute(
+            select(Question).where(Question.project_id == project_id)
+        )
+        return cls.build(
+            project.instructions if project else None,
+            result.scalars().all(),
+            project.data_schema if project else None
+        )
+    
+    def validate(
+        self,
+        datas: Sequence[Any],
+        row_numbers: Optional[Sequence[int]] = None
+    ) -> Tuple[np.ndarray, List[TaskValidationIssue]]:
+        """
+        Check a batch of Task.data values
+        
+        Returns:
+            (boolean mask of valid rows, issues aggregated per field and rule)
+        """
+        n = len(datas)
+        valid = np.ones(n, dtype=bool)
+        issues: List[TaskValidationIssue] = []
+        if not n or not self.rules:
+            return valid, issues
+        
+        rows = np.asarray(row_numbers if row_numbers is not None else range(1, n + 1))
+        
+        def report(name: str, rule: str, failed: np.ndarray, message: str) -> None:
+            count = int(failed.sum())
+            if not count:
+                return
+            valid[failed] = False
+            issues.append(TaskValidationIssue(
+                field=name,
+                rule=rule,
+                message=message,
+                count=count,
+                rows=rows[np.flatnonzero(failed)[:MAX_ISSUE_ROWS]].tolist()
+            ))
+        
+        for name, rule in self.rules.items():
+            spec = rule.spec
+            column = [d.get(name, _MISSING) if isinstance(d, dict) else _MISSING for d in datas]
+            blank = np.fromiter(map(_is_blank, column), dtype=bool, count=n)
+            
+            if spec.required:
+                used_by = ", ".join(rule.sources) or "data_schema"
+                report(name, "required", blank, f"missing '{name}' required by {used_by}")
+            
+            present = ~blank
+            if not present.any():
+                continue
+            
+            if spec.type:
+                check = _TYPE_CHECKS[spec.type]
+                wrong = present & ~np.fromiter(map(check, column), dtype=bool, count=n)
+                report(name, "type", wrong, f"'{name}' must be of type {spec.type}")
+                present &= ~wrong
+            
+            if spec.min_length is not None or spec.max_length is not None:
+                lengths = np.fromiter(
+                    (len(v) if isinstance(v, (str, list)) else -1 for v in column),
+                    dtype=np.int64,
+                    count=n
+                )
+                sized = present & (lengths >= 0)
+                if spec.min_length is not None:
+                    report(
+                        name, "min_length", sized & (lengths < spec.min_length),
+                        f"'{name}' is shorter than {spec.min_length}"
+                    )
+                if spec.max_length is not None:
+                    report(
+                        name, "max_length", sized & (lengths > spec.max_length),
+                        f"'{name}' is longer than {spec.max_length}"
+                    )
+            
+            if spec.enum is not None:
+                allowed = spec.enum
+                outside = present & ~np.fromiter(
+                    (v in allowed for v in column), dtype=bool, count=n
+                )
+                report(name, "enum", outside, f"'{name}' must be one of {allowed}")
+            
+            pattern = self.patterns.get(name)
+            if pattern is not None:
+                mismatch = present & ~np.fromiter(
+                    (isinstance(v, str) and pattern.fullmatch(v) is not None for v in column),
+                    dtype=bool,
+                    count=n
+                )
+                report(name, "pattern", mismatch, f"'{name}' does not match {pattern.pattern}")
+        
+        return valid, issues
+
+
+def merge_issues(
+    into: List[TaskValidationIssue],
+    issues: List[TaskValidationIssue]
+) -> None:
+    """Fold one batch's issues into a running report, keeping it compact"""
+    existing = {(issue.field, issue.rule): issue for issue in into}
+    for issue in issues:
+        current = existing.get((issue.field, issue.rule))
+        if current is None:
+            into.append(issue)
+            existing[(issue.field, issue.rule)] = issue
+        else:
+            current.count += issue.count
+            current.rows.extend(issue.rows[:MAX_ISSUE_ROWS - len(current.rows)])
\ No newline at end of file
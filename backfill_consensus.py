@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Rebuild per-task consensus histograms from stored responses
+
+Usage:
+    python backfill_consensus.py [project_id ...]
+
+Creates the task_question_consensus table if missing, then recounts the
+answers of the given projects (default: all) and refreshes task and response
+consensus scores. Run once after upgrading, or after editing responses with
+bulk UPDATEs. Safe to re-run.
+"""
+
+import argparse
+import asyncio
+
+from app.db import base  # noqa: F401 - registers every model for the ORM queries
+from app.db.session import AsyncSessionLocal, engine
+from app.models.task import TaskQuestionConsensus
+from app.services.consensus import ConsensusService
+
+
+async def main(project_ids) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(TaskQuestionConsensus.__table__.create, checkfirst=True)
+    
+    async with AsyncSessionLocal() as db:
+        count = await ConsensusService.rebuild(db, project_ids or None)
+        print(f"{count} question histograms stored")
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("project_ids", nargs="*")
+    args = parser.parse_args()
+    asyncio.run(main(args.project_ids))
\ No newline at end of file
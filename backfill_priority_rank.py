@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Backfill the numeric task priority rank used for checkout ordering
+
+Usage:
+    python backfill_priority_rank.py
+
+Adds the tasks.priority_rank column if missing, fills it from tasks.priority
+and creates the idx_task_ready partial index. Safe to re-run.
+"""
+
+import asyncio
+
+from sqlalchemy import inspect, text
+
+from app.db.session import engine
+from app.models.task import Task, TaskPriority, TASK_PRIORITY_RANK
+
+
+def ensure_schema(conn) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("tasks")}
+    if "priority_rank" not in columns:
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN priority_rank INTEGER NOT NULL DEFAULT 2"))
+    
+    cases = " ".join(
+        f"WHEN '{priority.name}' THEN {TASK_PRIORITY_RANK[priority]}" for priority in TaskPriority
+    )
+    result = conn.execute(text(
+        f"UPDATE tasks SET priority_rank = CASE priority {cases} ELSE 2 END"
+    ))
+    print(f"{result.rowcount} tasks ranked")
+    
+    for index in Task.__table__.indexes:
+        if index.name == "idx_task_ready":
+            index.create(conn, checkfirst=True)
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(ensure_schema)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Backfill the indexed task-worker restrictions from the JSON worker lists
+
+Usage:
+    python backfill_task_restrictions.py [project_id ...]
+
+Adds the tasks.is_exclusive column and the task_worker_restrictions table if
+missing, then rebuilds both from Task.exclusive_worker_ids and
+Task.excluded_worker_ids. Safe to re-run.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import inspect, text
+
+from app.db.session import AsyncSessionLocal, engine
+from app.models.task import TaskWorkerRestriction
+from app.services.task_restriction import TaskRestrictionService
+
+
+def ensure_schema(conn) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("tasks")}
+    if "is_exclusive" not in columns:
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN is_exclusive BOOLEAN DEFAULT FALSE"))
+    TaskWorkerRestriction.__table__.create(conn, checkfirst=True)
+
+
+async def main(project_ids) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(ensure_schema)
+    
+    async with AsyncSessionLocal() as db:
+        for project_id in project_ids or [None]:
+            count = await TaskRestrictionService.backfill(db, project_id)
+            print(f"{project_id or 'all projects'}: {count} restricted tasks indexed")
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("project_ids", nargs="*")
+    args = parser.parse_args()
+    asyncio.run(main(args.project_ids))
\ No newline at end of file
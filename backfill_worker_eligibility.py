@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Rebuild precomputed worker eligibility for qualification-gated projects
+
+Usage:
+    python backfill_worker_eligibility.py [project_id ...]
+
+Creates the worker_project_eligibility table if missing, then re-matches the
+given projects (default: all) against every worker. Run after editing worker
+profiles or project requirements with bulk UPDATEs. Safe to re-run.
+"""
+
+import argparse
+import asyncio
+
+from app.db.session import AsyncSessionLocal, engine
+from app.models.worker import WorkerProjectEligibility
+from app.services.eligibility import EligibilityService
+
+
+async def main(project_ids) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(WorkerProjectEligibility.__table__.create, checkfirst=True)
+    
+    async with AsyncSessionLocal() as db:
+        count = await EligibilityService.rebuild(db, project_ids or None)
+        print(f"{count} eligible worker-project pairs stored")
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("project_ids", nargs="*")
+    args = parser.parse_args()
+    asyncio.run(main(args.project_ids))
\ No newline at end of file
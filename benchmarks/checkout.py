@@ -0,0 +1,327 @@
+"""
+Checkout load benchmark
+
+Simulates concurrent annotators against POST /projects/{id}/checkout through
+the ASGI app in-process, on a fresh schema per database and project size.
+Every annotator authenticates with a real JWT, checks out a task, completes
+it and asks for the next one. Completion marks the assignment completed and
+counts the response on the task, standing in for response submission.
+
+Usage:
+    python -m benchmarks.checkout --databases sqlite postgres \\
+        --sizes 10000 100000 1000000 5000000 --annotators 100 1000 5000
+    python -m benchmarks.checkout --compare benchmarks/results/previous.json
+
+Each result records checkout p50/p95/p99 latency, checkouts/sec, statements
+per checkout request (authentication included) and the duplicate-assignment
+rate: leases beyond a task's required_responses plus any task leased twice to
+the same worker, over all leases. Tasks are loaded once per size and reset
+between annotator counts.
+"""
+from typing import Any, Dict, List
+from collections import Counter
+from uuid import uuid4
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import (
+    Probe, compare_results, percentile_ms, reset_database, write_results
+)
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import select, insert, update, delete, func, or_
+
+from app.api.v1.api import api_router
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.core.time import utcnow
+from app.db.session import get_db
+from app.models.task import Task, TaskStatus
+from app.models.user import User
+from app.models.worker import Worker, WorkerAssignment, WorkerStatus, AssignmentStatus
+from app.schemas.task import TaskCreate
+from app.services.dispatch import dispatch_queues
+from app.services.task import TaskService
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000, 5_000_000)
+DEFAULT_ANNOTATORS = (100, 1_000, 5_000)
+
+# Statements issued by complete(), subtracted from the checkout statement count
+COMPLETION_STATEMENTS = 2
+
+
+def make_app(Session) -> FastAPI:
+    """The API routes on the benchmark database, without deployment middleware"""
+    app = FastAPI()
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+    
+    async def get_benchmark_db():
+        async with Session() as db:
+            yield db
+    
+    app.dependency_overrides[get_db] = get_benchmark_db
+    return app
+
+
+async def load_tasks(Session, project, size: int, chunk_size: int) -> None:
+    async with Session() as db:
+        for start in range(0, size, chunk_size):
+            await TaskService.create_many(
+                db,
+                tasks_in=[
+                    TaskCreate(data={"text": f"Checkout task {i}"})
+                    for i in range(start, min(start + chunk_size, size))
+                ],
+                project_id=project.id
+            )
+            db.expunge_all()
+
+
+async def add_annotators(Session, organization_id: str, count: int, chunk_size: int) -> List[str]:
+    """Create users with active worker profiles, returning an access token for each"""
+    user_ids = [str(uuid4()) for _ in range(count)]
+    async with Session() as db:
+        for start in range(0, count, chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            await db.execute(insert(User), [
+                {
+                    "id": user_id,
+                    "email": f"annotator-{user_id}@verita.ai",
+                    "username": f"annotator-{user_id}",
+                    "hashed_password": "-",
+                    "organization_id": organization_id,
+                    "is_active": True
+                }
+                for user_id in chunk
+            ])
+            await db.execute(insert(Worker), [
+                {
+                    "id": str(uuid4()),
+                    "user_id": user_id,
+                    "email": f"annotator-{user_id}@verita.ai",
+                    "status": WorkerStatus.ACTIVE
+                }
+                for user_id in chunk
+            ])
+        await db.commit()
+    return [create_access_token(user_id) for user_id in user_ids]
+
+
+async def reset_checkouts(Session, project) -> None:
+    """Return the project to its freshly loaded state between runs"""
+    async with Session() as db:
+        await db.execute(delete(WorkerAssignment))
+        await db.execute(
+            update(Task)
+            .where(
+                Task.project_id == project.id,
+                or_(Task.completed_responses > 0, Task.active_leases > 0)
+            )
+            .values(completed_responses=0, active_leases=0, status=TaskStatus.PENDING)
+        )
+        await db.commit()
+        dispatch_queues.queues.clear()
+        await dispatch_queues.rebuild(db, project.id)
+
+
+async def complete(Session, assignment_id: str, task_id: str) -> None:
+    async with Session() as db:
+        await db.execute(
+            update(WorkerAssignment)
+            .where(WorkerAssignment.id == assignment_id)
+            .values(status=AssignmentStatus.COMPLETED.value, completed_at=utcnow())
+        )
+        await db.execute(
+            update(Task)
+            .where(Task.id == task_id)
+            .values(
+                completed_responses=Task.completed_responses + 1,
+                active_leases=Task.active_leases - 1
+            )
+        )
+        await db.commit()
+
+
+async def annotator(
+    client: httpx.AsyncClient,
+    Session,
+    url: str,
+    token: str,
+    checkouts: int,
+    latencies: List[float],
+    stats: Counter
+) -> None:
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(checkouts):
+        started = time.perf_counter()
+        try:
+            response = await client.post(url, headers=headers)
+        except Exception as exc:
+            stats[f"error:{exc.__class__.__name__}"] += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+        stats["requests"] += 1
+        
+        if response.status_code == 404:
+            stats["no_task"] += 1
+            return
+        if response.status_code != 200:
+            stats[f"error:HTTP {response.status_code}"] += 1
+            continue
+        
+        checkout = response.json()
+        stats["checkouts"] += 1
+        await complete(Session, checkout["assignment"]["id"], checkout["task"]["id"])
+        stats["completions"] += 1
+
+
+async def duplicate_assignments(Session, project) -> Dict[str, int]:
+    async with Session() as db:
+        leases = (
+            select(
+                WorkerAssignment.task_id,
+                func.count(WorkerAssignment.id).label("leases"),
+                func.count(func.distinct(WorkerAssignment.worker_id)).label("workers")
+            )
+            .where(WorkerAssignment.status != AssignmentStatus.RELEASED.value)
+            .group_by(WorkerAssignment.task_id)
+            .subquery()
+        )
+        result = await db.execute(
+            select(leases.c.leases, leases.c.workers, Task.required_responses)
+            .join(Task, Task.id == leases.c.task_id)
+            .where(Task.project_id == project.id)
+        )
+        total = overshoot = repeated = 0
+        for lease_count, workers, required in result.all():
+            total += lease_count
+            overshoot += max(lease_count - required, 0)
+            repeated += lease_count - workers
+    return {"leases": total, "overshoot": overshoot, "repeated": repeated}
+
+
+async def run_load(
+    engine,
+    Session,
+    project,
+    tokens: List[str],
+    checkouts: int
+) -> Dict[str, Any]:
+    await reset_checkouts(Session, project)
+    url = f"{settings.API_V1_STR}/projects/{project.id}/checkout"
+    latencies: List[float] = []
+    stats: Counter = Counter()
+    
+    transport = httpx.ASGITransport(app=make_app(Session))
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        with Probe(engine) as probe:
+            await asyncio.gather(*(
+                annotator(client, Session, url, token, checkouts, latencies, stats)
+                for token in tokens
+            ))
+    
+    seconds = probe.finished - probe.started
+    duplicates = await duplicate_assignments(Session, project)
+    queries = probe.queries - COMPLETION_STATEMENTS * stats["completions"]
+    requests = stats["requests"]
+    return {
+        "requests": requests,
+        "checkouts": stats["checkouts"],
+        "no_task": stats["no_task"],
+        "errors": {
+            key.split(":", 1)[1]: value for key, value in stats.items() if key.startswith("error:")
+        },
+        "seconds": round(seconds, 3),
+        "checkouts_per_sec": round(stats["checkouts"] / seconds, 1) if seconds else None,
+        "checkout_p50_ms": percentile_ms(latencies, 50),
+        "checkout_p95_ms": percentile_ms(latencies, 95),
+        "checkout_p99_ms": percentile_ms(latencies, 99),
+        "queries_per_checkout": round(queries / requests, 2) if requests else None,
+        "duplicate_rate": (
+            round((duplicates["overshoot"] + duplicates["repeated"]) / duplicates["leases"], 6)
+            if duplicates["leases"] else 0.0
+        ),
+        **duplicates,
+    }
+
+
+async def run_size(database: str, size: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    # aiosqlite engines use NullPool, so only the busy timeout applies there
+    if database == "sqlite":
+        engine_options: Dict[str, Any] = {"connect_args": {"timeout": 60}}
+    else:
+        engine_options = {"pool_size": args.pool_size, "max_overflow": 0, "pool_timeout": 600}
+    
+    base = {"database": database, "tasks": size}
+    try:
+        engine, Session, user, project = await reset_database(database, **engine_options)
+    except Exception as exc:
+        return [{**base, "error": f"{exc.__class__.__name__}: {exc}"}]
+    
+    results = []
+    try:
+        started = time.perf_counter()
+        await load_tasks(Session, project, size, args.chunk_size)
+        tokens = await add_annotators(
+            Session, user.organization_id, max(args.annotators), args.chunk_size
+        )
+        print(f"{database:8} {size:>9} tasks loaded in {time.perf_counter() - started:.1f}s")
+        
+        for count in args.annotators:
+            result = {**base, "annotators": count}
+            try:
+                result.update(await run_load(engine, Session, project, tokens[:count], args.checkouts))
+            except Exception as exc:
+                result["error"] = f"{exc.__class__.__name__}: {exc}"
+            results.append(result)
+            print(
+                f"{database:8} {size:>9} {count:>6} annotators  "
+                + (result.get("error") or (
+                    f"{result['checkouts_per_sec']:>8} checkouts/s  "
+                    f"p50 {result['checkout_p50_ms']} p95 {result['checkout_p95_ms']} "
+                    f"p99 {result['checkout_p99_ms']} ms  "
+                    f"{result['queries_per_checkout']} queries/checkout  "
+                    f"duplicates {result['duplicate_rate']}  errors {result['errors'] or 0}"
+                ))
+            )
+    finally:
+        dispatch_queues.queues.clear()
+        await engine.dispose()
+    return results
+
+
+async def main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    for database in args.databases:
+        for size in args.sizes:
+            results.extend(await run_size(database, size, args))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Task checkout load benchmark")
+    parser.add_argument("--databases", nargs="+", default=["sqlite"], choices=["sqlite", "postgres"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--annotators", nargs="+", type=int, default=list(DEFAULT_ANNOTATORS))
+    parser.add_argument("--checkouts", type=int, default=5, help="Checkouts per annotator")
+    parser.add_argument(
+        "--pool-size", type=int, default=20, help="Postgres connections shared by all annotators"
+    )
+    parser.add_argument("--chunk-size", type=int, default=settings.TASK_IMPORT_BATCH_SIZE)
+    parser.add_argument(
+        "--output",
+        default=os.path.join("benchmarks", "results", f"checkout-{int(time.time())}.json")
+    )
+    parser.add_argument("--compare", help="Previous result file to diff p95 latency against")
+    args = parser.parse_args()
+    
+    results = asyncio.run(main(args))
+    write_results(args.output, "checkout", results)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare_results(
+            args.compare, results, ["database", "tasks", "annotators"], "checkout_p95_ms"
+        )
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+Query plan regression check for task checkout
+
+Loads a project with tasks of mixed priority, runs EXPLAIN on the checkout
+candidate query and fails unless the plan is an ordered range scan of
+idx_task_ready: no sort step and no full scan of tasks.
+
+Usage:
+    python -m benchmarks.explain_checkout --databases sqlite postgres --tasks 20000
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import sys
+
+from benchmarks.common import reset_database
+
+from sqlalchemy import text
+
+from app.models.task import TaskPriority
+from app.schemas.task import TaskCreate
+from app.services.assignment import AssignmentService
+from app.services.task import TaskService
+
+READY_INDEX = "idx_task_ready"
+
+
+def _plan_nodes(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    nodes = [plan]
+    for child in plan.get("Plans", []):
+        nodes.extend(_plan_nodes(child))
+    return nodes
+
+
+def check_sqlite_plan(rows: List[Tuple]) -> List[str]:
+    details = [row[-1] for row in rows]
+    problems = []
+    if not any(READY_INDEX in detail for detail in details):
+        problems.append(f"tasks is not read through {READY_INDEX}")
+    if any(detail.startswith("SCAN tasks") for detail in details):
+        problems.append("full scan of tasks")
+    if any("TEMP B-TREE FOR ORDER BY" in detail for detail in details):
+        problems.append("candidates are sorted instead of read in index order")
+    return problems
+
+
+def check_postgres_plan(plan: Dict[str, Any]) -> List[str]:
+    nodes = _plan_nodes(plan)
+    problems = []
+    if not any(node.get("Index Name") == READY_INDEX for node in nodes):
+        problems.append(f"tasks is not read through {READY_INDEX}")
+    if any(node["Node Type"] == "Seq Scan" and node.get("Relation Name") == "tasks" for node in nodes):
+        problems.append("full scan of tasks")
+    if any(node["Node Type"] in ("Sort", "Incremental Sort") for node in nodes):
+        problems.append("candidates are sorted instead of read in index order")
+    return problems
+
+
+async def explain(database: str, size: int) -> List[str]:
+    engine, Session, user, project = await reset_database(database)
+    priorities = list(TaskPriority)
+    try:
+        async with Session() as db:
+            for start in range(0, size, 5000):
+                await TaskService.create_many(
+                    db,
+                    tasks_in=[
+                        TaskCreate(
+                            data={"text": f"Plan task {i}"},
+                            priority=priorities[i % len(priorities)]
+                        )
+                        for i in range(start, min(start + 5000, size))
+                    ],
+                    project_id=project.id
+                )
+                db.expunge_all()
+            await db.execute(text("ANALYZE"))
+            await db.commit()
+            
+            query = AssignmentService.candidate_query(project.id, "plan-worker").limit(10)
+            sql = str(query.compile(
+                dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+            ))
+            if database == "sqlite":
+                rows = (await db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+                print("\n".join(row[-1] for row in rows))
+                return check_sqlite_plan(rows)
+            
+            result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            plan = result.scalar()
+            plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+            print(json.dumps(plan, indent=2))
+            return check_postgres_plan(plan)
+    finally:
+        await engine.dispose()
+
+
+async def main(args: argparse.Namespace) -> int:
+    failed = False
+    for database in args.databases:
+        print(f"== {database}")
+        try:
+            problems = await explain(database, args.tasks)
+        except Exception as exc:
+            print(f"{database}: could not run ({exc.__class__.__name__}: {exc})")
+            failed = True
+            continue
+        for problem in problems:
+            print(f"{database}: REGRESSION: {problem}")
+        failed = failed or bool(problems)
+        if not problems:
+            print(f"{database}: ok")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkout query plan check")
+    parser.add_argument("--databases", nargs="+", default=["sqlite"], choices=["sqlite", "postgres"])
+    parser.add_argument("--tasks", type=int, default=20_000)
+    sys.exit(asyncio.run(main(parser.parse_args())))
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Ingestion benchmark for the task creation paths
+
+Drives TaskService.create, TaskService.create_many and the upload_tasks_csv
+endpoint in-process against SQLite and Postgres, on a fresh schema per run.
+
+Usage:
+    python -m benchmarks.ingestion --databases sqlite postgres \\
+        --sizes 1000 10000 100000 1000000 --output benchmarks/results/ingestion.json
+    python -m benchmarks.ingestion --compare benchmarks/results/previous.json
+
+Postgres is read from BENCH_POSTGRES_URL (defaults to the docker-compose
+database, verita_bench). Each result records tasks/sec, peak RSS, statement
+count and p50/p99 latency of a batch, where a batch is one commit: a single
+task for create, one create_many call, one import batch for the CSV upload.
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import csv
+import os
+import tempfile
+import time
+
+from benchmarks.common import (
+    Probe, RSSSampler, compare_results, percentile_ms, reset_database, write_results
+)
+
+from starlette.datastructures import UploadFile
+
+from app.api.v1.endpoints.tasks import upload_tasks_csv
+from app.core.config import settings
+from app.schemas.task import TaskCreate
+from app.services.task import TaskService
+
+PATHS = ("create", "create_many", "csv")
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def task_data(i: int) -> Dict[str, Any]:
+    # Distinct payloads so the content-hash dedup keeps every row
+    return {"text": f"Benchmark task {i}", "source": "bench", "index": i}
+
+
+def write_csv(size: int) -> str:
+    handle, path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(handle, "w", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(["external_id", "text", "source"])
+        for i in range(size):
+            writer.writerow([f"bench-{i}", f"Benchmark task {i}", "bench"])
+    return path
+
+
+async def run_create(Session, user, project, size: int, chunk_size: int) -> None:
+    async with Session() as db:
+        for i in range(size):
+            await TaskService.create(db, obj_in=TaskCreate(data=task_data(i)), project_id=project.id)
+
+
+async def run_create_many(Session, user, project, size: int, chunk_size: int) -> None:
+    async with Session() as db:
+        for start in range(0, size, chunk_size):
+            tasks_in = [
+                TaskCreate(data=task_data(i))
+                for i in range(start, min(start + chunk_size, size))
+            ]
+            await TaskService.create_many(db, tasks_in=tasks_in, project_id=project.id)
+            db.expunge_all()
+
+
+async def run_csv(Session, user, project, size: int, chunk_size: int, path: str) -> None:
+    async with Session() as db:
+        with open(path, "rb") as fileobj:
+            result = await upload_tasks_csv(
+                project_id=project.id,
+                file=UploadFile(file=fileobj, filename="tasks.csv"),
+                db=db,
+                current_user=user
+            )
+    if result.task_count != size:
+        raise RuntimeError(f"CSV import created {result.task_count} of {size} tasks")
+
+
+async def run_one(
+    database: str,
+    path: str,
+    size: int,
+    chunk_size: int
+) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"database": database, "path": path, "tasks": size}
+    csv_path = write_csv(size) if path == "csv" else None
+    try:
+        engine, Session, user, project = await reset_database(database)
+    except Exception as exc:
+        if csv_path:
+            os.remove(csv_path)
+        result["error"] = f"{exc.__class__.__name__}: {exc}"
+        return result
+    
+    try:
+        with RSSSampler() as rss, Probe(engine) as probe:
+            if path == "create":
+                await run_create(Session, user, project, size, chunk_size)
+            elif path == "create_many":
+                await run_create_many(Session, user, project, size, chunk_size)
+            else:
+                await run_csv(Session, user, project, size, chunk_size, csv_path)
+    except Exception as exc:
+        result["error"] = f"{exc.__class__.__name__}: {exc}"
+        return result
+    finally:
+        await engine.dispose()
+        if csv_path:
+            os.remove(csv_path)
+    
+    seconds = probe.finished - probe.started
+    latencies = probe.batch_latencies()
+    result.update(
+        seconds=round(seconds, 3),
+        tasks_per_sec=round(size / seconds, 1) if seconds else None,
+        peak_rss_mb=round(rss.peak / 2 ** 20, 1),
+        queries=probe.queries,
+        queries_per_task=round(probe.queries / size, 4),
+        batches=len(latencies),
+        batch_p50_ms=percentile_ms(latencies, 50),
+        batch_p99_ms=percentile_ms(latencies, 99),
+    )
+    return result
+
+
+async def main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    for database in args.databases:
+        for size in args.sizes:
+            for path in args.paths:
+                if path == "create" and size > args.max_single_create:
+                    results.append({
+                        "database": database, "path": path, "tasks": size,
+                        "skipped": f"above --max-single-create {args.max_single_create}"
+                    })
+                    continue
+                
+                started = time.perf_counter()
+                result = await run_one(database, path, size, args.chunk_size)
+                results.append(result)
+                print(
+                    f"{database:8} {path:12} {size:>9}  "
+                    + (result.get("error") or (
+                        f"{result['tasks_per_sec']:>10} tasks/s  "
+                        f"{result['peak_rss_mb']:>7} MB  {result['queries']:>8} queries  "
+                        f"p50 {result['batch_p50_ms']} ms  p99 {result['batch_p99_ms']} ms"
+                    ))
+                    + f"  ({time.perf_counter() - started:.1f}s)"
+                )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Task ingestion benchmark")
+    parser.add_argument("--databases", nargs="+", default=["sqlite"], choices=["sqlite", "postgres"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--paths", nargs="+", default=list(PATHS), choices=PATHS)
+    parser.add_argument(
+        "--chunk-size", type=int, default=settings.TASK_IMPORT_BATCH_SIZE,
+        help="Tasks per create_many call"
+    )
+    parser.add_argument(
+        "--max-single-create", type=int, default=10_000,
+        help="Skip the one-task-per-call path above this size"
+    )
+    parser.add_argument(
+        "--output",
+        default=os.path.join("benchmarks", "results", f"ingestion-{int(time.time())}.json")
+    )
+    parser.add_argument("--compare", help="Previous result file to diff tasks/sec against")
+    args = parser.parse_args()
+    
+    results = asyncio.run(main(args))
+    write_results(args.output, "ingestion", results)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare_results(args.compare, results, ["database", "path", "tasks"], "tasks_per_sec")
\ No newline at end of file
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Offline content-hash dedup scan over existing projects
+
+Usage:
+    python dedup_tasks.py [--apply] [project_id ...]
+
+Without --apply only a report is printed. With --apply the content_hash
+column and its unique index are added if missing, hashes are backfilled and
+pending duplicates without responses are deleted.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import inspect, text
+
+from app.db.session import AsyncSessionLocal, engine
+from app.models.task import Task
+from app.services.task_dedup import TaskDedupService
+
+
+def ensure_content_hash_column(conn) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("tasks")}
+    if "content_hash" not in columns:
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN content_hash VARCHAR(64)"))
+
+
+def ensure_content_hash_index(conn) -> None:
+    for index in Task.__table__.indexes:
+        if index.name == "idx_project_content_hash":
+            index.create(conn, checkfirst=True)
+
+
+async def main(project_ids, apply: bool) -> None:
+    if apply:
+        async with engine.begin() as conn:
+            await conn.run_sync(ensure_content_hash_column)
+    
+    async with AsyncSessionLocal() as db:
+        if project_ids:
+            reports = [
+                await TaskDedupService.scan_project(db, project_id, apply=apply)
+                for project_id in project_ids
+            ]
+        else:
+            reports = await TaskDedupService.scan_all(db, apply=apply)
+    
+    for report in reports:
+        print(
+            f"{report.project_id}: {report.tasks_scanned} tasks, "
+            f"{report.duplicate_tasks} duplicates in {report.duplicate_groups} groups, "
+            f"{report.removed_tasks} removed, {report.hashes_updated} hashes updated"
+        )
+    
+    if apply:
+        async with engine.begin() as conn:
+            await conn.run_sync(ensure_content_hash_index)
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("project_ids", nargs="*")
+    parser.add_argument("--apply", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.project_ids, args.apply))
\ No newline at end of file
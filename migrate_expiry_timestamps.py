@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Convert lease and task expiry timestamps from ISO strings to timestamp columns
+
+Usage:
+    python migrate_expiry_timestamps.py
+
+Postgres columns are altered to TIMESTAMPTZ in place. SQLite keeps its
+column affinity, so stored values are rewritten in SQLAlchemy's DateTime
+format, which compares correctly; unparseable values are cleared. Also adds
+projects.expired_tasks and the expiry indexes. Safe to re-run.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import inspect, text
+
+from app.db.session import engine
+from app.models.task import Task
+from app.models.worker import WorkerAssignment
+
+TIMESTAMP_COLUMNS = {
+    "worker_assignments": ("assigned_at", "expires_at", "completed_at"),
+    "tasks": ("expires_at",),
+}
+
+
+def _sqlite_timestamp(value: str):
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def migrate(conn) -> None:
+    dialect = conn.dialect.name
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        types = {column["name"]: column["type"] for column in inspect(conn).get_columns(table)}
+        for column in columns:
+            if dialect == "postgresql":
+                if types[column].python_type is str:
+                    conn.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} TYPE TIMESTAMPTZ "
+                        f"USING NULLIF({column}, '')::timestamptz"
+                    ))
+                    print(f"{table}.{column}: converted to TIMESTAMPTZ")
+                continue
+            
+            rows = conn.execute(text(
+                f"SELECT rowid, {column} FROM {table} WHERE {column} LIKE '%T%' OR {column} = ''"
+            )).all()
+            if rows:
+                conn.execute(
+                    text(f"UPDATE {table} SET {column} = :value WHERE rowid = :rowid"),
+                    [{"rowid": rowid, "value": _sqlite_timestamp(value)} for rowid, value in rows]
+                )
+            print(f"{table}.{column}: {len(rows)} values rewritten")
+    
+    columns = {column["name"] for column in inspect(conn).get_columns("projects")}
+    if "expired_tasks" not in columns:
+        conn.execute(text("ALTER TABLE projects ADD COLUMN expired_tasks INTEGER DEFAULT 0"))
+        conn.execute(text(
+            "UPDATE projects SET expired_tasks = "
+            "(SELECT COUNT(*) FROM tasks WHERE tasks.project_id = projects.id AND tasks.status = 'EXPIRED')"
+        ))
+    
+    for table in (Task.__table__, WorkerAssignment.__table__):
+        for index in table.indexes:
+            if index.name in ("idx_task_expiry", "idx_assignment_status_expires"):
+                index.create(conn, checkfirst=True)
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(migrate)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Add the claim token column that fences import job progress to its current worker
+
+Usage:
+    python migrate_import_job_claims.py
+
+Jobs running during the upgrade have no token; they are reclaimed once their
+heartbeat goes stale and resume from their last committed batch. Safe to re-run.
+"""
+
+import asyncio
+
+from sqlalchemy import inspect, text
+
+from app.db.session import engine
+
+
+def ensure_schema(conn) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("import_jobs")}
+    if "claim_token" not in columns:
+        conn.execute(text("ALTER TABLE import_jobs ADD COLUMN claim_token VARCHAR"))
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(ensure_schema)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Add the project priority and deadline columns used by the cross-project scheduler
+
+Usage:
+    python migrate_project_scheduling.py
+
+Existing projects get MEDIUM priority and no deadline. Safe to re-run.
+"""
+
+import asyncio
+
+from sqlalchemy import inspect, text
+
+from app.db.session import engine
+
+
+def ensure_schema(conn) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("projects")}
+    if "priority" not in columns:
+        # Postgres already has the taskpriority enum type from the tasks table
+        column_type = "taskpriority" if conn.dialect.name == "postgresql" else "VARCHAR(8)"
+        conn.execute(text(f"ALTER TABLE projects ADD COLUMN priority {column_type} DEFAULT 'MEDIUM'"))
+        conn.execute(text("UPDATE projects SET priority = 'MEDIUM' WHERE priority IS NULL"))
+    if "deadline" not in columns:
+        column_type = "TIMESTAMPTZ" if conn.dialect.name == "postgresql" else "DATETIME"
+        conn.execute(text(f"ALTER TABLE projects ADD COLUMN deadline {column_type}"))
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(ensure_schema)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
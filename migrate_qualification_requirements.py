@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Convert free-form project qualification requirements to the checked schema
+
+Usage:
+    python migrate_qualification_requirements.py [--apply] [project_id ...]
+
+Requirements saved before QualificationRequirements existed were arbitrary
+JSON; gated projects whose requirements do not parse match no worker. Known
+legacy spellings (min_score, country, language, ...) are renamed, other keys
+are moved under "qualifications" and tested against Worker.qualifications.
+Projects that still do not parse are flagged and left unchanged, with their
+original requirements kept in project_metadata. Without --apply only a report
+is printed; with --apply the converted projects are saved and their
+eligibility is rebuilt. Safe to re-run.
+"""
+
+import argparse
+import asyncio
+from typing import Any, Dict, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from app.db import base  # noqa: F401 - registers every model for the ORM queries
+from app.db.session import AsyncSessionLocal, engine
+from app.models.project import Project
+from app.schemas.project import QualificationRequirements
+from app.services.eligibility import EligibilityService
+
+ALIASES = {
+    "min_score": "min_quality_score",
+    "min_quality": "min_quality_score",
+    "quality_score": "min_quality_score",
+    "min_accuracy": "min_accuracy_rate",
+    "accuracy_rate": "min_accuracy_rate",
+    "country": "countries",
+    "language": "languages",
+    "worker_type": "worker_types",
+    "certification": "certifications",
+}
+LIST_FIELDS = {"countries", "languages", "worker_types", "certifications"}
+
+
+def convert(requirements: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Requirements in the checked schema, or None if they cannot be converted"""
+    converted: Dict[str, Any] = {}
+    qualifications = dict(requirements.get("qualifications") or {})
+    for key, value in requirements.items():
+        if key == "qualifications":
+            continue
+        key = ALIASES.get(key, key)
+        if key in LIST_FIELDS and not isinstance(value, list):
+            value = [value]
+        if key in QualificationRequirements.model_fields:
+            converted[key] = value
+        else:
+            qualifications[key] = value
+    if qualifications:
+        converted["qualifications"] = qualifications
+    
+    try:
+        rules = QualificationRequirements.model_validate(converted)
+    except ValidationError:
+        return None
+    return rules.model_dump(mode="json", exclude_defaults=True)
+
+
+async def main(project_ids, apply: bool) -> None:
+    changed = []
+    async with AsyncSessionLocal() as db:
+        query = select(Project)
+        if project_ids:
+            query = query.where(Project.id.in_(project_ids))
+        projects = (await db.execute(query)).scalars().all()
+        
+        for project in projects:
+            requirements = project.qualification_requirements or {}
+            try:
+                QualificationRequirements.model_validate(requirements)
+                continue
+            except (ValidationError, TypeError):
+                pass
+            
+            converted = convert(requirements) if isinstance(requirements, dict) else None
+            if converted is None:
+                print(f"{project.id}: FLAGGED, cannot convert {requirements!r}")
+                if apply:
+                    metadata = dict(project.project_metadata or {})
+                    metadata["legacy_qualification_requirements"] = requirements
+                    project.project_metadata = metadata
+                continue
+            
+            print(f"{project.id}: {requirements!r} -> {converted!r}")
+            changed.append(project.id)
+            if apply:
+                metadata = dict(project.project_metadata or {})
+                metadata["legacy_qualification_requirements"] = requirements
+                project.project_metadata = metadata
+                project.qualification_requirements = converted
+        
+        if apply:
+            await db.commit()
+            if changed:
+                count = await EligibilityService.rebuild(db, changed)
+                print(f"{count} eligible worker-project pairs stored")
+    
+    print(f"{len(changed)} projects {'converted' if apply else 'to convert'}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("project_ids", nargs="*")
+    parser.add_argument("--apply", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.project_ids, args.apply))
\ No newline at end of file
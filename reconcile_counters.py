@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Recompute project and task counters from the source tables
+
+Usage:
+    python reconcile_counters.py [project_id ...]
+
+Adds the sharded counter schema if missing, folds counter shards into their
+projects, then corrects Project total/completed/expired tasks and responses
+and Task completed responses and active leases for the given projects
+(default: all). Corrections are applied as increments, so it is safe to run
+while the API is serving traffic, and safe to re-run.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import inspect, text
+
+from app.db import base  # noqa: F401 - registers every model for the ORM queries
+from app.db.session import AsyncSessionLocal, engine
+from app.models.project import ProjectCounterShard
+from app.services.counters import ProjectCounterService
+
+
+def ensure_schema(conn) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("projects")}
+    if "sharded_counters" not in columns:
+        conn.execute(text("ALTER TABLE projects ADD COLUMN sharded_counters BOOLEAN DEFAULT FALSE"))
+    ProjectCounterShard.__table__.create(conn, checkfirst=True)
+
+
+async def main(project_ids) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(ensure_schema)
+    
+    async with AsyncSessionLocal() as db:
+        folded = await ProjectCounterService.fold(db)
+        counts = await ProjectCounterService.reconcile(db, project_ids or None)
+        print(
+            f"{folded} projects folded from shards; corrected counters of "
+            f"{counts['projects']} projects and {counts['tasks']} tasks"
+        )
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("project_ids", nargs="*")
+    args = parser.parse_args()
+    asyncio.run(main(args.project_ids))
\ No newline at end of file
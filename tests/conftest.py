@@ -0,0 +1,111 @@
+import os
+import tempfile
+
+# Settings are read on import, so the test database is configured first
+_DB_DIR = tempfile.mkdtemp(prefix="crowdsource-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_DB_DIR}/test.db")
+os.environ.setdefault("SYNC_DATABASE_URL", f"sqlite:///{_DB_DIR}/test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("IMPORT_STORAGE_DIR", os.path.join(_DB_DIR, "imports"))
+
+import pytest
+
+from app.db.base import Base
+from app.db.session import engine, AsyncSessionLocal
+from app.models.organization import Organization
+from app.models.project import Project, ProjectStatus
+from app.models.question import Question, QuestionType
+from app.models.user import User
+from app.models.worker import Worker, WorkerStatus
+from app.services.dispatch import dispatch_queues
+
+
+@pytest.fixture
+async def db():
+    """A session on a freshly created schema"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    dispatch_queues.queues.clear()
+    async with AsyncSessionLocal() as session:
+        yield session
+    dispatch_queues.queues.clear()
+    await engine.dispose()
+
+
+@pytest.fixture
+async def organization(db):
+    organization = Organization(name="Test Org", slug="test-org")
+    db.add(organization)
+    await db.commit()
+    return organization
+
+
+@pytest.fixture
+async def user(db, organization):
+    user = User(
+        email="owner@example.com",
+        username="owner",
+        hashed_password="x",
+        organization_id=organization.id
+    )
+    db.add(user)
+    await db.commit()
+    return user
+
+
+@pytest.fixture
+async def project(db, organization, user):
+    project = Project(
+        name="Sentiment",
+        slug="sentiment",
+        instructions="Label {{text}}",
+        organization_id=organization.id,
+        creator_id=user.id,
+        status=ProjectStatus.ACTIVE
+    )
+    db.add(project)
+    await db.commit()
+    return project
+
+
+@pytest.fixture
+async def question(db, project):
+    question = Question(
+        project_id=project.id,
+        question_type=QuestionType.MULTIPLE_CHOICE,
+        order=0,
+        identifier="sentiment",
+        label="Sentiment",
+        options=[
+            {"value": "pos", "label": "Positive"},
+            {"value": "neg", "label": "Negative"}
+        ]
+    )
+    db.add(question)
+    await db.commit()
+    return question
+
+
+@pytest.fixture
+def make_worker(db, organization):
+    """Factory for active workers, each with its own user"""
+    created = []
+    
+    async def factory() -> Worker:
+        n = len(created)
+        user = User(
+            email=f"worker{n}@example.com",
+            username=f"worker{n}",
+            hashed_password="x",
+            organization_id=organization.id
+        )
+        db.add(user)
+        await db.flush()
+        worker = Worker(email=user.email, user_id=user.id, status=WorkerStatus.ACTIVE)
+        db.add(worker)
+        await db.commit()
+        created.append(worker)
+        return worker
+    
+    return factory
\ No newline at end of file
@@ -0,0 +1,143 @@
+from collections import Counter
+from itertools import permutations
+
+import numpy as np
+import pytest
+from sqlalchemy import insert
+
+from app.models.question import Question, QuestionType
+from app.models.task import Task, TaskQuestionConsensus
+from app.services.agreement import (
+    AgreementService, LabelCounts, binary_agreement, interval_alpha, nominal_agreement
+)
+from app.services.project import ProjectService
+
+
+def _counts(answers, size, totals=None):
+    """Count matrix of per-item answer lists, each answer a label index"""
+    items, labels, counts = [], [], []
+    for item, values in enumerate(answers):
+        for label, count in sorted(Counter(values).items()):
+            items.append(item)
+            labels.append(label)
+            counts.append(count)
+    return LabelCounts(
+        items=np.array(items, dtype=np.int64),
+        labels=np.array(labels, dtype=np.int64),
+        counts=np.array(counts, dtype=np.float64),
+        totals=np.array(totals or [len(values) for values in answers], dtype=np.float64),
+        names=[str(i) for i in range(size)]
+    )
+
+
+def _fleiss_kappa(answers, size):
+    observed = np.mean([
+        sum(c * (c - 1) for c in Counter(values).values()) / (len(values) * (len(values) - 1))
+        for values in answers
+    ])
+    used = Counter(value for values in answers for value in values)
+    total = sum(used.values())
+    expected = sum((used[label] / total) ** 2 for label in range(size))
+    return (observed - expected) / (1 - expected)
+
+
+def _krippendorff_alpha(answers, distance):
+    """Alpha from every ordered pair of answers, within and across items"""
+    pooled = [value for values in answers for value in values]
+    observed = sum(
+        sum(distance(a, b) for a, b in permutations(values, 2)) / (len(values) - 1)
+        for values in answers
+    ) / len(pooled)
+    expected = sum(distance(a, b) for a, b in permutations(pooled, 2)) / (
+        len(pooled) * (len(pooled) - 1)
+    )
+    return 1 - observed / expected
+
+
+@pytest.fixture
+def answers():
+    rng = np.random.default_rng(7)
+    truth = rng.integers(0, 4, 200)
+    return [
+        [int(t) if rng.random() < 0.7 else int(rng.integers(0, 4)) for _ in range(n)]
+        for t, n in zip(truth, rng.integers(2, 6, len(truth)))
+    ]
+
+
+def test_nominal_agreement_matches_pairwise_definitions(answers):
+    metrics = nominal_agreement(_counts(answers, 4))
+    
+    assert metrics["fleiss_kappa"] == pytest.approx(_fleiss_kappa(answers, 4))
+    assert metrics["krippendorff_alpha"] == pytest.approx(
+        _krippendorff_alpha(answers, lambda a, b: float(a != b))
+    )
+
+
+def test_interval_alpha_matches_squared_distance_definition(answers):
+    values = np.array([1.0, 2.0, 3.0, 5.0])
+    
+    alpha = interval_alpha(_counts(answers, 4), values)
+    
+    assert alpha == pytest.approx(
+        _krippendorff_alpha(answers, lambda a, b: (values[a] - values[b]) ** 2)
+    )
+
+
+def test_binary_agreement_treats_each_option_as_a_yes_no_item():
+    # Three options; each response selects a subset
+    selections = [[{0}, {0, 1}], [{2}, {2}, set()], [{0, 1}, {1}, {0, 1}, {1}]]
+    matrix = _counts(
+        [[option for chosen in responses for option in chosen] for responses in selections],
+        3,
+        totals=[len(responses) for responses in selections]
+    )
+    # The same answers as one selected (1) / not selected (0) item per option
+    expanded = [
+        [int(option in chosen) for chosen in responses]
+        for responses in selections
+        for option in range(3)
+    ]
+    
+    metrics = binary_agreement(matrix)
+    reference = nominal_agreement(_counts(expanded, 2))
+    
+    for field in ("observed_agreement", "expected_agreement", "fleiss_kappa", "krippendorff_alpha"):
+        assert metrics[field] == pytest.approx(reference[field])
+
+
+def test_unanimous_answers_agree_fully():
+    metrics = nominal_agreement(_counts([[0, 0, 0], [1, 1], [0, 0]], 2))
+    
+    assert metrics["observed_agreement"] == 1.0
+    assert metrics["fleiss_kappa"] == pytest.approx(1.0)
+    assert metrics["krippendorff_alpha"] == pytest.approx(1.0)
+
+
+async def test_compute_reads_the_consensus_histograms(db, project, question):
+    histograms = [{"pos": 2}, {"pos": 1, "neg": 1}, {"neg": 3}, {"pos": 1}]
+    await db.execute(insert(Task), [
+        {"id": f"t{i}", "project_id": project.id, "data": {"n": i}}
+        for i in range(len(histograms))
+    ])
+    await db.execute(insert(TaskQuestionConsensus), [
+        {"task_id": f"t{i}", "question_id": question.id, "responses": sum(h.values()), "counts": h}
+        for i, h in enumerate(histograms)
+    ])
+    db.add(Question(
+        project_id=project.id,
+        question_type=QuestionType.RANKING,
+        order=1,
+        identifier="order",
+        label="Order"
+    ))
+    await db.commit()
+    project = await ProjectService.get(db, project.id)
+    
+    rows = await AgreementService.get(db, project)
+    
+    # Only the scored question, and only tasks with two or more answers
+    assert [row.question_id for row in rows] == [question.id]
+    reference = nominal_agreement(_counts([[0, 0], [0, 1], [1, 1, 1]], 2))
+    assert (rows[0].items, rows[0].responses, rows[0].metric) == (3, 7, "nominal")
+    assert rows[0].fleiss_kappa == pytest.approx(reference["fleiss_kappa"])
+    assert [label["label"] for label in rows[0].labels] == ["neg", "pos"]
\ No newline at end of file
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.core.time import utcnow
+from app.models.task import Task, TaskStatus
+from app.models.worker import WorkerAssignment, AssignmentStatus
+from app.services.assignment import AssignmentService
+from app.services.dispatch import dispatch_queues
+
+
+async def _add_tasks(db, project, n, required_responses=1):
+    await db.execute(insert(Task), [
+        {
+            "id": f"t{i}",
+            "project_id": project.id,
+            "data": {"text": str(i)},
+            "required_responses": required_responses
+        }
+        for i in range(n)
+    ])
+    await db.commit()
+
+
+async def test_checkout_stops_at_required_responses(db, project, make_worker):
+    await _add_tasks(db, project, 1, required_responses=2)
+    workers = [await make_worker() for _ in range(3)]
+    
+    first = await AssignmentService.checkout(db, project.id, workers[0].id)
+    second = await AssignmentService.checkout(db, project.id, workers[1].id)
+    
+    assert first[1].id == second[1].id == "t0"
+    assert await AssignmentService.checkout(db, project.id, workers[2].id) is None
+    task = await db.get(Task, "t0")
+    await db.refresh(task)
+    assert (task.active_leases, task.status) == (2, TaskStatus.IN_PROGRESS)
+
+
+async def test_checkout_returns_the_lease_a_worker_already_holds(db, project, make_worker):
+    await _add_tasks(db, project, 2)
+    worker = await make_worker()
+    
+    lease, task = await AssignmentService.checkout(db, project.id, worker.id)
+    again, same = await AssignmentService.checkout(db, project.id, worker.id)
+    
+    assert (again.id, same.id) == (lease.id, task.id)
+    assert lease.status == AssignmentStatus.ASSIGNED.value
+    assert lease.expires_at is not None
+
+
+async def test_release_hands_the_slot_to_another_worker(db, project, make_worker):
+    await _add_tasks(db, project, 1)
+    first, second = await make_worker(), await make_worker()
+    lease, _ = await AssignmentService.checkout(db, project.id, first.id)
+    assert await AssignmentService.checkout(db, project.id, second.id) is None
+    
+    assert await AssignmentService.release(db, lease.id, first.id)
+    
+    task = await db.get(Task, "t0")
+    await db.refresh(task)
+    assert (task.active_leases, task.status) == (0, TaskStatus.PENDING)
+    assert (await AssignmentService.checkout(db, project.id, second.id))[1].id == "t0"
+
+
+async def test_lapsed_lease_is_expired_and_its_slot_returned(db, project, make_worker):
+    await _add_tasks(db, project, 1)
+    first, second = await make_worker(), await make_worker()
+    lease, _ = await AssignmentService.checkout(db, project.id, first.id, lease_seconds=60)
+    
+    assert await AssignmentService.expire_leases(db, utcnow()) == 0
+    assert await AssignmentService.expire_leases(db, utcnow() + timedelta(seconds=120)) == 1
+    
+    lease = await db.get(WorkerAssignment, lease.id)
+    await db.refresh(lease)
+    assert lease.status == AssignmentStatus.EXPIRED.value
+    assert not await AssignmentService.extend(db, lease.id, first.id)
+    assert (await AssignmentService.checkout(db, project.id, second.id))[1].id == "t0"
+
+
+@pytest.mark.parametrize("ready_queue", [False, True])
+async def test_checkout_many_leases_distinct_tasks(db, project, make_worker, ready_queue):
+    # Tasks with free slots left must still be leased once per worker
+    await _add_tasks(db, project, 5, required_responses=2)
+    if ready_queue:
+        await dispatch_queues.rebuild(db, project.id)
+    worker = await make_worker()
+    
+    checkouts = await AssignmentService.checkout_many(db, project.id, worker.id, count=3)
+    
+    task_ids = [task.id for _, task in checkouts]
+    assert len(task_ids) == len(set(task_ids)) == 3
+    more = await AssignmentService.checkout_many(db, project.id, worker.id, count=10)
+    assert len(more) == 5
+    assert [task.id for _, task in more[:3]] == task_ids
+
+
+async def test_release_many_returns_every_slot(db, project, make_worker):
+    await _add_tasks(db, project, 3)
+    worker = await make_worker()
+    await AssignmentService.checkout_many(db, project.id, worker.id, count=3)
+    
+    assert await AssignmentService.release_many(db, worker.id, project_id=project.id) == 3
+    
+    for task_id in ("t0", "t1", "t2"):
+        task = await db.get(Task, task_id)
+        await db.refresh(task)
+        assert (task.active_leases, task.status) == (0, TaskStatus.PENDING)
\ No newline at end of file
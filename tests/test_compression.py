@@ -0,0 +1,123 @@
+import gzip
+import io
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from app.core.compression import (
+    DecompressRequestMiddleware, _body_decompressor, open_decompressed, strip_compression_suffix
+)
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _zstd(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor().compress(data)
+
+
+ENCODINGS = [
+    pytest.param("gzip", gzip.compress, id="gzip"),
+    pytest.param(
+        "zstd", _zstd, id="zstd",
+        marks=pytest.mark.skipif(zstandard is None, reason="zstandard is not installed")
+    )
+]
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    
+    @app.post("/length")
+    async def length(request: Request):
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"size": size}
+    
+    @app.post("/echo")
+    async def echo(body: dict):
+        return body
+    
+    app.add_middleware(DecompressRequestMiddleware)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.parametrize("encoding, compress", ENCODINGS)
+async def test_compressed_body_is_inflated(client, encoding, compress):
+    raw = os.urandom(300_000) + b"x" * 700_000
+    headers = {"content-encoding": encoding}
+    
+    async with client:
+        body = compress(b'{"a": [1, 2]}')
+        response = await client.post("/echo", content=body, headers=headers)
+        assert response.json() == {"a": [1, 2]}
+        
+        # Concatenated gzip members and zstd frames are one body
+        body = compress(raw) + compress(raw)
+        response = await client.post("/length", content=body, headers=headers)
+        assert response.json() == {"size": 2 * len(raw)}
+
+
+@pytest.mark.parametrize("encoding, compress", ENCODINGS)
+async def test_body_inflating_past_the_limit_is_rejected(client, encoding, compress, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_DECOMPRESSED_BODY_BYTES", 1024 * 1024)
+    bomb = compress(b"\0" * (8 * 1024 * 1024))
+    headers = {"content-encoding": encoding}
+    
+    async with client:
+        response = await client.post("/length", content=bomb, headers=headers)
+        assert response.status_code == 413
+        response = await client.post("/echo", content=bomb, headers=headers)
+        assert response.status_code == 413
+        
+        body = compress(b"\0" * 1024 * 1024)
+        response = await client.post("/length", content=body, headers=headers)
+        assert response.json() == {"size": 1024 * 1024}
+
+
+@pytest.mark.parametrize("encoding, compress", ENCODINGS)
+async def test_corrupt_body_is_a_bad_request(client, encoding, compress):
+    async with client:
+        response = await client.post(
+            "/echo", content=b"not compressed", headers={"content-encoding": encoding}
+        )
+    assert response.status_code == 400
+
+
+async def test_uncompressed_body_passes_through(client):
+    async with client:
+        response = await client.post("/echo", json={"a": 1})
+    assert response.json() == {"a": 1}
+
+
+@pytest.mark.parametrize("encoding, compress", ENCODINGS)
+def test_decompressor_output_is_bounded(encoding, compress):
+    decompressor = _body_decompressor(encoding)
+    
+    chunks = [decompressor.decompress(compress(b"\0" * 1_000_000), 4096)]
+    while not decompressor.needs_input:
+        chunks.append(decompressor.decompress(b"", 4096))
+    
+    assert max(len(chunk) for chunk in chunks) == 4096
+    assert sum(len(chunk) for chunk in chunks) == 1_000_000
+
+
+@pytest.mark.parametrize("encoding, compress", ENCODINGS)
+def test_compressed_files_are_detected_by_magic_bytes(encoding, compress):
+    data = b"external_id,text\n1,a\n"
+    
+    assert open_decompressed(io.BytesIO(compress(data))).read() == data
+    assert open_decompressed(io.BytesIO(data)).read() == data
+
+
+def test_compression_suffix_is_stripped():
+    assert strip_compression_suffix("tasks.csv.gz") == "tasks.csv"
+    assert strip_compression_suffix("tasks.ndjson.ZST") == "tasks.ndjson"
+    assert strip_compression_suffix("tasks.csv") == "tasks.csv"
\ No newline at end of file
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from sqlalchemy import insert, select
+
+from app.core.config import settings
+from app.core.time import utcnow
+from app.models.task import Task, TaskStatus
+from app.models.worker import WorkerAssignment, AssignmentStatus
+from app.services.assignment import AssignmentService
+from app.services.expiry import ExpiryService
+
+
+async def test_sweep_expires_due_tasks_and_their_leases(db, project, make_worker):
+    now = utcnow()
+    due = {"due": now + timedelta(hours=1), "open": now + timedelta(days=1), "forever": None}
+    await db.execute(insert(Task), [
+        {"id": task_id, "project_id": project.id, "data": {"id": task_id}, "expires_at": expires_at}
+        for task_id, expires_at in due.items()
+    ])
+    await db.commit()
+    worker = await make_worker()
+    await AssignmentService.checkout_many(db, project.id, worker.id, count=3, lease_seconds=60)
+    
+    counts = await ExpiryService.sweep(db, now + timedelta(hours=2))
+    
+    # The lease on the expired task closes with it; the others lapse on their own
+    assert counts == {"tasks": 1, "leases": 2}
+    statuses = dict((await db.execute(select(Task.id, Task.status))).all())
+    assert statuses == {
+        "due": TaskStatus.EXPIRED,
+        "open": TaskStatus.PENDING,
+        "forever": TaskStatus.PENDING
+    }
+    leases = (await db.execute(select(WorkerAssignment.status))).scalars().all()
+    assert leases == [AssignmentStatus.EXPIRED.value] * 3
+    await db.refresh(project)
+    assert project.expired_tasks == 1
+    
+    assert await ExpiryService.sweep(db, now + timedelta(hours=2)) == {"tasks": 0, "leases": 0}
+
+
+async def test_sweep_works_through_several_batches(db, project, monkeypatch):
+    monkeypatch.setattr(settings, "EXPIRY_SWEEP_BATCH_SIZE", 2)
+    now = utcnow()
+    await db.execute(insert(Task), [
+        {"id": f"t{i}", "project_id": project.id, "data": {"n": i}, "expires_at": now}
+        for i in range(5)
+    ])
+    await db.commit()
+    
+    assert await ExpiryService.sweep(db, now) == {"tasks": 5, "leases": 0}
\ No newline at end of file
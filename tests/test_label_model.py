@@ -0,0 +1,127 @@
+import numpy as np
+from sqlalchemy import insert, select
+
+from app.models.label_model import LabelModel, WorkerConfusion
+from app.models.response import Response, ResponseValue
+from app.models.task import Task, TaskQuestionConsensus
+from app.models.worker import Worker
+from app.services.label_model import LabelModelService, ResponseTensor, dawid_skene
+from app.services.project import ProjectService
+
+
+def _simulate(seed=3, tasks=400, labels=3, per_task=5):
+    """Answers of five accurate workers and three who pick at random"""
+    rng = np.random.default_rng(seed)
+    accuracy = np.array([0.85, 0.8, 0.8, 0.75, 0.7, 0.0, 0.0, 0.0])
+    truth = rng.integers(0, labels, tasks)
+    task_index, worker_index, given = [], [], []
+    for task, label in enumerate(truth):
+        for worker in rng.choice(len(accuracy), per_task, replace=False):
+            correct = rng.random() < accuracy[worker]
+            task_index.append(task)
+            worker_index.append(worker)
+            given.append(label if correct else rng.integers(0, labels))
+    tensor = ResponseTensor(
+        tasks=np.array(task_index, dtype=np.int64),
+        workers=np.array(worker_index, dtype=np.int64),
+        labels=np.array(given, dtype=np.int64),
+        task_ids=[f"t{i}" for i in range(tasks)],
+        worker_ids=[f"w{i}" for i in range(len(accuracy))],
+        names=[str(i) for i in range(labels)]
+    )
+    return tensor, truth
+
+
+def _majority_vote(tensor):
+    size = len(tensor.names)
+    votes = np.bincount(
+        tensor.tasks * size + tensor.labels, minlength=len(tensor.task_ids) * size
+    ).reshape(-1, size)
+    return votes.argmax(axis=1)
+
+
+def test_fit_outweighs_random_workers():
+    tensor, truth = _simulate()
+    
+    fit = dawid_skene(tensor, {})
+    
+    assert fit.converged
+    assert np.allclose(fit.posteriors.sum(axis=1), 1.0)
+    assert np.allclose(fit.confusion.sum(axis=2), 1.0)
+    fitted = (fit.posteriors.argmax(axis=1) == truth).mean()
+    assert fitted > (_majority_vote(tensor) == truth).mean()
+    assert fitted > 0.9
+    # Accurate workers get a strong diagonal, random ones about 1 / labels
+    diagonal = fit.confusion[:, np.arange(3), np.arange(3)].mean(axis=1)
+    assert diagonal[:5].min() > 0.7
+    assert diagonal[5:].max() < 0.5
+
+
+def test_gold_tasks_keep_their_expected_label():
+    tensor, truth = _simulate(tasks=60)
+    gold = {0: (int(truth[0]) + 1) % 3, 1: int(truth[1])}
+    
+    fit = dawid_skene(tensor, gold)
+    
+    for task, label in gold.items():
+        assert fit.posteriors[task, label] == 1.0
+
+
+def test_warm_start_converges_to_the_same_fit_quickly():
+    tensor, _ = _simulate()
+    cold = dawid_skene(tensor, {})
+    
+    warm = dawid_skene(tensor, {}, cold.confusion, cold.priors)
+    
+    assert warm.converged
+    assert warm.iterations < cold.iterations
+    assert (warm.posteriors.argmax(axis=1) == cold.posteriors.argmax(axis=1)).all()
+    assert np.allclose(warm.posteriors, cold.posteriors, atol=0.01)
+
+
+async def test_fit_writes_posteriors_and_worker_quality(db, project, question, make_worker):
+    workers = [await make_worker() for _ in range(3)]
+    answers = {
+        "t0": ["pos", "pos", "neg"],
+        "t1": ["neg", "neg", "neg"],
+        "t2": ["pos", "pos", "pos"]
+    }
+    await db.execute(insert(Task), [
+        {"id": task_id, "project_id": project.id, "data": {"id": task_id}} for task_id in answers
+    ])
+    responses, values = [], []
+    for task_id, labels in answers.items():
+        for worker, label in zip(workers, labels):
+            response_id = f"{task_id}-{worker.id}"
+            responses.append({"id": response_id, "task_id": task_id, "worker_id": worker.id})
+            values.append({"response_id": response_id, "question_id": question.id, "value": label})
+    await db.execute(insert(Response), responses)
+    await db.execute(insert(ResponseValue), values)
+    # Histogram kept by the consensus service; the fit must not overwrite it
+    await db.execute(insert(TaskQuestionConsensus), [{
+        "task_id": "t0", "question_id": question.id, "responses": 3, "counts": {"pos": 9}
+    }])
+    await db.commit()
+    project = await ProjectService.get(db, project.id)
+    
+    models = await LabelModelService.fit(db, project)
+    
+    assert [(m.tasks, m.workers, m.responses, m.warm_start) for m in models] == [(3, 3, 9, False)]
+    rows = {
+        row.task_id: row
+        for row in (await db.execute(select(TaskQuestionConsensus))).scalars()
+    }
+    assert {task_id: row.posterior_label for task_id, row in rows.items()} == {
+        "t0": "pos", "t1": "neg", "t2": "pos"
+    }
+    assert rows["t0"].counts == {"pos": 9}
+    assert (rows["t1"].counts, rows["t1"].label, rows["t1"].score) == ({"neg": 3}, "neg", 1.0)
+    assert len((await db.execute(select(WorkerConfusion))).all()) == 3
+    scores = (await db.execute(select(Worker.overall_quality_score))).scalars().all()
+    assert all(score is not None and 0 < score <= 1 for score in scores)
+    
+    db.expunge_all()
+    project = await ProjectService.get(db, project.id)
+    models = await LabelModelService.fit(db, project)
+    assert models[0].warm_start
+    assert await db.get(LabelModel, question.id) is models[0]
\ No newline at end of file
@@ -0,0 +1,134 @@
+from sqlalchemy import insert, select
+
+from app.models.response import Response
+from app.models.task import Task, TaskStatus
+from app.models.worker import WorkerAssignment, AssignmentStatus
+from app.schemas.response import ResponseCreate, ResponseValueCreate
+from app.services.assignment import AssignmentService
+from app.services.project import ProjectService
+from app.services.response import ResponseService
+
+
+async def _add_task(db, project, required_responses):
+    await db.execute(insert(Task), [{
+        "id": "t0",
+        "project_id": project.id,
+        "data": {"text": "great"},
+        "required_responses": required_responses
+    }])
+    await db.commit()
+
+
+def _answer(lease, question, value):
+    return ResponseCreate(
+        assignment_id=lease.id,
+        values=[ResponseValueCreate(question_id=question.id, value=value)]
+    )
+
+
+async def test_submit_closes_the_lease_once(db, project, question, make_worker):
+    await _add_task(db, project, required_responses=2)
+    project = await ProjectService.get(db, project.id)
+    worker = await make_worker()
+    lease, _ = await AssignmentService.checkout(db, project.id, worker.id)
+    
+    result = await ResponseService.submit_many(
+        db, project, worker.id, [_answer(lease, question, "pos"), _answer(lease, question, "pos")]
+    )
+    
+    assert len(result.submitted) == 1
+    assert [r.status_code for r in result.rejected] == [400]
+    lease = await db.get(WorkerAssignment, lease.id)
+    await db.refresh(lease)
+    assert lease.status == AssignmentStatus.COMPLETED.value
+    
+    result = await ResponseService.submit_many(
+        db, project, worker.id, [_answer(lease, question, "pos")]
+    )
+    assert [r.status_code for r in result.rejected] == [404]
+    assert await db.scalar(select(Response.task_id)) == "t0"
+
+
+async def test_submit_rejects_values_outside_the_options(db, project, question, make_worker):
+    await _add_task(db, project, required_responses=1)
+    project = await ProjectService.get(db, project.id)
+    worker = await make_worker()
+    lease, _ = await AssignmentService.checkout(db, project.id, worker.id)
+    
+    result = await ResponseService.submit_many(
+        db, project, worker.id, [_answer(lease, question, "meh")]
+    )
+    
+    assert not result.submitted
+    assert [r.status_code for r in result.rejected] == [422]
+    task = await db.get(Task, "t0")
+    await db.refresh(task)
+    assert (task.completed_responses, task.active_leases) == (0, 1)
+
+async def _respond(db, project, question, worker, value):
+    lease, _ = await AssignmentService.checkout(db, project.id, worker.id)
+    result = await ResponseService.submit_many(
+        db, project, worker.id, [_answer(lease, question, value)]
+    )
+    assert not result.rejected
+    return result.submitted[0]
+
+
+async def _configure(db, project, **fields):
+    for field, value in fields.items():
+        setattr(project, field, value)
+    await db.commit()
+    return await ProjectService.get(db, project.id)
+
+
+async def test_agreeing_responses_complete_the_task(db, project, question, make_worker):
+    await _add_task(db, project, required_responses=2)
+    project = await _configure(db, project, consensus_threshold=0.75)
+    
+    first = await _respond(db, project, question, await make_worker(), "pos")
+    second = await _respond(db, project, question, await make_worker(), "pos")
+    
+    assert (first.task_completed, second.task_completed) == (False, True)
+    task = await db.get(Task, "t0")
+    await db.refresh(task)
+    assert (task.status, task.consensus_score) == (TaskStatus.COMPLETED, 1.0)
+    scores = (await db.execute(select(Response.consensus_score))).scalars().all()
+    assert scores == [1.0, 1.0]
+    await db.refresh(project)
+    assert (project.completed_tasks, project.total_responses) == (1, 2)
+
+
+async def test_disagreement_gets_a_tiebreaker_response(db, project, question, make_worker):
+    await _add_task(db, project, required_responses=2)
+    project = await _configure(
+        db, project, consensus_threshold=0.6, enable_tiebreaker=True, max_responses_per_task=3
+    )
+    
+    await _respond(db, project, question, await make_worker(), "pos")
+    await _respond(db, project, question, await make_worker(), "neg")
+    task = await db.get(Task, "t0")
+    await db.refresh(task)
+    assert task.status == TaskStatus.IN_PROGRESS
+    assert (task.required_responses, task.consensus_score) == (3, 0.5)
+    
+    third = await _respond(db, project, question, await make_worker(), "pos")
+    
+    assert third.task_completed
+    await db.refresh(task)
+    assert task.status == TaskStatus.COMPLETED
+    assert round(task.consensus_score, 3) == 0.667
+
+
+async def test_disagreement_without_tiebreaker_needs_review(db, project, question, make_worker):
+    await _add_task(db, project, required_responses=2)
+    project = await _configure(db, project, consensus_threshold=0.75, enable_tiebreaker=False)
+    
+    await _respond(db, project, question, await make_worker(), "pos")
+    last = await _respond(db, project, question, await make_worker(), "neg")
+    
+    assert not last.task_completed
+    task = await db.get(Task, "t0")
+    await db.refresh(task)
+    assert (task.status, task.required_responses) == (TaskStatus.NEEDS_REVIEW, 2)
+    await db.refresh(project)
+    assert project.completed_tasks == 0
\ No newline at end of file
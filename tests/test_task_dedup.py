@@ -0,0 +1,68 @@
+import io
+
+from sqlalchemy import select, insert
+
+from app.models.task import Task
+from app.schemas.task import TaskCreate, TaskConflictMode
+from app.services.dispatch import dispatch_queues
+from app.services.task import TaskService
+from app.services.task_dedup import TaskDedupService, content_hash
+from app.services.task_import import TaskImportService
+
+
+def test_content_hash_ignores_key_order():
+    assert content_hash({"a": 1, "b": [1, 2]}) == content_hash({"b": [1, 2], "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": "1"})
+
+
+async def test_create_many_links_duplicates_to_one_task(db, project):
+    tasks_in = [TaskCreate(data={"text": text}) for text in ("a", "b", "a")]
+    
+    tasks = await TaskService.create_many(db, tasks_in, project.id)
+    
+    assert tasks[0].id == tasks[2].id
+    assert tasks[0].id != tasks[1].id
+    await db.refresh(project)
+    assert project.total_tasks == 2
+
+
+async def test_upsert_reports_content_already_in_the_project(db, project):
+    await TaskService.create_many(db, [TaskCreate(data={"text": "a"})], project.id)
+    tasks_in = [TaskCreate(data={"text": "a"}), TaskCreate(data={"text": "b"})]
+    
+    result = await TaskService.upsert_many(db, tasks_in, project.id, TaskConflictMode.ERROR)
+    
+    assert (result.created, result.duplicates) == (1, 1)
+
+
+async def test_import_counts_duplicate_rows(db, project):
+    fileobj = io.BytesIO(b"external_id,text\n1,same\n2,same\n3,other\n")
+    
+    result = await TaskImportService.import_file(db, fileobj, "csv", project.id)
+    
+    assert (result.task_count, result.duplicate_count) == (2, 1)
+    kept = await db.scalar(select(Task.id).where(Task.external_id == "1"))
+    assert [(d.external_id, d.task_id) for d in result.duplicates] == [("2", kept)]
+
+
+async def test_scan_removes_copies_and_drops_them_from_the_ready_queue(db, project):
+    # Rows written around the service have no content hash yet
+    await db.execute(insert(Task), [
+        {"id": f"t{i}", "project_id": project.id, "data": {"x": i % 3}, "required_responses": 1}
+        for i in range(9)
+    ])
+    await db.commit()
+    queue = await dispatch_queues.rebuild(db, project.id)
+    
+    report = await TaskDedupService.scan_project(db, project.id)
+    assert (report.duplicate_groups, report.duplicate_tasks, report.removed_tasks) == (3, 6, 0)
+    
+    report = await TaskDedupService.scan_project(db, project.id, apply=True)
+    assert report.removed_tasks == 6
+    
+    remaining = (await db.execute(select(Task.id).order_by(Task.id))).scalars().all()
+    assert remaining == ["t0", "t1", "t2"]
+    popped = []
+    while (task_id := queue.pop("worker")) is not None:
+        popped.append(task_id)
+    assert sorted(popped) == remaining
\ No newline at end of file
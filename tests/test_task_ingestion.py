@@ -0,0 +1,84 @@
+import io
+
+from sqlalchemy import select, func
+
+from app.models.task import Task, TaskPriority
+from app.schemas.task import TaskCreate, TaskConflictMode, TaskImportOptions
+from app.services.task import TaskService
+from app.services.task_import import TaskImportService
+
+
+def _tasks(n, **fields):
+    return [
+        TaskCreate(external_id=f"ext-{i}", data={"text": f"row {i}"}, **fields)
+        for i in range(n)
+    ]
+
+
+async def _task_count(db, project_id):
+    return await db.scalar(select(func.count(Task.id)).where(Task.project_id == project_id))
+
+
+async def test_create_many_inserts_tasks_and_counts_them(db, project):
+    tasks = await TaskService.create_many(db, _tasks(3), project.id)
+    
+    assert [task.external_id for task in tasks] == ["ext-0", "ext-1", "ext-2"]
+    assert await _task_count(db, project.id) == 3
+    await db.refresh(project)
+    assert project.total_tasks == 3
+
+
+async def test_upsert_counts_created_updated_and_skipped(db, project):
+    result = await TaskService.upsert_many(db, _tasks(3), project.id, TaskConflictMode.ERROR)
+    assert (result.created, result.updated, result.skipped) == (3, 0, 0)
+    
+    # Same content with a new priority still updates the existing rows
+    result = await TaskService.upsert_many(
+        db, _tasks(4, priority=TaskPriority.HIGH), project.id, TaskConflictMode.UPDATE
+    )
+    assert (result.created, result.updated, result.skipped) == (1, 3, 0)
+    assert result.duplicates == 0
+    
+    result = await TaskService.upsert_many(db, _tasks(5), project.id, TaskConflictMode.SKIP)
+    assert (result.created, result.updated, result.skipped) == (1, 0, 4)
+    
+    assert await _task_count(db, project.id) == 5
+    priorities = dict((await db.execute(select(Task.external_id, Task.priority))).all())
+    assert priorities["ext-0"] == TaskPriority.HIGH
+    assert priorities["ext-3"] == TaskPriority.HIGH
+    assert priorities["ext-4"] == TaskPriority.MEDIUM
+    await db.refresh(project)
+    assert project.total_tasks == 5
+
+
+async def test_csv_import_counts_rows_per_conflict_mode(db, project):
+    def csv_file(text):
+        rows = "".join(f"ext-{i},{text} {i}\n" for i in range(5))
+        return io.BytesIO(f"external_id,text\n{rows}".encode())
+    
+    result = await TaskImportService.import_file(db, csv_file("row"), "csv", project.id)
+    assert (result.total_rows, result.task_count, result.failed_count) == (5, 5, 0)
+    
+    skip = TaskImportOptions(on_conflict=TaskConflictMode.SKIP)
+    result = await TaskImportService.import_file(db, csv_file("row"), "csv", project.id, skip)
+    assert (result.task_count, result.skipped_count, result.updated_count) == (0, 5, 0)
+    
+    update = TaskImportOptions(on_conflict=TaskConflictMode.UPDATE)
+    result = await TaskImportService.import_file(db, csv_file("edited"), "csv", project.id, update)
+    assert (result.task_count, result.skipped_count, result.updated_count) == (0, 0, 5)
+    
+    data = (await db.execute(
+        select(Task.data).where(Task.project_id == project.id).order_by(Task.external_id)
+    )).scalars().all()
+    assert data == [{"text": f"edited {i}"} for i in range(5)]
+    assert await _task_count(db, project.id) == 5
+
+
+async def test_import_dry_run_writes_nothing(db, project):
+    fileobj = io.BytesIO(b"external_id,text\na,one\nb,two\n")
+    options = TaskImportOptions(dry_run=True)
+    
+    result = await TaskImportService.import_file(db, fileobj, "csv", project.id, options)
+    
+    assert result.total_rows == 2
+    assert await _task_count(db, project.id) == 0
\ No newline at end of file